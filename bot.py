@@ -1,8 +1,13 @@
 """
 Telegram Bot - Otomatik Teklif Oluşturma
 """
+import asyncio
+import functools
 import logging
-from telegram import Update, ReplyKeyboardMarkup, ReplyKeyboardRemove
+import time
+from startup import LazyComponent, StartupReport, PROCESS_START
+from telegram import Update, ReplyKeyboardMarkup, ReplyKeyboardRemove, InputMediaDocument
+from telegram.error import TelegramError
 from telegram.ext import (
     Application,
     CommandHandler,
@@ -14,11 +19,11 @@ from telegram.ext import (
 from pathlib import Path
 from datetime import datetime
 import config
-from excel_handler import ExcelHandler
-from pdf_reader import PDFReader
-from pdf_converter import PDFConverter
-from gemini_ocr import GeminiOCR
-from email_sender import EmailSender
+from worker_pool import WorkerPool
+from progress import ProgressReporter
+from document_queue import DocumentJobQueue, QueueFullError, PRIORITY_INTERACTIVE, PRIORITY_BULK
+from update_processor import ChatSerialUpdateProcessor, collect_allowed_updates
+from rate_limiter import OutboundRateLimiter
 
 logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -30,29 +35,125 @@ logger = logging.getLogger(__name__)
  ASK_NOTES_CHOICE, ASK_NOTES_TEXT, ASK_PROJECT_TYPE, ASK_CONTRACT_AMOUNT, ASK_SEND_EMAIL, ASK_EMAIL_FOR_SENDING,
  ASK_DELIVERY_DATE_CHOICE, ASK_DELIVERY_DATE) = range(24)
 
+# Arka plan dönüşümleri kuyrukta bu sahip adına PRIORITY_BULK ile çalışır
+BACKGROUND_JOB_OWNER = 0
+BACKGROUND_CONVERSION_COMPONENTS = ('converters',)
+
 class OfferBot:
     def __init__(self):
-        self.excel_handler = ExcelHandler()
-        self.pdf_reader = PDFReader()
-        self.pdf_converter = PDFConverter()
+        # Ağır modüller (OCR, Gemini, SendGrid, docx/openpyxl) ilk kullanımda
+        # veya bot başladıktan sonra arka planda yüklenir
+        self.startup_report = StartupReport()
+        self._components = {
+            component.name: component
+            for component in (
+                LazyComponent('excel_handler', 'excel_handler', lambda m: m.ExcelHandler().prepare(), self.startup_report),
+                LazyComponent('pdf_converter', 'pdf_converter', lambda m: m.PDFConverter(), self.startup_report),
+                LazyComponent('document_handler', 'document_handler', lambda m: m.DocumentHandler().prepare(), self.startup_report),
+                LazyComponent('pdf_reader', 'pdf_reader', lambda m: m.PDFReader(), self.startup_report),
+                LazyComponent('gemini_ocr', 'gemini_ocr', self._create_gemini_ocr, self.startup_report, optional=True),
+                LazyComponent('email_sender', 'email_sender', self._create_email_sender, self.startup_report),
+                # PDF dönüştürücüleri yokla, sıcak LibreOffice örneklerini başlat
+                LazyComponent('converters', 'converter_backends', lambda m: m.get_registry().probe(), self.startup_report),
+                # Sabit düzenli formlar için overlay hızlı yolu (kapalıysa None)
+                LazyComponent('pdf_overlay', 'pdf_overlay', lambda m: m.get_overlay_engine(), self.startup_report, optional=True),
+            )
+        }
+        
+        # Bloklayan işler için worker havuzu
+        self.worker_pool = WorkerPool()
+        
+        # Belge oluşturma kuyruğu (LibreOffice/Tesseract aşırı yüklenmesin)
+        self.document_queue = DocumentJobQueue()
         
-        # Gemini OCR'ı başlat (varsa)
+        Path(config.TEMP_DIR).mkdir(exist_ok=True)
+        Path(config.OUTPUT_DIR).mkdir(exist_ok=True)
+    
+    @staticmethod
+    def _create_gemini_ocr(module):
+        """Gemini OCR'ı başlat (yoksa None, Tesseract kullanılır)"""
         try:
-            self.gemini_ocr = GeminiOCR(api_key=config.GEMINI_API_KEY)
+            gemini_ocr = module.GeminiOCR(api_key=config.GEMINI_API_KEY)
             logger.info('✅ Gemini Vision OCR aktif')
+            return gemini_ocr
         except Exception as e:
-            self.gemini_ocr = None
             logger.warning(f'⚠️ Gemini OCR başlatılamadı: {e}')
+            return None
+    
+    @staticmethod
+    def _create_email_sender(module):
+        email_sender = module.EmailSender()
+        logger.info(f'📧 Email durumu: {"Aktif" if email_sender.enabled else "Devre dışı"}')
+        return email_sender
+    
+    async def component(self, name):
+        """Bileşeni getir; henüz yüklenmediyse event loop'u bloklamadan yükle"""
+        component = self._components[name]
+        if component.ready:
+            return component.get()
+        return await self.worker_pool.run_io(component.get)
+    
+    async def warm_up(self):
+        """Tüm bileşenleri arka planda yükle ve süre raporunu yaz"""
+        started = time.perf_counter()
+        names = [name for name in self._components if name not in BACKGROUND_CONVERSION_COMPONENTS]
+        results = await asyncio.gather(
+            *(self.component(name) for name in names),
+            return_exceptions=True,
+        )
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                logger.error(f'❌ {name} yüklenemedi: {result}')
+        self.startup_report.log(f'Isınma tamamlandı ({time.perf_counter() - started:.2f} sn)')
         
-        from document_handler import DocumentHandler
-        self.document_handler = DocumentHandler()
-        
-        # Email sender'ı başlat
-        self.email_sender = EmailSender()
-        logger.info(f'📧 Email durumu: {"Aktif" if self.email_sender.enabled else "Devre dışı"}')
+        # LibreOffice kullanan ısınma işleri kullanıcı işlerinin arkasında sıraya girer
+        try:
+            async with self.document_queue.slot(BACKGROUND_JOB_OWNER, priority=PRIORITY_BULK):
+                await self._warm_up_conversions()
+        except QueueFullError as e:
+            logger.warning(f'⚠️ Dönüştürücü ısınması atlandı: {e}')
+    
+    async def _warm_up_conversions(self):
+        """Dönüştürücüleri yokla ve sabit formların temel PDF'lerini bir kez oluştur"""
+        try:
+            await self.component('converters')
+        except Exception as e:
+            logger.error(f'❌ converters yüklenemedi: {e}')
         
-        Path(config.TEMP_DIR).mkdir(exist_ok=True)
-        Path(config.OUTPUT_DIR).mkdir(exist_ok=True)
+        pdf_overlay = await self.component('pdf_overlay')
+        if pdf_overlay:
+            await self.worker_pool.run_io(pdf_overlay.prepare)
+    
+    async def post_init(self, application: Application):
+        """Bot update almaya başlamadan hemen önce: ağır modülleri arka planda yükle"""
+        logger.info(f'🚀 Bot {time.perf_counter() - PROCESS_START:.2f} sn içinde hazır')
+        if config.WARMUP_ON_START:
+            application.create_task(self.warm_up())
+    
+    async def post_shutdown(self, application: Application):
+        """Uygulama kapanırken worker havuzunu ve LibreOffice örneklerini kapat"""
+        self.worker_pool.shutdown()
+        converters = self._components['converters']
+        if converters.ready and converters.get():
+            converters.get().shutdown()
+    
+    def diagnostics(self):
+        """Sağlık endpoint'i için durum bilgisi"""
+        converters = self._components['converters']
+        pdf_overlay = self._components['pdf_overlay']
+        excel_handler = self._components['excel_handler']
+        document_handler = self._components['document_handler']
+        return {
+            'document_queue': {'active': self.document_queue.active, 'waiting': self.document_queue.waiting},
+            'converters': converters.get().diagnostics() if converters.ready and converters.get() else None,
+            'pdf_overlay': pdf_overlay.get().diagnostics() if pdf_overlay.ready and pdf_overlay.get() else None,
+            'offer_template': excel_handler.get().diagnostics() if excel_handler.ready else None,
+            'document_templates': document_handler.get().diagnostics() if document_handler.ready else None,
+            'startup': {
+                name: {'import_ms': round(import_seconds * 1000), 'init_ms': round(init_seconds * 1000)}
+                for name, (import_seconds, init_seconds) in self.startup_report.entries().items()
+            },
+        }
     
     async def start(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(config.MESSAGES['start'], parse_mode='Markdown')
@@ -86,27 +187,32 @@ class OfferBot:
             await update.message.reply_text("❌ Lütfen bir PDF dosyası gönderin.")
             return ASK_TAX_PDF
         
+        # Tüm ara durumlar tek mesajda gösterilir (indirme ile paralel gönderilir)
+        progress = ProgressReporter(update.message)
+        progress.update("⏳ Vergi levhası okunuyor...")
+        
         file = await update.message.document.get_file()
         temp_dir = Path(config.TEMP_DIR)
         pdf_path = temp_dir / f'tax_{update.message.from_user.id}.pdf'
         await file.download_to_drive(pdf_path)
-        await update.message.reply_text("⏳ Vergi levhası okunuyor...")
         
         try:
             # Önce Gemini Vision ile dene (daha doğru)
-            if self.gemini_ocr:
+            gemini_ocr = await self.component('gemini_ocr')
+            pdf_reader = await self.component('pdf_reader')
+            if gemini_ocr:
                 logger.info('🤖 Gemini Vision ile PDF okuma deneniyor...')
-                await update.message.reply_text("🤖 Gemini AI ile analiz ediliyor...")
-                tax_info = self.gemini_ocr.extract_tax_info_from_pdf(str(pdf_path))
+                progress.update("🤖 Gemini AI ile analiz ediliyor...")
+                tax_info = await self.worker_pool.run_io(gemini_ocr.extract_tax_info_from_pdf, str(pdf_path))
                 
                 # Gemini başarısızsa Tesseract'e düş
                 if not tax_info.get('company_name'):
                     logger.warning('⚠️ Gemini okuamadı, Tesseract deneniyor...')
-                    await update.message.reply_text("🔄 Alternatif yöntemle deneniyor...")
-                    tax_info = self.pdf_reader.extract_tax_info(str(pdf_path))
+                    progress.update("🔄 Alternatif yöntemle deneniyor...")
+                    tax_info = await self.worker_pool.run_cpu(pdf_reader.extract_tax_info, str(pdf_path))
             else:
                 # Gemini yoksa direkt Tesseract
-                tax_info = self.pdf_reader.extract_tax_info(str(pdf_path))
+                tax_info = await self.worker_pool.run_cpu(pdf_reader.extract_tax_info, str(pdf_path))
             
             company_name = tax_info.get('company_name', '')
             
@@ -115,13 +221,13 @@ class OfferBot:
             
             if company_name:
                 context.user_data['customer_name'] = company_name
-                await update.message.reply_text(config.MESSAGES['pdf_read_success'].format(company_name=company_name), parse_mode='Markdown')
+                await progress.finish(config.MESSAGES['pdf_read_success'].format(company_name=company_name), parse_mode='Markdown')
             else:
-                await update.message.reply_text(config.MESSAGES['pdf_read_error'])
+                await progress.finish(config.MESSAGES['pdf_read_error'])
                 context.user_data['customer_name'] = 'Firma Adı Belirtilmedi'
         except Exception as e:
             logger.error(f'PDF okuma hatası: {e}')
-            await update.message.reply_text(config.MESSAGES['pdf_read_error'])
+            await progress.finish(config.MESSAGES['pdf_read_error'])
             context.user_data['customer_name'] = 'Firma Adı Belirtilmedi'
             context.user_data['tax_data'] = {}
         
@@ -163,8 +269,9 @@ class OfferBot:
     
     async def receive_tax_photo(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Vergi levhası fotoğrafını işle - SADECE GEMINI VISION"""
+        progress = ProgressReporter(update.message)
         try:
-            await update.message.reply_text("📸 Fotoğraf alındı, AI Vision ile okunuyor...")
+            progress.update("📸 Fotoğraf alındı, AI Vision ile okunuyor...")
             
             # Fotoğrafı indir
             photo = await update.message.photo[-1].get_file()
@@ -175,11 +282,12 @@ class OfferBot:
             # 🤖 SADECE GEMİNI VISION KULLAN
             tax_data = None
             gemini_success = False
+            gemini_ocr = await self.component('gemini_ocr')
             
-            if self.gemini_ocr:
+            if gemini_ocr:
                 try:
-                    await update.message.reply_text("🤖 Google Gemini Vision ile analiz ediliyor...")
-                    tax_data = self.gemini_ocr.extract_tax_info(str(photo_path))
+                    progress.update("🤖 Google Gemini Vision ile analiz ediliyor...")
+                    tax_data = await self.worker_pool.run_io(gemini_ocr.extract_tax_info, str(photo_path))
                     
                     # Başarılı mı kontrol et (tüm alanlar dolu mu?)
                     if (tax_data.get('company_name') and 
@@ -188,18 +296,19 @@ class OfferBot:
                         len(tax_data.get('tax_number', '')) == 10):
                         
                         gemini_success = True
-                        await update.message.reply_text("✅ AI Vision ile başarıyla okundu!")
+                        progress.update("✅ AI Vision ile başarıyla okundu!")
                         
                 except Exception as e:
                     logger.error(f'Gemini okuma hatası: {e}')
                     gemini_success = False
             else:
-                await update.message.reply_text("❌ AI Vision mevcut değil (API key eksik)")
+                progress.update("❌ AI Vision mevcut değil (API key eksik)")
             
             photo_path.unlink(missing_ok=True)
             
             # ❌ GEMİNİ BAŞARISIZ OLURSA MANUEL GİRİŞ TEKLİF ET
             if not gemini_success:
+                await progress.finish()
                 keyboard = [['Evet, manuel gireceğim', 'Hayır, iptal et']]
                 await update.message.reply_text(
                     "⚠️ *Fotoğraf otomatik okunamadı.*\n\n"
@@ -218,7 +327,7 @@ class OfferBot:
             context.user_data['customer_name'] = tax_data.get('company_name', 'Firma Adı Belirtilmedi')
             context.user_data['tax_data'] = tax_data
             
-            await update.message.reply_text(
+            await progress.finish(
                 f"✅ *Bilgiler başarıyla okundu:*\n\n"
                 f"📋 *Firma:* {tax_data.get('company_name', 'Okunamadı')}\n"
                 f"🏢 *Vergi Dairesi:* {tax_data.get('tax_office', 'Okunamadı')}\n"
@@ -229,7 +338,7 @@ class OfferBot:
                 
         except Exception as e:
             logger.error(f'Fotoğraf okuma hatası: {e}')
-            await update.message.reply_text(
+            await progress.finish(
                 f"❌ Bir hata oluştu: {str(e)}\n\n"
                 "Lütfen tekrar deneyin veya PDF olarak yükleyin."
             )
@@ -510,7 +619,6 @@ class OfferBot:
                 return await self.ask_project_type(update, context)
             else:
                 # YTB seçilmişse direkt belge oluşturmaya geç
-                await update.message.reply_text(config.MESSAGES['processing'], reply_markup=ReplyKeyboardRemove(), parse_mode='Markdown')
                 return await self.generate_documents(update, context)
     
     async def receive_delivery_date(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -524,7 +632,6 @@ class OfferBot:
             return await self.ask_project_type(update, context)
         else:
             # YTB seçilmişse direkt belge oluşturmaya geç
-            await update.message.reply_text(config.MESSAGES['processing'], reply_markup=ReplyKeyboardRemove(), parse_mode='Markdown')
             return await self.generate_documents(update, context)
     
     async def ask_project_type(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -568,8 +675,7 @@ class OfferBot:
             await update.message.reply_text(
                 f"✅ Sözleşme bedeli kaydedildi:\n"
                 f"• Tutar: {ucret_bilgisi['tutar']}\n"
-                f"• Açıklama: {ucret_bilgisi['aciklama']}\n\n"
-                "📄 Belgeler hazırlanıyor...",
+                f"• Açıklama: {ucret_bilgisi['aciklama']}",
                 parse_mode='Markdown'
             )
             
@@ -666,6 +772,31 @@ class OfferBot:
 
     
     async def generate_documents(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Belge oluşturma işini kuyruğa al, sıra gelince belgeleri oluştur"""
+        # Kuyruk sırası ve belge adımları tek durum mesajında gösterilir
+        progress = ProgressReporter(update.message, reply_markup=ReplyKeyboardRemove())
+        progress.update(config.MESSAGES['processing'])
+        
+        async def on_position(position):
+            progress.update(f"⏳ Yoğunluk var, sıranız: #{position}\n\nSıra size gelince belgeler otomatik hazırlanacak.")
+        
+        try:
+            async with self.document_queue.slot(
+                update.effective_user.id,
+                priority=PRIORITY_INTERACTIVE,
+                on_position=on_position
+            ):
+                return await self._create_documents(update, context, progress)
+        except QueueFullError as e:
+            logger.warning(f'Belge kuyruğu reddetti: {e}')
+            if e.per_user:
+                text = "⚠️ Devam eden bir belge oluşturma işleminiz var. Lütfen tamamlanmasını bekleyin."
+            else:
+                text = "⚠️ Sistem şu an çok yoğun. Lütfen birkaç dakika sonra /yeni ile tekrar deneyin."
+            await progress.finish(text)
+            return ConversationHandler.END
+    
+    async def _create_documents(self, update: Update, context: ContextTypes.DEFAULT_TYPE, progress):
         """Belge oluşturma işlemini gerçekleştir (YTB veya Proje)"""
         try:
             # Müşteri verileri
@@ -694,65 +825,137 @@ class OfferBot:
                 'delivery_date': context.user_data.get('delivery_date', '')  # Planlanan teslim tarihi
             }
             
-            pdf_files = []
             tax_data = context.user_data.get('tax_data', {})
             email = context.user_data.get('email', '')
-
+            
+            excel_handler = await self.component('excel_handler')
+            pdf_converter = await self.component('pdf_converter')
+            document_handler = await self.component('document_handler')
+            pdf_overlay = await self.component('pdf_overlay')
+            
+            def overlay(form_name):
+                """Sabit düzenli form için doğrudan PDF üreten hızlı yol (yoksa None)"""
+                return functools.partial(pdf_overlay.render, form_name) if pdf_overlay else None
+            
+            # Belge adımları: (ad, doldurma fonksiyonu, argümanlar, PDF dönüştürücü, doğrudan PDF hızlı yolu)
+            # Adımlar birbirinden bağımsız olduğu için paralel çalışır
+            steps = []
+            
             # Eğer kullanıcı YTB Teklifi seçtiyse YTB ile ilgili 3 belgeyi oluştur
             if context.user_data.get('initial_choice') == 'YTB':
-                # 1. YTB Teklif Excel'i oluştur
-                await update.message.reply_text("📄 1/4 - Teklif formu hazırlanıyor...")
-                excel_path = self.excel_handler.create_offer(customer_data, services, offer_info)
-                subtotal = sum(s['quantity'] * s['unit_price'] for s in services)
-                kdv = subtotal * config.KDV_RATE
-                total = subtotal + kdv
-
-                # Excel'i PDF'e çevir
-                pdf_path = self.pdf_converter.excel_to_pdf(excel_path)
-                if pdf_path and Path(pdf_path).exists():
-                    pdf_files.append(pdf_path)
-
-                # 2. Yetkilendirme Taahhütnamesi oluştur
+                # 1. YTB Teklif formu (varsayılan: Excel'siz doğrudan PDF)
+                native_offer = excel_handler.create_offer_pdf if config.OFFER_PDF_RENDERER == 'native' else None
+                steps.append(('Teklif formu', excel_handler.create_offer,
+                              (customer_data, services, offer_info), pdf_converter.excel_to_pdf, native_offer))
+                
                 if tax_data and email:
-                    await update.message.reply_text("📄 2/4 - Yetkilendirme Taahhütnamesi hazırlanıyor...")
-                    word_file = self.document_handler.fill_yetkilendirme_taahhutnamesi(tax_data)
-                    if word_file:
-                        word_pdf = self.document_handler.convert_to_pdf(word_file)
-                        if word_pdf and Path(word_pdf).exists():
-                            pdf_files.append(word_pdf)
-
-                    # 3. Kullanıcı Yetkilendirme Formu oluştur
-                    await update.message.reply_text("📄 3/4 - Kullanıcı Yetkilendirme Formu hazırlanıyor...")
-                    excel_form = self.document_handler.fill_kullanici_yetkilendirme_formu(tax_data, email)
-                    if excel_form:
-                        excel_form_pdf = self.document_handler.convert_to_pdf(excel_form)
-                        if excel_form_pdf and Path(excel_form_pdf).exists():
-                            pdf_files.append(excel_form_pdf)
-
+                    # 2. Yetkilendirme Taahhütnamesi
+                    steps.append(('Yetkilendirme Taahhütnamesi', document_handler.fill_yetkilendirme_taahhutnamesi,
+                                  (tax_data,), document_handler.convert_to_pdf, overlay('yetkilendirme_taahhutnamesi')))
+                    # 3. Kullanıcı Yetkilendirme Formu
+                    steps.append(('Kullanıcı Yetkilendirme Formu', document_handler.fill_kullanici_yetkilendirme_formu,
+                                  (tax_data, email), document_handler.convert_to_pdf, overlay('kullanici_yetkilendirme_formu')))
+            
             # Eğer kullanıcı Proje seçtiyse sözleşme ve KOSGEB Vekaletname oluştur
             elif context.user_data.get('initial_choice') == 'PROJE':
                 proje_turu = context.user_data.get('proje_turu')
                 ucret_bilgisi = context.user_data.get('ucret_bilgisi')
                 if proje_turu and ucret_bilgisi and tax_data:
-                    # 1. Sözleşme
-                    await update.message.reply_text("📄 1/2 - Sözleşme hazırlanıyor...")
-                    sozlesme_file = self.document_handler.fill_sozlesme(tax_data, proje_turu, ucret_bilgisi)
-                    if sozlesme_file:
-                        sozlesme_pdf = self.document_handler.convert_to_pdf(sozlesme_file)
-                        if sozlesme_pdf and Path(sozlesme_pdf).exists():
-                            pdf_files.append(sozlesme_pdf)
-                    
-                    # 2. KOSGEB Vekaletname
-                    await update.message.reply_text("📄 2/2 - KOSGEB Vekaletname hazırlanıyor...")
-                    # Email bilgisini tax_data'ya ekle
+                    # Email bilgisini tax_data'ya ekle (KOSGEB Vekaletname için)
                     tax_data_with_email = tax_data.copy()
                     tax_data_with_email['email'] = email
                     
-                    kosgeb_file = self.document_handler.fill_kosgeb_vekaletname(tax_data_with_email)
-                    if kosgeb_file:
-                        kosgeb_pdf = self.document_handler.convert_to_pdf(kosgeb_file)
-                        if kosgeb_pdf and Path(kosgeb_pdf).exists():
-                            pdf_files.append(kosgeb_pdf)
+                    # 1. Sözleşme
+                    steps.append(('Sözleşme', document_handler.fill_sozlesme,
+                                  (tax_data, proje_turu, ucret_bilgisi), document_handler.convert_to_pdf, None))
+                    # 2. KOSGEB Vekaletname
+                    steps.append(('KOSGEB Vekaletname', document_handler.fill_kosgeb_vekaletname,
+                                  (tax_data_with_email,), document_handler.convert_to_pdf, None))
+            
+            # Adım durumları: ⏳ hazırlanıyor, ✅ hazır, ⚠️ PDF'e çevrilemedi, ❌ hata
+            step_status = ['⏳'] * len(steps)
+            
+            def steps_text(header):
+                lines = [f"{icon} {name}" for icon, (name, *_) in zip(step_status, steps)]
+                return header + "\n\n" + "\n".join(lines)
+            
+            def show_steps(header):
+                progress.update(steps_text(header))
+            
+            if steps:
+                show_steps(f"📄 {len(steps)} belge hazırlanıyor...")
+            
+            # Akış modunda her PDF hazır olur olmaz kullanıcıya gönderilir
+            stream = config.DOCUMENT_DELIVERY_MODE == 'stream'
+            
+            # Tüm dönüştürücülerin devresi açıksa PDF beklenmez, Word/Excel gönderilir
+            convertible = await self.worker_pool.run_io(pdf_converter.conversion_available)
+            
+            # Sıcak LibreOffice havuzu yoksa belgeler önce doldurulur, sonra
+            # tek soffice çağrısında toplu çevrilir
+            batch = convertible and len(steps) > 1 and await self.worker_pool.run_io(pdf_converter.prefers_batch)
+            
+            # Akış modunda gönderilebilen PDF'ler; gönderilemeyenler sonda paketle tekrar denenir
+            streamed = set()
+            
+            async def finish_step(index, source_file, pdf_file):
+                step_status[index] = '✅' if pdf_file else ('⚠️' if source_file else '❌')
+                show_steps(f"📄 {len(steps)} belge hazırlanıyor...")
+                if stream and pdf_file:
+                    # Gönderim hatası belge oluşturma hatası değildir; PDF sonuçta kalır
+                    try:
+                        await self._send_document(update, pdf_file)
+                        streamed.add(pdf_file)
+                    except TelegramError as e:
+                        logger.warning(f'{steps[index][0]} gönderilemedi, pakette tekrar denenecek: {e}')
+                return source_file, pdf_file
+            
+            async def run_step(index, fill, args, convert, fast):
+                try:
+                    # Doğrudan PDF yolu LibreOffice'e ihtiyaç duymaz; olmazsa normal yola düşülür
+                    pdf_file = await self.worker_pool.run_io(fast, *args) if fast else None
+                    if pdf_file:
+                        return await finish_step(index, None, pdf_file)
+                    if batch or not convertible:
+                        return await self.worker_pool.run_io(fill, *args), None
+                    source_file, pdf_file = await self._build_document(fill, args, convert)
+                except Exception:
+                    step_status[index] = '❌'
+                    show_steps(f"📄 {len(steps)} belge hazırlanıyor...")
+                    raise
+                return await finish_step(index, source_file, pdf_file)
+            
+            # Tüm adımları aynı anda başlat, sonuçları orijinal belge sırasıyla topla
+            results = await asyncio.gather(
+                *(run_step(i, *step[1:]) for i, step in enumerate(steps)),
+                return_exceptions=True
+            )
+            
+            if batch or not convertible:
+                sources = [result[0] for result in results if not isinstance(result, Exception) and result[0]]
+                converted = await self.worker_pool.run_io(pdf_converter.convert_batch, sources) if batch and sources else {}
+                for index, result in enumerate(results):
+                    if not isinstance(result, Exception) and not result[1]:
+                        source_file = result[0]
+                        results[index] = await finish_step(index, source_file, converted.get(source_file))
+            
+            # Son durum, özet ve belgelerden önce ilerleme mesajına yazılır
+            ready = step_status.count('✅')
+            await progress.finish(steps_text(f"📄 Belgeler hazır ({ready}/{len(steps)})"))
+            
+            pdf_files = []
+            source_files = []
+            for (name, *_), result in zip(steps, results):
+                if isinstance(result, Exception):
+                    # Bir belgedeki hata diğerlerini engellemez
+                    logger.error(f'{name} oluşturulamadı: {result}')
+                    continue
+                source_file, pdf_file = result
+                if pdf_file:
+                    pdf_files.append(pdf_file)
+                elif source_file:
+                    # PDF'i olmayan belgeler Excel/Word olarak gönderilir
+                    source_files.append(source_file)
             
             # Hesaplamaları garanti altına al
             if context.user_data.get('initial_choice') == 'YTB':
@@ -770,19 +973,30 @@ class OfferBot:
                 context.user_data['pdf_files'] = pdf_files
                 context.user_data['customer_name'] = customer_data['name']
                 
-                await update.message.reply_text(f"✅ {len(pdf_files)} belge oluşturuldu!")
-                for i, pdf_file in enumerate(pdf_files, 1):
-                    with open(pdf_file, 'rb') as f:
-                        caption = success_msg if i == 1 else None
-                        await update.message.reply_document(
-                            document=f,
-                            filename=Path(pdf_file).name,
-                            caption=caption,
-                            parse_mode='Markdown' if caption else None
-                        )
+                unsent = [pdf_file for pdf_file in pdf_files if pdf_file not in streamed]
+                if not unsent:
+                    # Belgeler zaten gönderildi, sadece özeti gönder
+                    await update.message.reply_text(
+                        f"✅ {len(pdf_files)} belge oluşturuldu!\n{success_msg}",
+                        parse_mode='Markdown'
+                    )
+                else:
+                    # Paket modu veya akışta gönderilemeyen belgeler
+                    await self._send_documents(
+                        update, unsent,
+                        caption=f"✅ {len(pdf_files)} belge oluşturuldu!\n{success_msg}"
+                    )
+                
+                # Bir kısmı PDF'e çevrilemediyse (ör: overlay ile hazırlananlar dışında dönüştürücü yok)
+                if source_files:
+                    await self._send_documents(
+                        update, source_files,
+                        caption="⚠️ Bazı belgeler PDF'e çevrilemedi, Excel/Word halleri gönderildi."
+                    )
                 
                 # Email gönderme seçeneği sun
-                if self.email_sender.enabled:
+                email_sender = await self.component('email_sender')
+                if email_sender.enabled:
                     keyboard = [['✅ Evet, e-posta gönder', '❌ Hayır, gerek yok']]
                     await update.message.reply_text(
                         "📧 *Bu belgeleri e-posta ile göndermek ister misiniz?*",
@@ -795,23 +1009,76 @@ class OfferBot:
                     for pdf_file in pdf_files:
                         Path(pdf_file).unlink(missing_ok=True)
                     return ConversationHandler.END
+            elif source_files:
+                # PDF oluşturulamadıysa belgelerin Excel/Word halini gönder
+                reason = "PDF oluşturulamadı" if convertible else "PDF dönüştürücü şu an kullanılamıyor"
+                await self._send_documents(
+                    update, source_files,
+                    caption=success_msg + f"\n\n⚠️ {reason}, Excel/Word dosyaları gönderildi."
+                )
+                return ConversationHandler.END
             else:
-                # PDF oluşturulamadıysa Excel gönder
-                with open(excel_path, 'rb') as f:
-                    await update.message.reply_document(
-                        document=f, 
-                        filename=Path(excel_path).name, 
-                        caption=success_msg + "\n\n⚠️ PDF oluşturulamadı, Excel gönderildi.", 
-                        parse_mode='Markdown'
-                    )
+                await update.message.reply_text(config.MESSAGES['error'].format(error='Belgeler oluşturulamadı'))
                 return ConversationHandler.END
         except Exception as e:
             logger.error(f'Hata: {e}')
             import traceback
             traceback.print_exc()
-            await update.message.reply_text(f"❌ Hata: {e}")
+            await progress.finish(f"❌ Hata: {e}")
             return ConversationHandler.END
     
+    async def _build_document(self, fill_func, fill_args, convert_func):
+        """
+        Tek bir belgeyi doldur ve PDF'e çevir (worker havuzunda).
+        
+        Returns:
+            tuple: (kaynak dosya yolu veya None, PDF yolu veya None)
+        """
+        source_file = await self.worker_pool.run_io(fill_func, *fill_args)
+        if not source_file:
+            return None, None
+        
+        pdf_file = await self.worker_pool.run_io(convert_func, source_file)
+        if pdf_file and Path(pdf_file).exists():
+            return source_file, pdf_file
+        return source_file, None
+    
+    async def _send_document(self, update: Update, file_path, caption=None):
+        """Tek bir dosyayı kullanıcıya gönder"""
+        with open(file_path, 'rb') as f:
+            await update.message.reply_document(
+                document=f,
+                filename=Path(file_path).name,
+                caption=caption,
+                parse_mode='Markdown' if caption else None
+            )
+    
+    async def _send_documents(self, update: Update, file_paths, caption=None):
+        """
+        Belge paketini gönder, özet ilk belgenin altına yazılır.
+        
+        group modunda 2-10 belge tek sendMediaGroup çağrısıyla gider;
+        gruplama başarısız olursa belgeler tek tek gönderilir.
+        """
+        if config.DOCUMENT_DELIVERY_MODE == 'group' and 2 <= len(file_paths) <= 10:
+            try:
+                media = []
+                for i, file_path in enumerate(file_paths):
+                    with open(file_path, 'rb') as f:
+                        media.append(InputMediaDocument(
+                            media=f.read(),
+                            filename=Path(file_path).name,
+                            caption=caption if i == 0 else None,
+                            parse_mode='Markdown' if caption and i == 0 else None
+                        ))
+                await update.message.reply_media_group(media=media)
+                return
+            except TelegramError as e:
+                logger.warning(f'⚠️ Belgeler grup olarak gönderilemedi, tek tek gönderiliyor: {e}')
+        
+        for i, file_path in enumerate(file_paths):
+            await self._send_document(update, file_path, caption=caption if i == 0 else None)
+    
     async def ask_send_email(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """E-posta gönderme kararını al"""
         choice = update.message.text.strip().lower()
@@ -860,7 +1127,9 @@ class OfferBot:
         contact_person = context.user_data.get('contact_person', '')
         
         # E-posta gönder
-        success = self.email_sender.send_offer_email(
+        email_sender = await self.component('email_sender')
+        success = await self.worker_pool.run_io(
+            email_sender.send_offer_email,
             to_email=to_email,
             customer_name=customer_name,
             pdf_files=pdf_files,
@@ -890,56 +1159,101 @@ class OfferBot:
     async def cancel(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(config.MESSAGES['cancelled'], reply_markup=ReplyKeyboardRemove(), parse_mode='Markdown')
         return ConversationHandler.END
-
-def main():
-    if not config.TELEGRAM_BOT_TOKEN or config.TELEGRAM_BOT_TOKEN == 'your_bot_token_here':
-        print("❌ Token tanımlı değil!")
-        return
     
-    bot = OfferBot()
-    application = Application.builder().token(config.TELEGRAM_BOT_TOKEN).build()
+    async def documents_in_progress(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Belgeler arka planda hazırlanırken aynı sohbetten gelen mesajlar"""
+        await update.effective_message.reply_text("⏳ Belgeleriniz hazırlanıyor, lütfen bekleyin...")
+
+
+def add_handlers(application, bot):
+    """
+    Komutları ve teklif konuşmasını uygulamaya ekle.
     
+    Belge oluşturmaya geçen adımlar block=False çalışır: kuyrukta bekleyen
+    iş update slotunu ve sohbet kilidini tutmaz, diğer sohbetler cevap
+    almaya devam eder. İş bitene kadar konuşma WAITING durumundadır; iş
+    bitince dönen durumla (e-posta sorusu veya son) devam eder.
+    """
+    text = filters.TEXT & ~filters.COMMAND
     conv_handler = ConversationHandler(
         entry_points=[CommandHandler('yeni', bot.new_offer)],
         states={
-            ASK_INITIAL_CHOICE: [MessageHandler(filters.TEXT & ~filters.COMMAND, bot.receive_initial_choice)],
+            ASK_INITIAL_CHOICE: [MessageHandler(text, bot.receive_initial_choice)],
             ASK_TAX_PDF: [
                 MessageHandler(filters.Document.PDF, bot.receive_tax_pdf),
                 MessageHandler(filters.PHOTO, bot.receive_tax_photo)
             ],
-            ASK_MANUAL_ENTRY: [MessageHandler(filters.TEXT & ~filters.COMMAND, bot.ask_manual_entry_response)],
-            ASK_MANUAL_COMPANY: [MessageHandler(filters.TEXT & ~filters.COMMAND, bot.receive_manual_company)],
-            ASK_MANUAL_TAX_OFFICE: [MessageHandler(filters.TEXT & ~filters.COMMAND, bot.receive_manual_tax_office)],
-            ASK_MANUAL_TAX_NUMBER: [MessageHandler(filters.TEXT & ~filters.COMMAND, bot.receive_manual_tax_number)],
-            ASK_MANUAL_ADDRESS: [MessageHandler(filters.TEXT & ~filters.COMMAND, bot.receive_manual_address)],
-            ASK_TAX_NUMBER: [MessageHandler(filters.TEXT & ~filters.COMMAND, bot.receive_tax_number)],
-            ASK_CONTACT_PERSON: [MessageHandler(filters.TEXT & ~filters.COMMAND, bot.receive_contact_person)],
-            ASK_OFFER_DATE: [MessageHandler(filters.TEXT & ~filters.COMMAND, bot.receive_offer_date_choice)],
-            ASK_MANUAL_DATE: [MessageHandler(filters.TEXT & ~filters.COMMAND, bot.receive_manual_date)],
-            ASK_EMAIL: [MessageHandler(filters.TEXT & ~filters.COMMAND, bot.receive_email)],
-            ASK_SERVICE_NAME: [MessageHandler(filters.TEXT & ~filters.COMMAND, bot.receive_service_name)],
-            ASK_QUANTITY: [MessageHandler(filters.TEXT & ~filters.COMMAND, bot.receive_quantity)],
-            ASK_UNIT_PRICE: [MessageHandler(filters.TEXT & ~filters.COMMAND, bot.receive_unit_price)],
-            ASK_ADD_MORE: [MessageHandler(filters.TEXT & ~filters.COMMAND, bot.ask_add_more)],
-            ASK_NOTES_CHOICE: [MessageHandler(filters.TEXT & ~filters.COMMAND, bot.receive_notes_choice)],
-            ASK_NOTES_TEXT: [MessageHandler(filters.TEXT & ~filters.COMMAND, bot.receive_notes_text)],
-            ASK_DELIVERY_DATE_CHOICE: [MessageHandler(filters.TEXT & ~filters.COMMAND, bot.receive_delivery_date_choice)],
-            ASK_DELIVERY_DATE: [MessageHandler(filters.TEXT & ~filters.COMMAND, bot.receive_delivery_date)],
-            ASK_PROJECT_TYPE: [MessageHandler(filters.TEXT & ~filters.COMMAND, bot.receive_project_type)],
-            ASK_CONTRACT_AMOUNT: [MessageHandler(filters.TEXT & ~filters.COMMAND, bot.receive_contract_amount)],
-            ASK_SEND_EMAIL: [MessageHandler(filters.TEXT & ~filters.COMMAND, bot.ask_send_email)],
-            ASK_EMAIL_FOR_SENDING: [MessageHandler(filters.TEXT & ~filters.COMMAND, bot.send_email_to_address)],
+            ASK_MANUAL_ENTRY: [MessageHandler(text, bot.ask_manual_entry_response)],
+            ASK_MANUAL_COMPANY: [MessageHandler(text, bot.receive_manual_company)],
+            ASK_MANUAL_TAX_OFFICE: [MessageHandler(text, bot.receive_manual_tax_office)],
+            ASK_MANUAL_TAX_NUMBER: [MessageHandler(text, bot.receive_manual_tax_number)],
+            ASK_MANUAL_ADDRESS: [MessageHandler(text, bot.receive_manual_address)],
+            ASK_TAX_NUMBER: [MessageHandler(text, bot.receive_tax_number)],
+            ASK_CONTACT_PERSON: [MessageHandler(text, bot.receive_contact_person)],
+            ASK_OFFER_DATE: [MessageHandler(text, bot.receive_offer_date_choice)],
+            ASK_MANUAL_DATE: [MessageHandler(text, bot.receive_manual_date)],
+            ASK_EMAIL: [MessageHandler(text, bot.receive_email)],
+            ASK_SERVICE_NAME: [MessageHandler(text, bot.receive_service_name)],
+            ASK_QUANTITY: [MessageHandler(text, bot.receive_quantity)],
+            ASK_UNIT_PRICE: [MessageHandler(text, bot.receive_unit_price)],
+            ASK_ADD_MORE: [MessageHandler(text, bot.ask_add_more)],
+            ASK_NOTES_CHOICE: [MessageHandler(text, bot.receive_notes_choice)],
+            ASK_NOTES_TEXT: [MessageHandler(text, bot.receive_notes_text)],
+            ASK_DELIVERY_DATE_CHOICE: [MessageHandler(text, bot.receive_delivery_date_choice, block=False)],
+            ASK_DELIVERY_DATE: [MessageHandler(text, bot.receive_delivery_date, block=False)],
+            ASK_PROJECT_TYPE: [MessageHandler(text, bot.receive_project_type)],
+            ASK_CONTRACT_AMOUNT: [MessageHandler(text, bot.receive_contract_amount, block=False)],
+            ASK_SEND_EMAIL: [MessageHandler(text, bot.ask_send_email)],
+            ASK_EMAIL_FOR_SENDING: [MessageHandler(text, bot.send_email_to_address)],
+            ConversationHandler.WAITING: [MessageHandler(filters.ALL, bot.documents_in_progress)],
         },
         fallbacks=[CommandHandler('iptal', bot.cancel)],
     )
     
     application.add_handler(CommandHandler('start', bot.start))
     application.add_handler(conv_handler)
+    return application
+
+def main():
+    if not config.TELEGRAM_BOT_TOKEN or config.TELEGRAM_BOT_TOKEN == 'your_bot_token_here':
+        print("❌ Token tanımlı değil!")
+        return
+    
+    bot = OfferBot()
+    webhook_mode = config.BOT_MODE == 'webhook'
+    if webhook_mode and not config.WEBHOOK_URL and config.WEBHOOK_SET_ON_START:
+        print("❌ Webhook modu için WEBHOOK_URL tanımlı değil!")
+        return
+    
+    builder = (
+        Application.builder()
+        .token(config.TELEGRAM_BOT_TOKEN)
+        .concurrent_updates(ChatSerialUpdateProcessor())
+        .rate_limiter(OutboundRateLimiter())
+        .post_init(bot.post_init)
+        .post_shutdown(bot.post_shutdown)
+    )
+    if webhook_mode:
+        # Update'leri gömülü HTTP sunucusu besler, Updater gerekmez
+        builder = builder.updater(None)
+    application = builder.build()
+    
+    add_handlers(application, bot)
+    
+    # Sadece kayıtlı handler'ların işlediği update türlerini iste
+    allowed_updates = collect_allowed_updates(application)
     
     print("🤖 Bot başlatılıyor...")
     print("📱 Bot: @arslanli_danismanlik_bot")
+    print(f"📡 Mod: {'webhook' if webhook_mode else 'polling'} (update türleri: {', '.join(allowed_updates)})")
     print("✅ Çalışıyor! Durdurmak için Ctrl+C")
-    application.run_polling(allowed_updates=Update.ALL_TYPES)
+    if webhook_mode:
+        # tornado sadece webhook modunda yüklenir
+        from webhook_server import serve_webhook
+        asyncio.run(serve_webhook(application, allowed_updates, post_init=bot.post_init,
+                                  post_shutdown=bot.post_shutdown, diagnostics=bot.diagnostics))
+    else:
+        application.run_polling(allowed_updates=allowed_updates)
 
 if __name__ == '__main__':
     main()
@@ -28,6 +28,86 @@ KDV_RATE = float(os.getenv('KDV_RATE', '0.20'))  # %20 KDV
 TEMPLATE_PATH = 'yeni.xlsx'  # YENİ ÖZEL ŞABLON (28.10.2025)
 OUTPUT_DIR = 'outputs'
 TEMP_DIR = 'temp'
+TEMPLATE_CACHE_ENABLED = os.getenv('TEMPLATE_CACHE_ENABLED', 'true').lower() == 'true'  # Şablonlar bir kez hazırlanıp bellekten kopyalanır
+XLSX_PATCH_ENABLED = os.getenv('XLSX_PATCH_ENABLED', 'true').lower() == 'true'  # Excel çıktıları openpyxl yerine şablon XML'i yamanarak yazılır
+OFFER_SEQUENCE_PATH = os.getenv('OFFER_SEQUENCE_PATH', os.path.join(OUTPUT_DIR, 'offer_sequence.sqlite3'))  # Teklif numarası sayacı
+OFFER_NUMBER_START = int(os.getenv('OFFER_NUMBER_START', '10000'))  # Her yıl ilk teklif bu sayının bir fazlası
+OFFER_NUMBER_BLOCK_SIZE = int(os.getenv('OFFER_NUMBER_BLOCK_SIZE', '1'))  # Süreç başına tek seferde ayrılan numara (>1 ise yeniden başlatmada boşluk kalır)
+
+# Worker Havuzu (OCR, şablon doldurma, PDF dönüştürme ve e-posta event loop dışında çalışır)
+IO_WORKERS = int(os.getenv('IO_WORKERS', '8'))  # Ağ/disk/subprocess işleri için thread sayısı
+CPU_WORKERS = int(os.getenv('CPU_WORKERS', str(max(1, (os.cpu_count() or 2) - 1))))  # OCR için process sayısı (0 = thread havuzu)
+WORKER_QUEUE_SIZE = int(os.getenv('WORKER_QUEUE_SIZE', '32'))  # Havuz başına bekleyebilecek en fazla iş
+
+# Eşzamanlı Update İşleme (aynı sohbet sıralı, farklı sohbetler paralel)
+MAX_CONCURRENT_UPDATES = int(os.getenv('MAX_CONCURRENT_UPDATES', '16'))  # Aynı anda işlenen sohbet sayısı
+MAX_PENDING_UPDATES = int(os.getenv('MAX_PENDING_UPDATES', '256'))  # İşlenen + sırasını bekleyen toplam update
+
+# Belge Oluşturma Kuyruğu
+DOC_MAX_CONCURRENT_JOBS = int(os.getenv('DOC_MAX_CONCURRENT_JOBS', '2'))  # Aynı anda hazırlanan teklif paketi
+DOC_MAX_JOBS_PER_USER = int(os.getenv('DOC_MAX_JOBS_PER_USER', '1'))  # Kullanıcı başına eşzamanlı iş
+DOC_MAX_QUEUED_JOBS = int(os.getenv('DOC_MAX_QUEUED_JOBS', '50'))  # Kuyrukta bekleyebilecek en fazla iş
+
+# Belge Teslimi
+# stream: her PDF hazır olur olmaz gönderilir
+# group: hepsi bitince tek medya grubu olarak gönderilir (2-10 belge)
+# batch: hepsi bitince tek tek gönderilir
+DOCUMENT_DELIVERY_MODE = os.getenv('DOCUMENT_DELIVERY_MODE', 'stream').lower()
+
+# İlerleme mesajı (tek mesaj yerinde düzenlenir)
+PROGRESS_MIN_INTERVAL = float(os.getenv('PROGRESS_MIN_INTERVAL', '1.0'))  # İki düzenleme arası en az süre (saniye)
+
+# Giden İstek Hız Sınırı (Telegram flood limitleri)
+RATE_LIMIT_GLOBAL_PER_SEC = float(os.getenv('RATE_LIMIT_GLOBAL_PER_SEC', '30'))  # Tüm sohbetler toplamı
+RATE_LIMIT_CHAT_PER_SEC = float(os.getenv('RATE_LIMIT_CHAT_PER_SEC', '1'))  # Özel sohbet başına
+RATE_LIMIT_CHAT_BURST = int(os.getenv('RATE_LIMIT_CHAT_BURST', '3'))  # Sohbet başına anlık patlama
+RATE_LIMIT_GROUP_PER_MIN = float(os.getenv('RATE_LIMIT_GROUP_PER_MIN', '20'))  # Grup/kanal başına dakikalık
+RATE_LIMIT_MAX_RETRIES = int(os.getenv('RATE_LIMIT_MAX_RETRIES', '3'))  # RetryAfter sonrası tekrar deneme
+
+# LibreOffice Dönüştürme Havuzu (UNO üzerinden sıcak soffice örnekleri)
+OFFICE_POOL_SIZE = int(os.getenv('OFFICE_POOL_SIZE', '2'))  # 0 = havuz kapalı, her dosya için soffice çalıştırılır
+OFFICE_POOL_MAX_CONVERSIONS = int(os.getenv('OFFICE_POOL_MAX_CONVERSIONS', '50'))  # Bu kadar dönüşümden sonra örnek yenilenir
+OFFICE_CONVERT_TIMEOUT = float(os.getenv('OFFICE_CONVERT_TIMEOUT', '30'))  # Tek dönüşüm için en uzun süre (saniye)
+OFFICE_START_TIMEOUT = float(os.getenv('OFFICE_START_TIMEOUT', '20'))  # Örneğin bağlantı kabul etmesi için en uzun süre
+OFFICE_HEALTH_TIMEOUT = float(os.getenv('OFFICE_HEALTH_TIMEOUT', '5'))  # Sağlık kontrolünde UNO cevabı için en uzun süre
+# Dönüştürücü devre kesicisi
+CONVERTER_FAILURE_THRESHOLD = int(os.getenv('CONVERTER_FAILURE_THRESHOLD', '3'))  # Üst üste bu kadar hatada devre açılır
+CONVERTER_RECOVERY_TIMEOUT = float(os.getenv('CONVERTER_RECOVERY_TIMEOUT', '60'))  # Açık devre bu kadar saniye sonra denenir
+CONVERTER_PROBE_SUCCESSES = int(os.getenv('CONVERTER_PROBE_SUCCESSES', '2'))  # Devrenin kapanması için başarılı deneme sayısı
+UNO_PYTHON_PATHS = [p for p in os.getenv('UNO_PYTHON_PATHS', '/usr/lib/python3/dist-packages:/usr/lib/libreoffice/program').split(':') if p]
+OFFICE_SPAWN_SLOTS = int(os.getenv('OFFICE_SPAWN_SLOTS', str(os.cpu_count() or 2)))  # Havuz yokken aynı anda çalışabilecek soffice (her biri kendi profili ile)
+OFFICE_BATCH_SIZE = int(os.getenv('OFFICE_BATCH_SIZE', '50'))  # Toplu dönüşümde tek çağrıya/örneğe verilen en fazla dosya
+OFFICE_BATCH_TIMEOUT = float(os.getenv('OFFICE_BATCH_TIMEOUT', '120'))  # Tek toplu soffice çağrısı için en uzun süre (saniye)
+# Belge seti toplu çevrilsin mi? auto: sadece havuz yokken, always, never
+OFFICE_BATCH_MODE = os.getenv('OFFICE_BATCH_MODE', 'auto').lower()
+
+# Sabit düzenli formlar için PDF overlay (şablon bir kez çevrilir, değerler PDF'in üzerine yazılır)
+PDF_OVERLAY_ENABLED = os.getenv('PDF_OVERLAY_ENABLED', 'true').lower() == 'true'
+OVERLAY_CACHE_DIR = os.getenv('OVERLAY_CACHE_DIR', os.path.join(TEMP_DIR, 'overlay'))  # Temel PDF ve alan konumları
+OVERLAY_MIN_FONT_SIZE = float(os.getenv('OVERLAY_MIN_FONT_SIZE', '7'))  # Sığmayan değer bu boyuta kadar küçültülür, yine sığmazsa normal yol
+OVERLAY_NAME_WIDTH = int(os.getenv('OVERLAY_NAME_WIDTH', '40'))  # Taahhütnamede firma unvanına ayrılan yer (karakter)
+
+# Doğrudan PDF çizimi (overlay ve teklif formu)
+PDF_FONT_DIRS = [p for p in os.getenv('PDF_FONT_DIRS', '/usr/share/fonts').split(':') if p]  # Şablon yazı tipinin TTF'i burada aranır
+PDF_FONT_PATHS = [p for p in os.getenv('PDF_FONT_PATHS', '/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf:/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf').split(':') if p]  # Yedek yazı tipleri
+PDF_BOLD_FONT_PATHS = [p for p in os.getenv('PDF_BOLD_FONT_PATHS', '/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf:/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf').split(':') if p]
+PDF_SUBSET_FONTS = os.getenv('PDF_SUBSET_FONTS', 'true').lower() == 'true'  # Sadece kullanılan karakterler gömülür (fonttools gerekir)
+# Teklif formu: native (PyMuPDF ile doğrudan PDF) veya libreoffice (Excel doldur + çevir)
+OFFER_PDF_RENDERER = os.getenv('OFFER_PDF_RENDERER', 'native').lower()
+OFFER_XLSX_OUTPUT = os.getenv('OFFER_XLSX_OUTPUT', 'false').lower() == 'true'  # native modda Excel hali de outputs/ altına kaydedilsin mi
+
+# Başlangıç (ağır modüller ilk kullanımda yüklenir)
+WARMUP_ON_START = os.getenv('WARMUP_ON_START', 'true').lower() == 'true'  # Bot başlayınca arka planda önceden yükle
+
+# Çalışma Modu (polling veya webhook)
+BOT_MODE = os.getenv('BOT_MODE', 'polling').lower()
+WEBHOOK_URL = os.getenv('WEBHOOK_URL', '')  # Dışarıdan erişilen adres (ör: https://bot.ornek.com)
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', 'telegram')
+WEBHOOK_LISTEN = os.getenv('WEBHOOK_LISTEN', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', os.getenv('PORT', '8443')))  # Railway PORT değişkenini verir
+WEBHOOK_SECRET_TOKEN = os.getenv('WEBHOOK_SECRET_TOKEN', '')
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv('WEBHOOK_MAX_CONNECTIONS', '40'))
+WEBHOOK_SET_ON_START = os.getenv('WEBHOOK_SET_ON_START', 'true').lower() == 'true'  # Birden fazla kopyada sadece biri ayarlasın
 
 # Bot mesajları
 MESSAGES = {
@@ -0,0 +1,450 @@
+"""
+PDF dönüştürücü arka uçları - başlangıçta bir kez yoklanır, en hızlı sağlıklı olana yönlendirilir
+
+Her arka ucun bir devre kesicisi vardır: üst üste hata veren arka uç
+devreden çıkar, istekler onu beklemeden sıradakine (ya da hiç yoksa
+Word/Excel teslimine) düşer; arka planda deneme dönüşümleri başarılı
+olunca yeniden devreye girer.
+"""
+import logging
+import platform
+import shutil
+import subprocess
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+import config
+
+logger = logging.getLogger(__name__)
+
+OFFICE_EXTENSIONS = ('.xlsx', '.xls', '.ods', '.csv', '.docx', '.doc', '.odt', '.rtf')
+
+# Gecikme ortalaması için ağırlık (yeni ölçümün payı)
+LATENCY_SMOOTHING = 0.3
+
+
+class CircuitBreaker:
+    """
+    closed: normal çalışma. Üst üste failure_threshold hata -> open.
+    open: istekler hemen reddedilir. recovery_timeout sonra -> half_open.
+    half_open: deneme dönüşümleri yapılır; probe_successes başarı -> closed,
+    tek hata -> tekrar open.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold=None, recovery_timeout=None, probe_successes=None, on_open=None):
+        self.name = name
+        self.failure_threshold = failure_threshold or config.CONVERTER_FAILURE_THRESHOLD
+        self.recovery_timeout = recovery_timeout or config.CONVERTER_RECOVERY_TIMEOUT
+        self.probe_successes = probe_successes or config.CONVERTER_PROBE_SUCCESSES
+        self.on_open = on_open
+
+        self.state = self.CLOSED
+        self.failures = 0
+        self.successes = 0
+        self.opened_at = None
+        self.trips = 0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Gerçek istekler sadece devre kapalıyken geçer"""
+        return self.state == self.CLOSED
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            if self.state == self.HALF_OPEN:
+                self.successes += 1
+                if self.successes >= self.probe_successes:
+                    self.state = self.CLOSED
+                    self.opened_at = None
+                    logger.info(f'✅ Dönüştürücü {self.name} yeniden devrede')
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.failure_threshold):
+                self._open()
+            else:
+                return
+        if self.on_open:
+            self.on_open(self)
+
+    def trip(self):
+        """Devreyi hemen aç (ör: başlangıç yoklaması başarısız)"""
+        with self._lock:
+            if self.state == self.OPEN:
+                return
+            self._open()
+        if self.on_open:
+            self.on_open(self)
+
+    def half_open(self):
+        with self._lock:
+            self.state = self.HALF_OPEN
+            self.successes = 0
+            self.failures = 0
+
+    def close(self):
+        """Devreyi deneme yapmadan kapat (ör: deneme dosyası bu arka uçla çevrilemiyor)"""
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.opened_at = None
+        logger.info(f'✅ Dönüştürücü {self.name} yeniden devrede (deneme yapılamadı)')
+
+    def _open(self):
+        self.state = self.OPEN
+        self.opened_at = datetime.now()
+        self.failures = 0
+        self.trips += 1
+        logger.warning(f'🔌 Dönüştürücü {self.name} devre dışı, {self.recovery_timeout:.0f} sn sonra denenecek')
+
+
+class ConverterBackend:
+    """
+    Tek bir dönüştürme yöntemi.
+
+    Alt sınıflar detect() ile kullanılabilirliği/sürümü bulur ve
+    _convert() ile dosyayı çevirir. Gecikme, başarı ve hata sayıları
+    burada tutulur.
+    """
+
+    name = None
+    extensions = OFFICE_EXTENSIONS
+
+    def __init__(self):
+        self.available = False
+        self.path = None
+        self.version = None
+        self.latency = None  # saniye, üstel ortalama
+        self.conversions = 0
+        self.failures = 0
+        self.last_error = None
+        self.breaker = CircuitBreaker(self.name)
+
+    @property
+    def healthy(self):
+        return self.breaker.state == CircuitBreaker.CLOSED
+
+    def detect(self):
+        """Arka uç bu sistemde var mı? (path ve version doldurulur)"""
+        raise NotImplementedError
+
+    def _convert(self, input_path, pdf_path):
+        """Dosyayı çevir, başarılıysa True döndür"""
+        raise NotImplementedError
+
+    def shutdown(self):
+        pass
+
+    def supports(self, input_path):
+        return Path(input_path).suffix.lower() in self.extensions
+
+    def convert(self, input_path, pdf_path):
+        started = time.perf_counter()
+        try:
+            ok = self._convert(Path(input_path), Path(pdf_path)) and Path(pdf_path).exists()
+            error = None if ok else 'PDF oluşmadı'
+        except Exception as e:
+            ok, error = False, str(e)
+
+        if ok:
+            self.record_success(time.perf_counter() - started)
+        else:
+            self.record_failure(error)
+        return ok
+
+    def record_success(self, seconds):
+        self.conversions += 1
+        self.latency = seconds if self.latency is None else (
+            LATENCY_SMOOTHING * seconds + (1 - LATENCY_SMOOTHING) * self.latency
+        )
+        self.breaker.record_success()
+
+    def record_failure(self, error):
+        self.failures += 1
+        self.last_error = error
+        self.breaker.record_failure()
+
+    def diagnostics(self):
+        return {
+            'name': self.name,
+            'available': self.available,
+            'healthy': self.healthy,
+            'state': self.breaker.state,
+            'opened_at': self.breaker.opened_at.isoformat(timespec='seconds') if self.breaker.opened_at else None,
+            'trips': self.breaker.trips,
+            'path': self.path,
+            'version': self.version,
+            'latency_ms': round(self.latency * 1000) if self.latency is not None else None,
+            'conversions': self.conversions,
+            'failures': self.failures,
+            'last_error': self.last_error,
+        }
+
+
+def _soffice_version(soffice_cmd):
+    try:
+        result = subprocess.run([soffice_cmd, '--version'], capture_output=True, text=True, timeout=30)
+        return result.stdout.strip() or None
+    except Exception:
+        return None
+
+
+class UnoPoolBackend(ConverterBackend):
+    """Sıcak LibreOffice örnekleri (office_pool)"""
+
+    name = 'libreoffice-uno'
+
+    def detect(self):
+        from office_pool import get_office_pool
+        from pdf_converter import find_soffice
+        self.pool = get_office_pool()
+        self.path = find_soffice()
+        if self.pool.available:
+            self.pool.start()
+            self.version = _soffice_version(self.path)
+        else:
+            self.last_error = self.pool.disabled_reason
+        return self.pool.available
+
+    def _convert(self, input_path, pdf_path):
+        self.pool.convert(input_path, pdf_path)
+        return True
+
+    def shutdown(self):
+        if self.available:
+            self.pool.shutdown()
+
+
+class SofficeBackend(ConverterBackend):
+    """Dönüşüm başına tek seferlik soffice --convert-to pdf"""
+
+    name = 'libreoffice-cli'
+
+    def detect(self):
+        from pdf_converter import find_soffice
+        self.path = find_soffice()
+        if self.path:
+            self.version = _soffice_version(self.path)
+        return bool(self.path)
+
+    def _convert(self, input_path, pdf_path):
+        from pdf_converter import _convert_with_soffice
+        return _convert_with_soffice(input_path, pdf_path) is not None
+
+
+class NumbersBackend(ConverterBackend):
+    """macOS Numbers (sadece Excel)"""
+
+    name = 'numbers'
+    extensions = ('.xlsx', '.xls', '.csv')
+
+    def detect(self):
+        path = Path('/Applications/Numbers.app')
+        if platform.system() != 'Darwin' or not path.exists():
+            return False
+        self.path = str(path)
+        return True
+
+    def _convert(self, input_path, pdf_path):
+        from pdf_converter import PDFConverter
+        return PDFConverter()._convert_with_numbers(input_path, pdf_path)
+
+
+class BackendRegistry:
+    """
+    Dönüştürücü arka uçlarının kaydı.
+
+    probe() her arka ucu bir kez bulur, sürümünü okur ve küçük bir örnek
+    dosyayla gecikmesini ölçer. convert() dosya türünü destekleyen, devresi
+    kapalı arka uçları ölçülen gecikmeye göre sırayla dener. Devresi açılan
+    arka uç recovery_timeout sonra örnek dosyayla arka planda denenir.
+    """
+
+    def __init__(self, backends=None):
+        self.backends = backends if backends is not None else [UnoPoolBackend(), SofficeBackend(), NumbersBackend()]
+        self.probed_at = None
+        self.probe_seconds = None
+        self._sample = None
+        self._timers = {}
+        self._closed = False
+        self._lock = threading.Lock()
+        for backend in self.backends:
+            backend.breaker.on_open = lambda breaker, backend=backend: self._schedule_recovery(backend)
+
+    def probe(self):
+        """Arka uçları bir kez yokla (tekrar çağrılırsa bir şey yapmaz)"""
+        if self.probed_at is not None:
+            return self
+        with self._lock:
+            if self.probed_at is not None:
+                return self
+
+            started = time.perf_counter()
+            self._sample = _probe_sample()
+            for backend in self.backends:
+                try:
+                    backend.available = backend.detect()
+                except Exception as e:
+                    backend.available = False
+                    backend.last_error = str(e)
+                if backend.available and self._probe_backend(backend) is False:
+                    backend.breaker.trip()
+
+            self.probe_seconds = time.perf_counter() - started
+            self.probed_at = datetime.now()
+            self._log_summary()
+        return self
+
+    def candidates(self, input_path):
+        """Dosyayı çevirebilecek arka uçlar, en hızlıdan yavaşa"""
+        self.probe()
+        usable = [b for b in self.backends if self._usable(b) and b.supports(input_path)]
+        return sorted(usable, key=lambda b: b.latency if b.latency is not None else float('inf'))
+
+    def _usable(self, backend):
+        return backend.available and backend.breaker.allow()
+
+    def _probe_backend(self, backend):
+        """
+        Örnek dosyayı çevirerek arka ucu dene (gecikme de ölçülür).
+
+        Returns:
+            bool veya None: Deneme sonucu; örnek dosya yoksa veya arka uç
+                desteklemiyorsa None (karar verilemedi)
+        """
+        if self._sample is None or not backend.supports(self._sample):
+            return None
+        # Kurtarma zamanlayıcıları ayrı thread'lerde çalışır; her arka uç kendi
+        # kopyasını çevirir, birbirinin PDF'ini ezmez veya silmez
+        sample = self._sample.with_name(f'probe_{backend.name}{self._sample.suffix}')
+        pdf_path = sample.with_suffix('.pdf')
+        try:
+            if not sample.exists():
+                shutil.copyfile(self._sample, sample)
+        except OSError as e:
+            logger.warning(f'⚠️ {backend.name} için yoklama dosyası hazırlanamadı: {e}')
+            return None
+        ok = backend.convert(sample, pdf_path)
+        pdf_path.unlink(missing_ok=True)
+        return ok
+
+    def _schedule_recovery(self, backend):
+        if self._closed:
+            return
+        timer = threading.Timer(backend.breaker.recovery_timeout, self._recover, [backend])
+        timer.daemon = True
+        previous = self._timers.pop(backend.name, None)
+        if previous:
+            previous.cancel()
+        self._timers[backend.name] = timer
+        timer.start()
+
+    def _recover(self, backend):
+        """Yarı açık devrede deneme dönüşümleri; hata olursa devre tekrar açılır"""
+        backend.breaker.half_open()
+        logger.info(f'🔌 Dönüştürücü {backend.name} deneniyor...')
+        for _ in range(backend.breaker.probe_successes):
+            if self._closed:
+                return
+            ok = self._probe_backend(backend)
+            if ok is None:
+                # Deneme yapılamıyor; yarı açık kalırsa hiç istek almaz ve bir daha
+                # denenmez. Devre kapatılır, gerçek istekler hata verirse yeniden açılır
+                backend.breaker.close()
+                return
+            if not ok:
+                return
+
+    def convert(self, input_path, pdf_path=None):
+        """
+        Dosyayı en hızlı sağlıklı arka uçla çevir, başarısız olursa sıradakini dene.
+
+        Returns:
+            str: PDF dosya yolu veya None
+        """
+        input_path = Path(input_path)
+        pdf_path = Path(pdf_path) if pdf_path else input_path.with_suffix('.pdf')
+        for backend in self.candidates(input_path):
+            if backend.convert(input_path, pdf_path):
+                return str(pdf_path)
+            logger.warning(f'⚠️ {backend.name} ile çevrilemedi ({input_path.name}): {backend.last_error}')
+        return None
+
+    def backend(self, name):
+        for backend in self.backends:
+            if backend.name == name:
+                return backend
+        return None
+
+    def is_usable(self, name):
+        """Arka uç var ve devresi kapalı mı?"""
+        self.probe()
+        backend = self.backend(name)
+        return backend is not None and self._usable(backend)
+
+    def any_usable(self):
+        """En az bir arka uç şu an istek kabul ediyor mu? (yoksa dönüşüm hemen başarısız olur)"""
+        self.probe()
+        return any(self._usable(backend) for backend in self.backends)
+
+    def shutdown(self):
+        self._closed = True
+        for timer in self._timers.values():
+            timer.cancel()
+        for backend in self.backends:
+            backend.shutdown()
+
+    def diagnostics(self):
+        return {
+            'probed_at': self.probed_at.isoformat(timespec='seconds') if self.probed_at else None,
+            'probe_seconds': round(self.probe_seconds, 2) if self.probe_seconds is not None else None,
+            'backends': [backend.diagnostics() for backend in self.backends],
+        }
+
+    def _log_summary(self):
+        lines = [f'🔌 PDF dönüştürücüler ({self.probe_seconds:.1f} sn yoklama):']
+        for backend in self.backends:
+            if backend.available:
+                latency = f'{backend.latency * 1000:.0f} ms' if backend.latency is not None else '?'
+                state = '✅' if backend.healthy else '⚠️'
+                lines.append(f'   {state} {backend.name}: {backend.version or backend.path} ({latency})')
+            else:
+                lines.append(f'   ❌ {backend.name}: yok{f" ({backend.last_error})" if backend.last_error else ""}')
+        logger.info('\n'.join(lines))
+
+
+def _probe_sample():
+    """Gecikme ölçümü için küçük bir Excel dosyası"""
+    try:
+        from openpyxl import Workbook
+        probe_dir = Path(config.TEMP_DIR) / 'probe'
+        probe_dir.mkdir(parents=True, exist_ok=True)
+        sample = probe_dir / 'probe.xlsx'
+        workbook = Workbook()
+        workbook.active['A1'] = 'probe'
+        workbook.save(sample)
+        return sample
+    except Exception as e:
+        logger.warning(f'⚠️ Yoklama dosyası oluşturulamadı: {e}')
+        return None
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """Süreç genelinde paylaşılan kayıt (ilk çağrıda oluşturulur, yoklama ilk dönüşümde yapılır)"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = BackendRegistry()
+    return _registry
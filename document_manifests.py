@@ -0,0 +1,130 @@
+"""
+Belge şablonlarının manifestleri
+
+Her manifest bir belgeyi tarif eder; DocumentHandler başlangıçta hepsini
+fill_plans.compile_manifest ile derler ve şablonları hazırlar. Yeni bir
+belge için buraya manifest eklemek ve DocumentHandler.fill(ad, veri)
+çağırmak yeterlidir.
+
+Manifest anahtarları:
+    label: Belgenin adı (log ve hata mesajlarında)
+    template: gerek/ altındaki şablon (.docx veya .xlsx; biçim uzantıdan anlaşılır)
+    layout: Şablona hazırlıkta bir kez uygulanan düzen ('compact': DocumentHandler._compact_layout)
+    output: Çıktı dosya adı biçimi
+    fields: {alan adı: alan}
+
+Alan anahtarları:
+    marker: docx'te değiştirilecek metin (alt metin veya regex; bağlam lookahead/lookbehind ile)
+    cell: xlsx'te hücre
+    value: Değer biçimi (varsayılan "{alan adı}"), ör: "{company_name} ({tax_number})"
+    each: docx'te sırayla her eşleşmeye ayrı değer (biçim veya {'value': ..., 'when': ...})
+    when: Bu girdi boşsa alan doldurulmaz, şablondaki metin kalır
+    label: Log satırındaki ad
+
+Biçimlerde kullanılabilecek hesaplanan anahtarlar COMPUTED'dadır;
+"{anahtar:upper}" gibi kurallar fill_plans.TRANSFORMS'tadır.
+"""
+import re
+from datetime import datetime, timedelta
+
+MANIFESTS = {
+    'yetkilendirme_taahhutnamesi': {
+        'label': 'Yetkilendirme Taahhütnamesi',
+        'template': 'YetkilendirmeTaahhutname.docx',
+        'layout': 'compact',  # 1 sayfaya sığdır
+        'output': 'Yetkilendirme_Taahhutnamesi_{timestamp}.docx',
+        'fields': {
+            # Belgedeki tarihler (sağ üst köşe, "TAAHHÜDÜN BAŞLANGIÇ TARİHİ" satırı)
+            'date': {'marker': re.compile(r'\d{2}/\d{2}/\d{4}'), 'label': 'Tarih'},
+            # İlk ". . ." vergi numarası, ikincisi firma unvanı (vergi numarası yoksa ikisi de boş kalır)
+            'dots': {
+                'marker': '. . .',
+                'when': 'tax_number',
+                'each': ['{tax_number}', {'value': '{company_name}', 'when': 'company_name'}],
+                'label': 'Vergi numarası ve firma unvanı',
+            },
+        },
+    },
+    'kullanici_yetkilendirme_formu': {
+        'label': 'Kullanıcı Yetkilendirme Formu',
+        'template': 'Kullanıcı Yetkilendirme Formu.xlsx',
+        'output': 'Kullanici_Yetkilendirme_Formu_{timestamp}.xlsx',
+        # E11-E19: Hatice Arslan bilgileri (şablonda zaten dolu, değiştirmiyoruz)
+        'fields': {
+            'company_name': {'cell': 'E6', 'label': 'Firma unvanı'},  # Firma Adı/Unvanı
+            'tax_number': {'cell': 'E7', 'label': 'Vergi numarası'},  # Vergi No
+            'address': {'cell': 'E8', 'label': 'Adres'},  # Adres
+            'email': {'cell': 'E9', 'label': 'E-posta'},  # E-posta Adresi
+        },
+    },
+    'sozlesme': {
+        'label': 'Sözleşme',
+        'template': 'Sözleşme.docx',
+        'output': 'Sozlesme_{company_name:safe}_{timestamp}.docx',
+        # Şablondaki " TL", "hazırlanması" gibi sabit metinler yerinde kalır
+        'fields': {
+            'company': {'marker': '... (....)', 'value': '{company_name} ({tax_number})', 'label': 'Firma bilgisi'},
+            'project': {'marker': re.compile(r'\.\.\.(?= hazırlanması)'), 'value': '{proje_turu:upper}', 'label': 'Proje türü'},
+            'address': {'marker': re.compile(r'\.{5}(?= adresindeki)'), 'label': 'Adres'},  # Madde 3-1
+            'amount': {'marker': re.compile(r'\.\.\.(?= TL projenin)'), 'value': '{tutar}', 'label': 'Ücret tutarı'},
+            'description': {'marker': re.compile(r'\.\.\.(?= talep edilir)'), 'value': '{aciklama}', 'label': 'Ücret açıklaması'},
+            'fixed_amount': {'marker': re.compile(r'(?<=Sabit tutarın )\.\.\.(?= TL)'), 'value': '{tutar}', 'label': 'Sabit tutar'},
+        },
+    },
+    'kosgeb_vekaletname': {
+        'label': 'KOSGEB Vekaletname',
+        'template': 'kosgeb_vekaletname.docx',
+        'output': 'KOSGEB_Vekaletname_{company_name:safe}_{timestamp}.docx',
+        # Boş bilgiler şablondaki "…" olarak kalır
+        'fields': {
+            'date': {
+                'marker': re.compile(r'31\.12\.2030 \(otuzbir aralık ikibinotuz\)\s+\w+'),
+                'value': '{vekalet_expiry}',
+                'label': 'Tarih',
+            },
+            'tax_number': {'marker': re.compile(r'…(?= vergi numaralı)'), 'when': 'tax_number', 'label': 'Vergi numarası'},
+            'company': {'marker': re.compile(r'…(?= şirket adına)'), 'value': '{company_name}', 'when': 'company_name', 'label': 'Şirket adı'},
+            # VEKİL EDEN: tek başına "…" olan paragraf
+            'principal': {'marker': re.compile(r'^\s*…\s*$'), 'value': '{company_name}', 'when': 'company_name', 'label': 'Şirket adı (VEKİL EDEN)'},
+            'tax_field': {'marker': re.compile(r'(?<=^Vergi Numarası: )…'), 'value': '{tax_number}', 'when': 'tax_number', 'label': 'Vergi numarası alanı'},
+            'address_field': {'marker': re.compile(r'(?<=^Adresi: )…'), 'value': '{address}', 'when': 'address', 'label': 'Adres alanı'},
+            'email_field': {'marker': re.compile(r'(?<=^Elektronik Posta Adresi: )…'), 'value': '{email}', 'when': 'email', 'label': 'E-posta alanı'},
+        },
+    },
+}
+
+TURKISH_MONTHS = ('ocak', 'şubat', 'mart', 'nisan', 'mayıs', 'haziran', 'temmuz', 'ağustos', 'eylül', 'ekim', 'kasım', 'aralık')
+TURKISH_DAYS = ('Pazartesi', 'Salı', 'Çarşamba', 'Perşembe', 'Cuma', 'Cumartesi', 'Pazar')
+ONES = ('', 'bir', 'iki', 'üç', 'dört', 'beş', 'altı', 'yedi', 'sekiz', 'dokuz')
+TENS = ('', 'on', 'yirmi', 'otuz', 'kırk', 'elli', 'altmış', 'yetmiş', 'seksen', 'doksan')
+
+
+def _number_to_turkish(n):
+    """1-99 arası sayıyı yazıya çevir (ör: 31 -> otuzbir)"""
+    return TENS[n // 10] + ONES[n % 10]
+
+
+def _year_to_turkish(year):
+    """Yılı yazıya çevir (ör: 2035 -> ikibinotuzbeş)"""
+    text = 'ikibin' if year // 1000 == 2 else ''
+    hundreds = (year % 1000) // 100
+    if hundreds > 0:
+        text += ONES[hundreds] + 'yüz'
+    return text + _number_to_turkish(year % 100)
+
+
+def vekalet_expiry(now=None):
+    """Vekaletin bitiş tarihi (10 yıl sonra): '15.10.2036 (onbeş ekim ikibinotuzaltı)  Çarşamba'"""
+    future_date = (now or datetime.now()) + timedelta(days=365 * 10)
+    return (
+        f"{future_date.strftime('%d.%m.%Y')} ({_number_to_turkish(future_date.day)} "
+        f"{TURKISH_MONTHS[future_date.month - 1]} {_year_to_turkish(future_date.year)})  "
+        f"{TURKISH_DAYS[future_date.weekday()]}"
+    )
+
+
+# Biçimlerde girdi verisinde yoksa kullanılan, istendiğinde hesaplanan anahtarlar
+COMPUTED = {
+    'date': lambda: datetime.now().strftime('%d/%m/%Y'),
+    'vekalet_expiry': vekalet_expiry,
+}
@@ -0,0 +1,159 @@
+"""
+Belge oluşturma iş kuyruğu - eşzamanlılık sınırı, kullanıcı sınırı ve öncelik
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+from collections import defaultdict
+from contextlib import asynccontextmanager
+import config
+
+logger = logging.getLogger(__name__)
+
+# Öncelikler (küçük sayı önce çalışır)
+PRIORITY_INTERACTIVE = 0  # Kullanıcının beklediği tekil teklif
+PRIORITY_BULK = 10  # Toplu / arka plan işleri (ısınma dönüşümleri vb.)
+
+
+class QueueFullError(Exception):
+    """Kuyruk veya kullanıcı iş sınırı dolu"""
+
+    def __init__(self, message, per_user=False):
+        super().__init__(message)
+        self.per_user = per_user
+
+
+class _Ticket:
+    """Kuyrukta bekleyen bir iş"""
+
+    __slots__ = ('priority', 'seq', 'user_id', 'granted', 'position', 'changed', 'watcher')
+
+    def __init__(self, priority, seq, user_id):
+        self.priority = priority
+        self.seq = seq
+        self.user_id = user_id
+        self.granted = asyncio.get_running_loop().create_future()
+        self.position = 0
+        self.changed = asyncio.Event()
+        self.watcher = None
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class DocumentJobQueue:
+    """
+    Belge oluşturma işlerine giriş kontrolü.
+
+    Aynı anda en fazla max_concurrent iş çalışır, kullanıcı başına
+    per_user_limit işten fazlası kabul edilmez. Bekleyen işler önceliğe,
+    eşit öncelikte geliş sırasına göre başlar. Bekleyen her iş için
+    on_position(n) callback'i sıra değiştikçe en güncel değerle çağrılır.
+    """
+
+    def __init__(self, max_concurrent=None, per_user_limit=None, max_waiting=None):
+        self.max_concurrent = max_concurrent or config.DOC_MAX_CONCURRENT_JOBS
+        self.per_user_limit = per_user_limit or config.DOC_MAX_JOBS_PER_USER
+        self.max_waiting = config.DOC_MAX_QUEUED_JOBS if max_waiting is None else max_waiting
+
+        self._active = 0
+        self._waiting = []  # heap[_Ticket]
+        self._seq = itertools.count()
+        self._user_jobs = defaultdict(int)
+
+    @property
+    def active(self):
+        return self._active
+
+    @property
+    def waiting(self):
+        return len(self._waiting)
+
+    @asynccontextmanager
+    async def slot(self, user_id, priority=PRIORITY_INTERACTIVE, on_position=None):
+        """
+        Çalışma slotu al; blok bitince slot bırakılır.
+
+        Args:
+            user_id: İşin sahibi (kullanıcı başına sınır için)
+            priority: PRIORITY_INTERACTIVE veya PRIORITY_BULK (küçük sayı önce başlar)
+            on_position: async callable(position) - kuyrukta beklerken sıra bildirimi
+
+        Raises:
+            QueueFullError: Kullanıcı sınırı veya kuyruk kapasitesi doluysa
+        """
+        if self._user_jobs[user_id] >= self.per_user_limit:
+            raise QueueFullError('Kullanıcının devam eden işi var', per_user=True)
+
+        must_wait = self._active >= self.max_concurrent or self._waiting
+        if must_wait and len(self._waiting) >= self.max_waiting:
+            raise QueueFullError('Belge kuyruğu dolu')
+
+        self._user_jobs[user_id] += 1
+        try:
+            if must_wait:
+                await self._wait_turn(user_id, priority, on_position)
+            else:
+                self._active += 1
+
+            try:
+                yield
+            finally:
+                self._release()
+        finally:
+            self._user_jobs[user_id] -= 1
+            if self._user_jobs[user_id] <= 0:
+                del self._user_jobs[user_id]
+
+    async def _wait_turn(self, user_id, priority, on_position):
+        ticket = _Ticket(priority, next(self._seq), user_id)
+        heapq.heappush(self._waiting, ticket)
+        if on_position:
+            ticket.watcher = asyncio.create_task(self._watch_position(ticket, on_position))
+        self._refresh_positions()
+        logger.info(f'⏳ Belge işi kuyrukta: kullanıcı={user_id}, sıra={ticket.position}, aktif={self._active}')
+
+        try:
+            await ticket.granted
+        except asyncio.CancelledError:
+            if ticket.granted.done() and not ticket.granted.cancelled():
+                # Slot verildikten hemen sonra iptal edildi, slotu geri bırak
+                self._release()
+            elif ticket in self._waiting:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._refresh_positions()
+            raise
+        finally:
+            if ticket.watcher:
+                ticket.watcher.cancel()
+
+    def _release(self):
+        self._active -= 1
+        while self._waiting and self._active < self.max_concurrent:
+            ticket = heapq.heappop(self._waiting)
+            if ticket.granted.done():
+                continue
+            self._active += 1
+            ticket.granted.set_result(True)
+        self._refresh_positions()
+
+    def _refresh_positions(self):
+        for position, ticket in enumerate(sorted(self._waiting), 1):
+            if ticket.position != position:
+                ticket.position = position
+                ticket.changed.set()
+
+    @staticmethod
+    async def _watch_position(ticket, on_position):
+        """Sıra değiştikçe callback'i çağır (her zaman en güncel sıra ile, sırayla)"""
+        while True:
+            await ticket.changed.wait()
+            ticket.changed.clear()
+            try:
+                await on_position(ticket.position)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f'⚠️ Sıra bildirimi gönderilemedi: {e}')
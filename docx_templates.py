@@ -0,0 +1,393 @@
+"""
+Word (docx) şablonlarının bir kez hazırlanması ve doldurulması
+
+Her şablon başlangıçta bir kez açılır, her istekte aynı olan düzenlemeler
+(kenar boşlukları, satır aralıkları, yazı boyutları) uygulanır. Şablonun
+tüm yer tutucuları tek bir regex'te birleştirilir ve gövde, tablolar,
+üst/alt bilgiler tek geçişte taranarak eşleşme içeren paragrafların yeri
+kaydedilir. Her istek hazır belgenin kopyasında sadece bu paragraflara
+bakar; değer mevcut run'ların (w:t) içine yazılır, biçimlendirme korunur.
+Sadece .doc hali olan şablonlar istek sırasında değil başlangıçta .docx'e
+çevrilir.
+
+Kopya, hazırlanmış belgenin baytlarından açılır: python-docx nesneleri
+pickle edilemez, copy.deepcopy ise önbellekteki gövde elemanını (_body)
+belgeden kopuk kopyalar ve yapılan değişiklikler kaydedilmez.
+"""
+import logging
+import re
+from io import BytesIO
+from pathlib import Path
+from docx import Document
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.oxml.ns import qn
+import config
+from template_cache import TemplateCache
+
+logger = logging.getLogger(__name__)
+
+W_P = qn('w:p')
+W_R = qn('w:r')
+W_T = qn('w:t')
+W_TAB = qn('w:tab')
+W_BR = qn('w:br')
+W_CR = qn('w:cr')
+XML_SPACE = qn('xml:space')
+# Metin olmayan run içerikleri paragraf metninde bu karakterlerle görünür (python-docx ile aynı)
+RUN_BREAKS = {W_TAB: '\t', W_BR: '\n', W_CR: '\n'}
+# Birleşik regex'te yer tutucuya özel kalan bayraklar: (?ims:...)
+SCOPED_FLAGS = {re.ASCII: 'a', re.IGNORECASE: 'i', re.MULTILINE: 'm', re.DOTALL: 's', re.VERBOSE: 'x'}
+# Desenin başındaki genel bayraklar ("(?i)..."); marker.flags'te zaten var
+LEADING_FLAGS = re.compile(r'^\(\?[aiLmsux]+\)')
+
+
+def compile_markers(markers):
+    """
+    {yer tutucu adı: alt metin veya derlenmiş regex} -> tek regex.
+
+    Her yer tutucu adıyla bir grup olur (match.lastgroup). Aynı konumda
+    birden fazlası eşleşebiliyorsa sözlükteki ilk olan kazanır; bağlam
+    gerekiyorsa değiştirilmeyecek kısım lookahead/lookbehind ile yazılır.
+    Derlenmiş regex'lerin bayrakları (re.I, re.M, re.S, re.X, re.A) sadece
+    kendi grubunda geçerli olacak şekilde korunur.
+
+    Raises:
+        ValueError: Bayt deseni veya birleşik regex'te desteklenmeyen bayrak
+    """
+    parts = []
+    for name, marker in markers.items():
+        if isinstance(marker, re.Pattern):
+            if not isinstance(marker.pattern, str):
+                raise ValueError(f'{name}: yer tutucu metin deseni olmalı')
+            pattern = LEADING_FLAGS.sub('', marker.pattern)
+            flags = ''.join(letter for flag, letter in SCOPED_FLAGS.items() if marker.flags & flag)
+            if marker.flags & re.DEBUG:
+                raise ValueError(f'{name}: re.DEBUG yer tutucuda desteklenmez')
+            if flags:
+                pattern = f'(?{flags}:{pattern})'
+        else:
+            pattern = re.escape(marker)
+        parts.append(f'(?P<{name}>{pattern})')
+    return re.compile('|'.join(parts))
+
+
+class DocxTemplate:
+    """Hazırlanmış belge ve yer tutucu içeren paragrafların yeri"""
+
+    def __init__(self, document, matcher, locations):
+        """
+        Args:
+            document: python-docx Document (düzenlemeleri uygulanmış)
+            matcher: compile_markers() sonucu
+            locations: ((bölüm sırası, paragraf sırası), ...) belge sırasıyla; bölüm 0 gövde,
+                sonrakiler üst/alt bilgiler (_stories)
+        """
+        self.document = document
+        self.matcher = matcher
+        self.locations = locations
+
+    def fill(self, values):
+        """
+        Tüm yer tutucuları tek geçişte doldur.
+
+        Args:
+            values: {yer tutucu adı: değer}. Değer str, callable(match) -> str veya
+                liste (n. eşleşmeye n. eleman) olabilir; None (veya listede eksik eleman)
+                o eşleşmeyi olduğu gibi bırakır.
+
+        Returns:
+            dict: {yer tutucu adı: değiştirilen eşleşme sayısı}
+        """
+        counts = {}
+        seen = {}
+        paragraphs = {}
+        stories = None
+        for story, index in self.locations:
+            if story not in paragraphs:
+                if stories is None:
+                    stories = _stories(self.document)
+                paragraphs[story] = list(stories[story].iter(W_P))
+            segments = _segments(paragraphs[story][index])
+            text = ''.join(segment[1] for segment in segments)
+
+            splices = []
+            for match in self.matcher.finditer(text):
+                name = match.lastgroup
+                value = values.get(name)
+                if isinstance(value, (list, tuple)):
+                    occurrence = seen.get(name, 0)
+                    seen[name] = occurrence + 1
+                    value = value[occurrence] if occurrence < len(value) else None
+                elif callable(value):
+                    value = value(match)
+                if value is None or match.start() == match.end():
+                    continue
+                splices.append((match.start(), match.end(), str(value)))
+                counts[name] = counts.get(name, 0) + 1
+            if splices:
+                _splice(segments, splices)
+        return counts
+
+
+class DocxTemplateRegistry:
+    """Ad -> hazırlanmış docx şablonu (thread güvenli; her get() ayrı kopya)"""
+
+    def __init__(self, template_dir):
+        self.template_dir = Path(template_dir)
+        self._templates = {}
+
+    def register(self, name, filename, markers, prepare=None):
+        """
+        Args:
+            name: Şablon adı
+            filename: template_dir içindeki .docx (yoksa aynı adlı .doc prepare()'de çevrilir)
+            markers: {yer tutucu adı: alt metin veya derlenmiş regex} (compile_markers)
+            prepare: callable(document) her istekte aynı olan düzenlemeler (paragraf
+                ekleyip silmemeli; yerler düzenlemeden sonra kaydedilir)
+        """
+        path = self.template_dir / filename
+        matcher = compile_markers(markers)
+        cache = TemplateCache(path, lambda template_path: _prepare(template_path, matcher, prepare), clone=_open)
+        self._templates[name] = cache
+        return self
+
+    def prepare(self):
+        """Tüm şablonları hazırla (gerekirse .doc -> .docx); hata sadece loglanır"""
+        for name, cache in self._templates.items():
+            try:
+                if not cache.path.exists():
+                    convert_doc(cache.path)
+                cache.get()
+            except Exception as e:
+                logger.warning(f'⚠️ {cache.path.name} şablonu hazırlanamadı: {e}')
+        return self
+
+    def get(self, name):
+        """
+        Hazırlanmış şablonun bu isteğe ait kopyası.
+
+        Raises:
+            FileNotFoundError: .docx yok (.doc ise prepare()'de çevrilemedi)
+        """
+        return self._templates[name].get()
+
+    def diagnostics(self):
+        return {name: cache.diagnostics() for name, cache in self._templates.items()}
+
+
+def _stories(document):
+    """Gövde ve üst/alt bilgi kök elemanları (tablolar ve metin kutuları içlerinde)"""
+    stories = [document.element.body]
+    for rel in document.part.rels.values():
+        if rel.reltype in (RT.HEADER, RT.FOOTER) and not rel.is_external:
+            stories.append(rel.target_part.element)
+    return stories
+
+
+def _segments(paragraph):
+    """
+    Paragraf metnini oluşturan parçalar: [[w:t veya run içeriği, metin], ...].
+
+    İç içe paragraflar (metin kutuları) kendi paragraflarına aittir; sekme
+    ve satır sonları metinde görünür ama değer sadece w:t'ye yazılır.
+    """
+    segments = []
+    for element in paragraph.iter(W_T, W_TAB, W_BR, W_CR):
+        tag = element.tag
+        if tag != W_T and element.getparent().tag != W_R:
+            continue  # w:pPr içindeki sekme durakları
+        owner = element.getparent()
+        while owner.tag != W_P:
+            owner = owner.getparent()
+        if owner is not paragraph:
+            continue
+        segments.append([element, (element.text or '') if tag == W_T else RUN_BREAKS[tag]])
+    return segments
+
+
+def _splice(segments, splices):
+    """
+    Eşleşmeleri (başlangıç, bitiş, değer) mevcut parçalara yaz.
+
+    Değer eşleşmenin ilk w:t'sine yazılır, eşleşmenin diğer run'lardaki
+    kısmı silinir; run'lar ve biçimleri yerinde kalır. Sondan başa
+    uygulanır, böylece önceki eşleşmelerin konumları değişmez.
+    """
+    offsets = []
+    position = 0
+    for segment in segments:
+        offsets.append(position)
+        position += len(segment[1])
+
+    changed = set()
+    for start, end, value in reversed(splices):
+        overlapping = [
+            index for index, segment in enumerate(segments)
+            if segment[0] is not None and offsets[index] < end and offsets[index] + len(segment[1]) > start
+        ]
+        if not any(segments[index][0].tag == W_T for index in overlapping):
+            continue  # Sadece sekme/satır sonundan oluşan eşleşme: yazılacak run yok
+        host = None
+        for index in overlapping:
+            segment = segments[index]
+            offset = offsets[index]
+            length = len(segment[1])
+            if segment[0].tag != W_T:
+                # Eşleşmenin içinde kalan sekme/satır sonu
+                segment[0].getparent().remove(segment[0])
+                segment[0], segment[1] = None, ''
+                continue
+            text = segment[1]
+            cut_start, cut_end = max(start - offset, 0), min(end - offset, length)
+            if host is None:
+                host = index
+                segment[1] = text[:cut_start] + value + text[cut_end:]
+            else:
+                segment[1] = text[:cut_start] + text[cut_end:]
+            changed.add(index)
+
+    for index in changed:
+        element, text = segments[index]
+        element.text = text
+        if text != text.strip():
+            element.set(XML_SPACE, 'preserve')
+
+
+def _prepare(path, matcher, prepare):
+    """Şablon -> (düzenlenmiş belgenin baytları, yer tutucu içeren paragrafların yeri)"""
+    document = Document(path)
+    if prepare:
+        prepare(document)
+
+    locations = []
+    for story, root in enumerate(_stories(document)):
+        for index, paragraph in enumerate(root.iter(W_P)):
+            if matcher.search(''.join(segment[1] for segment in _segments(paragraph))):
+                locations.append((story, index))
+    buffer = BytesIO()
+    document.save(buffer)
+    return buffer.getvalue(), matcher, tuple(locations)
+
+
+def _open(prepared):
+    data, matcher, locations = prepared
+    return DocxTemplate(Document(BytesIO(data)), matcher, locations)
+
+
+def convert_doc(docx_path):
+    """Sadece .doc hali olan şablonu LibreOffice ile yanına .docx olarak çevir"""
+    from pdf_converter import find_soffice, run_with_watchdog
+
+    docx_path = Path(docx_path)
+    doc_path = docx_path.with_suffix('.doc')
+    if not doc_path.exists():
+        raise FileNotFoundError(f'Şablon bulunamadı: {docx_path}')
+    soffice = find_soffice()
+    if not soffice:
+        raise FileNotFoundError(f'{doc_path.name} çevrilemedi: LibreOffice bulunamadı')
+
+    logger.info(f"📄 {doc_path.name} .docx'e dönüştürülüyor...")
+    result = run_with_watchdog([
+        soffice, '--headless', '--convert-to', 'docx', '--outdir', str(docx_path.parent), str(doc_path)
+    ], config.OFFICE_CONVERT_TIMEOUT)
+    if result.returncode != 0 or not docx_path.exists():
+        raise FileNotFoundError(f'{doc_path.name} çevrilemedi: {result.stderr}')
+
+
+if __name__ == '__main__':
+    # Büyük sözleşmede eski yöntemle (her paragrafta her yer tutucu için ayrı arama +
+    # paragraph.text ataması) karşılaştırma: python docx_templates.py [kopya sayısı ...]
+    import copy
+    import sys
+    import tempfile
+    import time
+    from document_manifests import MANIFESTS
+    from fill_plans import compile_manifest
+
+    logging.basicConfig(level=logging.WARNING)
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1, 20, 200]
+    values = {
+        'company': 'ÖRNEK A.Ş. (1234567890)', 'project': 'TÜBİTAK 1501 PROJESİ', 'address': 'ATATÜRK CAD. NO:1',
+        'amount': '80.000', 'description': "onaylanan tutar üzerinden %5'i", 'fixed_amount': '80.000',
+    }
+    legacy = [
+        ('... (....)', values['company']),
+        ('... hazırlanması', f"{values['project']} hazırlanması"),
+        ('..... adresindeki', f"{values['address']} adresindeki"),
+        ('... TL projenin', f"{values['amount']} TL projenin"),
+        ('... talep edilir', f"{values['description']} talep edilir"),
+        ('Sabit tutarın ... TL', f"Sabit tutarın {values['amount']} TL"),
+    ]
+
+    def legacy_fill(document):
+        for paragraph in document.paragraphs:
+            for marker, value in legacy:
+                if marker in paragraph.text:
+                    paragraph.text = paragraph.text.replace(marker, value)
+
+    def body_texts(path):
+        return [paragraph.text for paragraph in Document(path).paragraphs]
+
+    source = Path('gerek') / 'Sözleşme.docx'
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            # Gövdeyi çoğalt; bir kopyayı tabloya, bir paragrafı üst ve alt bilgiye koy
+            document = Document(source)
+            body = document.element.body
+            originals = [element for element in body if element.tag != qn('w:sectPr')]
+            sect_pr = body[-1]
+            for _ in range(size - 1):
+                for element in originals:
+                    sect_pr.addprevious(copy.deepcopy(element))
+            cell = document.add_table(rows=1, cols=1).cell(0, 0)
+            cell.paragraphs[0].add_run('Tablo: ... (....) / Sabit tutarın ... TL')
+            section = document.sections[0]
+            section.header.add_paragraph('Üst bilgi: ... (....)')
+            section.footer.add_paragraph('..... adresindeki')
+            template_path = Path(tmp) / f'sozlesme_{size}.docx'
+            document.save(template_path)
+
+            registry = DocxTemplateRegistry(tmp).register('sozlesme', template_path.name, compile_manifest('sozlesme', MANIFESTS['sozlesme']).markers).prepare()
+            paragraphs = len(Document(template_path).paragraphs)
+
+            timings = {}
+            for name in ('eski', 'yeni'):
+                runs = 3 if size > 20 else 10
+                opened = filled = 0.0
+                for _ in range(runs):
+                    started = time.perf_counter()
+                    if name == 'eski':
+                        document = Document(template_path)
+                    else:
+                        template = registry.get('sozlesme')
+                    middle = time.perf_counter()
+                    if name == 'eski':
+                        legacy_fill(document)
+                    else:
+                        counts = template.fill(values)
+                        document = template.document
+                    opened += middle - started
+                    filled += time.perf_counter() - middle
+                    document.save(Path(tmp) / f'{name}_{size}.docx')
+                timings[name] = (opened / runs * 1000, filled / runs * 1000)
+
+            old_texts, new_texts = body_texts(Path(tmp) / f'eski_{size}.docx'), body_texts(Path(tmp) / f'yeni_{size}.docx')
+            result = Document(Path(tmp) / f'yeni_{size}.docx')
+            header = result.sections[0].header.paragraphs[-1].text
+            footer = result.sections[0].footer.paragraphs[-1].text
+            table = result.tables[-1].cell(0, 0).text
+            expected = {'company': size + 2, 'project': size, 'address': size + 1, 'amount': size, 'description': size, 'fixed_amount': size + 1}
+            ok = (
+                old_texts == new_texts and counts == expected
+                and header == 'Üst bilgi: ÖRNEK A.Ş. (1234567890)' and footer == 'ATATÜRK CAD. NO:1 adresindeki'
+                and table == 'Tablo: ÖRNEK A.Ş. (1234567890) / Sabit tutarın 80.000 TL'
+            )
+            failed = failed or not ok
+            (old_open, old_fill), (new_open, new_fill) = timings['eski'], timings['yeni']
+            print(f'{"✅" if ok else "❌"} {size} kopya ({paragraphs} paragraf): '
+                  f'doldurma eski {old_fill:.1f} ms ({paragraphs / old_fill:.0f} paragraf/ms), '
+                  f'yeni {new_fill:.1f} ms ({paragraphs / new_fill:.0f} paragraf/ms); '
+                  f'açma eski {old_open:.1f} ms, yeni {new_open:.1f} ms')
+
+    sys.exit(1 if failed else 0)
@@ -4,11 +4,186 @@ Excel dosyasını okuma ve güncelleme modülü
 import openpyxl
 from openpyxl.styles import Alignment, Font
 from openpyxl.styles.colors import Color
+from openpyxl.cell.cell import MergedCell
+from openpyxl.utils.cell import column_index_from_string, coordinate_from_string, get_column_letter
+from openpyxl.worksheet.merge import MergedCellRange
+from openpyxl.worksheet.pagebreak import Break
 from copy import copy
 from datetime import datetime
+from io import BytesIO
 from pathlib import Path
 import config
-import json
+import uuid
+from offer_sequence import get_offer_sequence
+from sheet_pdf import SheetLayout, render_sheet
+from template_cache import TemplateCache
+from xlsx_patch import XlsxPatchError, XlsxTemplate
+
+# yeni.xlsx alanları: alan adı -> şablondaki hücre
+# Şablon değişirse sadece bu tablo güncellenir; birleşik hücreler derlemede sol üste çözülür
+OFFER_FIELDS = {
+    'date_label': 'K2',  # "Tarih: ..."
+    'offer_no_label': 'K3',  # "Teklif No: ..."
+    'customer_name': 'C9',  # Firma Adı
+    'contact_person': 'C10',  # Yetkili
+    'phone': 'C11',  # Telefon
+    'offer_no': 'H9',  # Teklif Sipariş No
+    'offer_date': 'H10',  # Teklif Tarihi
+    'payment_method': 'H11',  # Ödeme Şekli
+    'delivery_date': 'H12',  # Planlanan Teslim Tarihi
+    'notes': 'A20',  # Notlar
+    'subtotal': 'K20',  # Ara Toplam
+    'kdv': 'K21',  # KDV
+    'grand_total': 'K22',  # Genel Toplam (K22-K23 merged, mavi arka plan)
+    'signature': 'A26',  # Sipariş Alan / Teklif Veren
+}
+# Ürün tablosu sütunları; satır N'deki alanın adı "item{N}_{alan}" (ör: item2_quantity)
+OFFER_ITEM_FIELDS = {
+    'no': 'A',  # NO
+    'name': 'C',  # HİZMET AÇIKLAMASI (C-D merged)
+    'quantity': 'H',  # MİKTAR
+    'unit_price': 'I',  # BİRİM FİYAT
+    'amount': 'J',  # TUTAR (J-K merged)
+}
+ITEM_ROWS = (16, 17, 18)  # Şablondaki hazır ürün satırları
+# Fazla kalemler için eklenen satırlar (ve PDF'teki tüm kalemler) 16 beyaz, 17 gri dönüşümlü boyanır
+ITEM_STYLE_ROWS = ITEM_ROWS[:2]
+# Yazarken şablondaki stili korunacak alanlar (font renkleri)
+STYLED_FIELDS = ('subtotal', 'kdv', 'grand_total')
+
+TABLE_HEADER_ROW = 14
+PRINT_LAST_ROW = 28
+PRINT_LAST_COLUMN = 11  # K
+
+
+def _item_fields():
+    """Şablondaki ürün satırlarının alanları: {'item1_no': 'A16', ...}"""
+    return {
+        f'item{index}_{name}': f'{column}{row}'
+        for index, row in enumerate(ITEM_ROWS, start=1)
+        for name, column in OFFER_ITEM_FIELDS.items()
+    }
+
+
+def _item_style_row(index):
+    """index. kalemin (0'dan) stilini aldığı şablon satırı"""
+    return ITEM_STYLE_ROWS[index % len(ITEM_STYLE_ROWS)]
+
+
+def _item_cells(plan, items):
+    """Kalemler -> {(satır, sütun): değer}; kalemler ITEM_ROWS[0]'dan itibaren ardışık satırlarda"""
+    columns = {name: plan.targets[f'item1_{name}'][1] for name in OFFER_ITEM_FIELDS}
+    return {
+        (ITEM_ROWS[0] + index, columns[name]): value
+        for index, item in enumerate(items)
+        for name, value in item.items()
+    }
+
+
+def _insert_rows(ws, row, count, style_rows):
+    """
+    row. satırdan önce count satır ekle (XlsxTemplate.insert_rows'un openpyxl karşılığı).
+
+    openpyxl insert_rows sadece hücreleri kaydırır; birleşik hücreler ve
+    satır yükseklikleri burada kaydırılır, yeni satırlar style_rows
+    satırlarının stilini, yüksekliğini ve birleşik hücrelerini alır.
+    """
+    patterns = []
+    for style_row in style_rows:
+        cells = [(column, cell._style) for (number, column), cell in ws._cells.items() if number == style_row]
+        merges = [
+            (merged.min_col, merged.max_col) for merged in ws.merged_cells.ranges
+            if merged.min_row == merged.max_row == style_row
+        ]
+        patterns.append((copy(ws.row_dimensions[style_row]), sorted(cells), merges))
+    
+    ws.insert_rows(row, count)
+    for merged in ws.merged_cells.ranges:
+        if merged.min_row >= row:
+            merged.shift(row_shift=count)
+        elif merged.max_row >= row:
+            merged.expand(down=count)
+    dimensions = ws.row_dimensions
+    for index in sorted((index for index in dimensions if index >= row), reverse=True):
+        dimension = dimensions.pop(index)
+        dimension.index = index + count
+        dimensions[index + count] = dimension
+    
+    for offset in range(count):
+        number = row + offset
+        dimension, cells, merges = patterns[offset % len(patterns)]
+        dimensions[number] = copy(dimension)
+        dimensions[number].index = number
+        for column, style in cells:
+            ws.cell(row=number, column=column)._style = copy(style)
+        for min_col, max_col in merges:
+            # MultiCellRange.add her eklemede tüm aralıkları tarar; yeni aralıklar çakışmaz
+            ws.merged_cells.ranges.add(MergedCellRange(ws, f'{get_column_letter(min_col)}{number}:{get_column_letter(max_col)}{number}'))
+            for column in range(min_col + 1, max_col + 1):
+                merged_cell = MergedCell(ws, row=number, column=column)
+                merged_cell._style = ws.cell(row=number, column=column)._style
+                ws._cells[(number, column)] = merged_cell
+
+
+def _set_cell(ws, r, c, v):
+    """Row, Col (1-index) ile yazma; eğer hücre merged ise top-left hücreye yaz."""
+    cell = ws.cell(row=r, column=c)
+    try:
+        cell.value = v
+        return
+    except AttributeError:
+        # MergedCell ise, içeren aralığı bulup top-left'e yaz
+        for merged in ws.merged_cells.ranges:
+            if merged.min_row <= r <= merged.max_row and merged.min_col <= c <= merged.max_col:
+                ws.cell(row=merged.min_row, column=merged.min_col).value = v
+                return
+        # fallback
+        ws.cell(row=r, column=c).value = v
+
+
+class WritePlan:
+    """
+    Şablon için bir kez derlenen yazma planı: alan adı -> (satır, sütun, stil).
+
+    Birleşik hücreler sol üst hücreye çözülür, stili korunacak alanların
+    stili şablondan alınır; her istekte sadece doğrudan atama yapılır.
+    """
+    
+    def __init__(self, ws, fields, styled=()):
+        top_left = {}
+        for merged in ws.merged_cells.ranges:
+            for row in range(merged.min_row, merged.max_row + 1):
+                for column in range(merged.min_col, merged.max_col + 1):
+                    top_left[(row, column)] = (merged.min_row, merged.min_col)
+        
+        self.targets = {}
+        for name, coordinate in fields.items():
+            column, row = coordinate_from_string(coordinate)
+            row, column = top_left.get((row, column_index_from_string(column)), (row, column_index_from_string(column)))
+            style = copy(ws.cell(row=row, column=column)._style) if name in styled else None
+            self.targets[name] = (row, column, style)
+    
+    def position(self, name, shift=None):
+        """Alanın (satır, sütun)'u; shift=(satır, n): bu satırın altındaki alanlar n satır aşağıda"""
+        row, column, _ = self.targets[name]
+        if shift and row > shift[0]:
+            row += shift[1]
+        return row, column
+    
+    def cells(self, values, shift=None):
+        """{alan: değer} -> {(satır, sütun): değer}"""
+        return {self.position(name, shift): value for name, value in values.items()}
+    
+    def write(self, ws, values, shift=None):
+        """{alan: değer} değerlerini sayfaya yaz"""
+        targets = self.targets
+        for name, value in values.items():
+            style = targets[name][2]
+            row, column = self.position(name, shift)
+            cell = ws.cell(row=row, column=column)
+            cell.value = value
+            if style is not None:
+                cell._style = copy(style)
 
 
 class ExcelHandler:
@@ -16,27 +191,33 @@ class ExcelHandler:
     
     def __init__(self, template_path=None):
         self.template_path = template_path or config.TEMPLATE_PATH
-        self.counter_file = Path(config.OUTPUT_DIR) / 'offer_counter.json'
-        
-    def _get_next_offer_number(self):
-        """Benzersiz artan sipariş numarası üret"""
-        # Counter dosyasını oku veya oluştur
-        if self.counter_file.exists():
-            with open(self.counter_file, 'r') as f:
-                data = json.load(f)
-                counter = data.get('counter', 10000)  # 10000'den başla
-        else:
-            counter = 10000
-            
-        # Sayıyı artır
-        counter += 1
+        # Numara SQLite sayaçtan blok blok alınır (eski offer_counter.json ilk açılışta taşınır)
+        self.sequence = get_offer_sequence()
+        # Şablon bir kez yüklenip düzeltilir, her teklif bellekteki kopyasını doldurur
+        self._template = TemplateCache(self.template_path, self._prepare_template) if config.TEMPLATE_CACHE_ENABLED else None
+        # Alan adı -> hücre planı (hazırlanmış şablondan bir kez derlenir)
+        self._plan = TemplateCache(self.template_path, self._compile_plan, clone=False)
+        # Excel çıktısı openpyxl ile yeniden yazılmak yerine şablon XML'i yamanarak üretilir
+        self._patch_template = TemplateCache(self.template_path, self._prepare_patch_template, clone=False) if config.XLSX_PATCH_ENABLED else None
+        # Satır yükseklikleri ve ölçek: çok kalemli tekliflerde sayfa sonları için
+        self._layout = TemplateCache(self.template_path, self._compile_layout, clone=False)
+    
+    def prepare(self):
+        """Şablonu önceden hazırla (ısınma için; hata sadece yazdırılır)"""
+        for template in (self._template, self._plan, self._patch_template, self._layout):
+            if template:
+                try:
+                    template.get()
+                except Exception as e:
+                    print(f"⚠️ Teklif şablonu hazırlanamadı: {e}")
+        return self
+    
+    def diagnostics(self):
+        return self._template.diagnostics() if self._template else None
         
-        # Kaydet
-        self.counter_file.parent.mkdir(exist_ok=True)
-        with open(self.counter_file, 'w') as f:
-            json.dump({'counter': counter}, f)
-            
-        return str(counter)
+    def _get_next_offer_number(self, year=None):
+        """Benzersiz artan sipariş numarası üret (yıl bazında, süreçler arası güvenli)"""
+        return str(self.sequence.next(year))
         
     def create_offer(self, customer_data, services, offer_info):
         """
@@ -67,89 +248,156 @@ class ExcelHandler:
         Returns:
             str: Oluşturulan dosya yolu
         """
-        # Template'i yükle (yeni.xlsx - 28.10.2025 güncel şablon)
-        wb = openpyxl.load_workbook(self.template_path)
-        ws = wb.active
-        
         # Para birimi (varsayılan TL)
         currency = offer_info.get('currency', '₺')
         
-        # SATIR 2-3: Tarih ve Teklif No (SAĞ ÜST - K2 ve K3)
-        offer_no = offer_info.get('offer_no') or f"T-{datetime.now().strftime('%Y')}-{self._get_next_offer_number()}"
+        # SATIR 16+: ÜRÜN TABLOSU
+        # Şablonda 16, 17, 18 satırları hazır; fazla kalemler için 19. satırdan itibaren
+        # satır eklenir, toplamlar ve imza aşağı kayar, tablo sayfalara bölünür
+        values = self._offer_values(customer_data, services, offer_info)
+        items = self._offer_items(services, currency)
+        extra, page_breaks = self._expansion(len(items))
+        shift = (ITEM_ROWS[-1], extra)
+        inserted_styles = [_item_style_row(len(ITEM_ROWS) + offset) for offset in range(len(ITEM_STYLE_ROWS))]
+        
+        plan = self._plan.get()
+        output_path = self._output_path(customer_data, '.xlsx')
         
-        # helper: merged hücreleri yöneten güvenli set
-        def set_cell(r, c, v):
-            """Row, Col (1-index) ile yazma; eğer hücre merged ise top-left hücreye yaz."""
-            cell = ws.cell(row=r, column=c)
+        # Hızlı yol: hazırlanmış şablonun sadece bu hücrelerinin XML'i değiştirilir
+        if self._patch_template:
             try:
-                cell.value = v
-                return
-            except AttributeError:
-                # MergedCell ise, içeren aralığı bulup top-left'e yaz
-                for merged in ws.merged_cells.ranges:
-                    if merged.min_row <= r <= merged.max_row and merged.min_col <= c <= merged.max_col:
-                        ws.cell(row=merged.min_row, column=merged.min_col).value = v
-                        return
-                # fallback
-                ws.cell(row=r, column=c).value = v
+                template = self._patch_template.get()
+                if extra:
+                    template = template.insert_rows(ITEM_ROWS[-1] + 1, extra, inserted_styles)
+                    template = template.with_page_breaks(page_breaks, (TABLE_HEADER_ROW, TABLE_HEADER_ROW))
+                cells = plan.cells(values, shift)
+                cells.update(_item_cells(plan, items))
+                template.fill(cells, output_path)
+                return str(output_path)
+            except XlsxPatchError as e:
+                print(f"⚠️ Excel doğrudan yazılamadı, openpyxl kullanılıyor: {e}")
         
-        def set_cell_with_style(r, c, v):
-            """Hücreye yazarken mevcut font ve stil bilgilerini koru"""
-            cell = ws.cell(row=r, column=c)
-            
-            # Mevcut stil bilgilerini kaydet
-            old_font = copy(cell.font) if cell.font else None
-            old_alignment = copy(cell.alignment) if cell.alignment else None
-            old_fill = copy(cell.fill) if cell.fill else None
-            old_border = copy(cell.border) if cell.border else None
-            old_number_format = cell.number_format
+        wb = self._load_template()
+        ws = wb.active
+        if extra:
+            _insert_rows(ws, ITEM_ROWS[-1] + 1, extra, inserted_styles)
+            self._paginate(ws, extra, page_breaks)
+        plan.write(ws, values, shift)
+        for (row, column), value in _item_cells(plan, items).items():
+            ws.cell(row=row, column=column).value = value
+        
+        # Kaydet
+        wb.save(output_path)
+        
+        return str(output_path)
+    
+    def create_offer_pdf(self, customer_data, services, offer_info):
+        """
+        Teklif formunu LibreOffice'e gerek kalmadan doğrudan PDF olarak çiz.
+        
+        Şablondaki hücre stilleri (yazı tipi, dolgu, kenarlık, logo) aynen
+        kullanılır; kalem sayısı sınırsızdır, tablo sığmazsa başlığı tekrar
+        eden yeni sayfalar açılır. OFFER_XLSX_OUTPUT açıksa aynı teklif
+        numarasıyla Excel hali de outputs/ altına kaydedilir.
+        
+        Args: create_offer ile aynı
+        
+        Returns:
+            str: PDF yolu; çizilemezse None (çağıran Excel + LibreOffice yoluna düşer)
+        """
+        # Numara offer_info'ya yazılır: PDF çizilemezse create_offer aynı numarayı kullanır
+        if not offer_info.get('offer_no'):
+            offer_info['offer_no'] = self._new_offer_no()
+        
+        try:
+            wb = self._load_template()
+            ws = wb.active
+            currency = offer_info.get('currency', '₺')
+            self._plan.get().write(ws, self._offer_values(customer_data, services, offer_info))
             
+            output_path = self._output_path(customer_data, '.pdf')
+            render_sheet(
+                ws, output_path, PRINT_LAST_COLUMN, PRINT_LAST_ROW,
+                items=[
+                    {column_index_from_string(OFFER_ITEM_FIELDS[name]): value for name, value in item.items()}
+                    for item in self._offer_items(services, currency)
+                ],
+                table_header_row=TABLE_HEADER_ROW,
+                item_rows=(ITEM_ROWS[0], ITEM_ROWS[-1]),
+                item_styles=ITEM_STYLE_ROWS,
+            )
+        except Exception as e:
+            print(f"⚠️ Teklif PDF'i doğrudan çizilemedi: {e}")
+            return None
+        
+        if config.OFFER_XLSX_OUTPUT:
             try:
-                # Değeri yaz
-                cell.value = v
-                
-                # Eski stilleri geri yükle
-                if old_font:
-                    cell.font = old_font
-                if old_alignment:
-                    cell.alignment = old_alignment
-                if old_fill:
-                    cell.fill = old_fill
-                if old_border:
-                    cell.border = old_border
-                if old_number_format:
-                    cell.number_format = old_number_format
-                    
-            except AttributeError:
-                # MergedCell ise, içeren aralığı bulup top-left'e yaz
-                for merged in ws.merged_cells.ranges:
-                    if merged.min_row <= r <= merged.max_row and merged.min_col <= c <= merged.max_col:
-                        target_cell = ws.cell(row=merged.min_row, column=merged.min_col)
-                        
-                        # Hedef hücrenin stilini kopyala
-                        old_font = copy(target_cell.font) if target_cell.font else None
-                        old_alignment = copy(target_cell.alignment) if target_cell.alignment else None
-                        old_fill = copy(target_cell.fill) if target_cell.fill else None
-                        old_border = copy(target_cell.border) if target_cell.border else None
-                        old_number_format = target_cell.number_format
-                        
-                        target_cell.value = v
-                        
-                        # Stilleri geri yükle
-                        if old_font:
-                            target_cell.font = old_font
-                        if old_alignment:
-                            target_cell.alignment = old_alignment
-                        if old_fill:
-                            target_cell.fill = old_fill
-                        if old_border:
-                            target_cell.border = old_border
-                        if old_number_format:
-                            target_cell.number_format = old_number_format
-                        return
-                
-                # fallback
-                ws.cell(row=r, column=c).value = v
+                self.create_offer(customer_data, services, offer_info)
+            except Exception as e:
+                print(f"⚠️ Teklif Excel hali kaydedilemedi: {e}")
+        
+        return str(output_path)
+    
+    def _load_template(self):
+        """Doldurulmaya hazır şablon (önbellekten kopya veya diskten)"""
+        if self._template:
+            wb = self._template.get()
+            # pickle, satır/sütun ölçü sözlüklerinin varsayılan üreticisini taşımaz;
+            # yoksa şablonda olmayan bir satırın yüksekliğine bakmak KeyError verir
+            for ws in wb.worksheets:
+                ws.row_dimensions.default_factory = ws._add_row
+                ws.column_dimensions.default_factory = ws._add_column
+            return wb
+        return self._prepare_template(self.template_path)
+    
+    def _prepare_patch_template(self, template_path):
+        """Düzeltmeleri uygulanmış şablonu bir kez kaydedip XML yamasına hazırla"""
+        buffer = BytesIO()
+        self._load_template().save(buffer)
+        return XlsxTemplate(buffer.getvalue())
+    
+    def _compile_layout(self, template_path):
+        return SheetLayout(self._load_template().active, PRINT_LAST_COLUMN, PRINT_LAST_ROW)
+    
+    def _expansion(self, count):
+        """
+        count kalem için (eklenecek satır sayısı, sayfa sonu satırları).
+        
+        Sayfa sonları PDF ile aynı kuralla (SheetLayout.page_breaks) bulunur;
+        her sonun satırı, bir önceki sayfanın son satırıdır.
+        """
+        extra = max(0, count - len(ITEM_ROWS))
+        if not extra:
+            return 0, []
+        layout = self._layout.get()
+        heights = [
+            layout.row_height(ITEM_ROWS[index] if index < len(ITEM_ROWS) else _item_style_row(index))
+            for index in range(count)
+        ]
+        breaks = layout.page_breaks(heights, (ITEM_ROWS[0], ITEM_ROWS[-1]), TABLE_HEADER_ROW)
+        return extra, [ITEM_ROWS[0] + index - 1 for index in breaks]
+    
+    @staticmethod
+    def _paginate(ws, extra, page_breaks):
+        """Satır eklenmiş sayfa: baskı alanı, sayfa sonları, her sayfada tablo başlığı"""
+        ws.print_area = f'A1:{get_column_letter(PRINT_LAST_COLUMN)}{PRINT_LAST_ROW + extra}'
+        for row in page_breaks:
+            ws.row_breaks.append(Break(id=row))
+        if page_breaks:
+            # Yüksekliğe sığdırma sayfa sonlarını yok sayar; sadece genişliğe sığdırılır
+            ws.page_setup.fitToHeight = 0
+        ws.print_title_rows = f'{TABLE_HEADER_ROW}:{TABLE_HEADER_ROW}'
+    
+    def _compile_plan(self, template_path):
+        fields = dict(OFFER_FIELDS, **_item_fields())
+        return WritePlan(self._load_template().active, fields, STYLED_FIELDS)
+    
+    @staticmethod
+    def _prepare_template(template_path):
+        """Şablonu yükle, her teklifte aynı olan düzeltmeleri uygula"""
+        # Template'i yükle (yeni.xlsx - 28.10.2025 güncel şablon)
+        wb = openpyxl.load_workbook(template_path)
+        ws = wb.active
         
         # FİX: Tablo başlıklarının (Satır 14) ve toplam satırlarının (Satır 22) font renklerini beyaz yap
         # Koyu arka planda (FF34495D) siyah yazılar görünmüyor, beyaz olmalı
@@ -161,86 +409,11 @@ class ExcelHandler:
                 new_font = copy(cell.font)
                 new_font.color = Color(rgb='FFFFFFFF')
                 cell.font = new_font
-
-        # K2: Tarih
-        set_cell(2, 11, f"Tarih: {offer_info.get('offer_date', datetime.now().strftime('%d.%m.%Y'))}")
-        
-        # K3: Teklif No
-        set_cell(3, 11, f"Teklif No: {offer_no}")
-        
-        # SATIR 9-12: MÜŞTERİ BİLGİLERİ (Sol taraf - C sütunu)
-        set_cell(9, 3, customer_data.get('name', ''))  # C9 = Firma Adı
-        set_cell(10, 3, customer_data.get('contact_person', ''))  # C10 = Yetkili
-        set_cell(11, 3, customer_data.get('phone', ''))  # C11 = Telefon
-        
-        # SATIR 9-12: TEKLİF BİLGİLERİ (Sağ taraf - H sütunu)
-        set_cell(9, 8, offer_no)  # H9 = Teklif Sipariş No
-        set_cell(10, 8, offer_info.get('offer_date', datetime.now().strftime('%d.%m.%Y')))  # H10 = Teklif Tarihi
-        set_cell(11, 8, 'PEŞİN')  # H11 = Ödeme Şekli (her zaman PEŞİN)
-        set_cell(12, 8, offer_info.get('delivery_date', ''))  # H12 = Planlanan Teslim Tarihi
-        
-        # SATIR 16+: ÜRÜN TABLOSU
-        # Şablonda 16, 17, 18 satırları hazır - önce temizle
-        for row in range(16, 19):
-            set_cell(row, 1, None)  # A: NO
-            set_cell(row, 3, None)  # C: HİZMET (C-D merged)
-            set_cell(row, 8, None)  # H: MİKTAR
-            set_cell(row, 9, None)  # I: BİRİM FİYAT
-            set_cell(row, 10, None)  # J: TUTAR (J-K merged)
-        
-        # Yeni ürünleri ekle
-        start_row = 16
-        total_amount = 0
-        
-        for idx, service in enumerate(services):
-            if idx >= 3:  # Maksimum 3 ürün (şablonda 16, 17, 18)
-                break
-                
-            row = start_row + idx
-            quantity = service.get('quantity', 1)
-            unit_price = service.get('unit_price', 0)
-            amount = quantity * unit_price
-            total_amount += amount
-            
-            # A: NO
-            set_cell(row, 1, idx + 1)
-
-            # C: HİZMET AÇIKLAMASI (C-D merged)
-            set_cell(row, 3, service.get('name', ''))
-
-            # H: MİKTAR
-            set_cell(row, 8, quantity)
-
-            # I: BİRİM FİYAT
-            set_cell(row, 9, f"{unit_price:,.2f} {currency}")
-
-            # J: TUTAR (J-K merged)
-            set_cell(row, 10, f"{amount:,.2f} {currency}")
-        
-        # SATIR 20-22: FİYAT HESAPLAMALARI (font renklerini koru)
-        # K20: Ara Toplam
-        set_cell_with_style(20, 11, f"{total_amount:,.2f} {currency}")
-        
-        # K21: KDV (%25)
-        kdv_amount = total_amount * config.KDV_RATE
-        set_cell_with_style(21, 11, f"{kdv_amount:,.2f} {currency}")
-        
-        # K22: Genel Toplam (K22-K23 merged, mavi arka plan)
-        grand_total = total_amount + kdv_amount
-        set_cell_with_style(22, 11, f"{grand_total:,.2f} {currency}")
-        
-        # SATIR 20: NOTLAR (A20 hücresi - isteğe bağlı)
-        # Şablondaki varsayılan notu temizle ve kullanıcının notunu ekle
-        notes = offer_info.get('notes', '')
-        if notes:
-            set_cell(20, 1, notes)  # A20'ye kullanıcının notunu yaz
-        else:
-            set_cell(20, 1, '')  # Boş bırak (şablondaki varsayılan notu sil)
-        
-        # SATIR 26: Sipariş Alan / Teklif Veren
-        set_cell(26, 1, "Adı Soyadı: Hatice Arslan")
         
-        # SATIR 25: İmza satırı (şablonda zaten "İmza" yazıyor - dokunma)
+        # Şablondaki örnek ürün satırlarını temizle
+        for coordinate in _item_fields().values():
+            column, row = coordinate_from_string(coordinate)
+            _set_cell(ws, row, column_index_from_string(column), None)
         
         # Page setup: A4 dikey (portrait) tek sayfaya sığdırma
         try:
@@ -263,19 +436,81 @@ class ExcelHandler:
             # Hata olursa es geç
             pass
         
+        return wb
+    
+    def _offer_values(self, customer_data, services, offer_info):
+        """Başlık, müşteri bilgileri, toplamlar ve imza bloğu: {alan: değer} (alanlar OFFER_FIELDS'ta)"""
+        values = {}
+        
+        # Para birimi (varsayılan TL)
+        currency = offer_info.get('currency', '₺')
+        
+        # Sağ üst: Tarih ve Teklif No
+        offer_no = offer_info.get('offer_no') or self._new_offer_no()
+        offer_date = offer_info.get('offer_date', datetime.now().strftime('%d.%m.%Y'))
+        values['date_label'] = f"Tarih: {offer_date}"
+        values['offer_no_label'] = f"Teklif No: {offer_no}"
+        
+        # MÜŞTERİ BİLGİLERİ (sol taraf)
+        values['customer_name'] = customer_data.get('name', '')
+        values['contact_person'] = customer_data.get('contact_person', '')
+        values['phone'] = customer_data.get('phone', '')
+        
+        # TEKLİF BİLGİLERİ (sağ taraf)
+        values['offer_no'] = offer_no
+        values['offer_date'] = offer_date
+        values['payment_method'] = 'PEŞİN'  # her zaman PEŞİN
+        values['delivery_date'] = offer_info.get('delivery_date', '')
+        
+        # FİYAT HESAPLAMALARI (font renkleri korunur - STYLED_FIELDS)
+        total_amount = sum(service.get('quantity', 1) * service.get('unit_price', 0) for service in services)
+        kdv_amount = total_amount * config.KDV_RATE
+        grand_total = total_amount + kdv_amount
+        values['subtotal'] = f"{total_amount:,.2f} {currency}"
+        values['kdv'] = f"{kdv_amount:,.2f} {currency}"
+        values['grand_total'] = f"{grand_total:,.2f} {currency}"
+        
+        # NOTLAR (isteğe bağlı)
+        # Şablondaki varsayılan notu temizle ve kullanıcının notunu ekle
+        values['notes'] = offer_info.get('notes', '') or ''
+        
+        # Sipariş Alan / Teklif Veren (İmza satırı şablonda zaten yazıyor - dokunma)
+        values['signature'] = "Adı Soyadı: Hatice Arslan"
+        
+        return values
+    
+    @staticmethod
+    def _offer_items(services, currency):
+        """Ürün tablosu satırları: [{OFFER_ITEM_FIELDS alanı: değer}, ...]"""
+        items = []
+        for idx, service in enumerate(services):
+            quantity = service.get('quantity', 1)
+            unit_price = service.get('unit_price', 0)
+            amount = quantity * unit_price
+            items.append({
+                'no': idx + 1,
+                'name': service.get('name', ''),
+                'quantity': quantity,
+                'unit_price': f"{unit_price:,.2f} {currency}",
+                'amount': f"{amount:,.2f} {currency}",
+            })
+        return items
+    
+    def _new_offer_no(self):
+        # Önek ve sayaç aynı yılı kullanmalı (yılbaşı geçişinde T-2026-10001 gibi karışmasın)
+        year = datetime.now().year
+        return f"T-{year}-{self._get_next_offer_number(year)}"
+    
+    @staticmethod
+    def _output_path(customer_data, suffix):
         # Çıktı dizinini oluştur
         output_dir = Path(config.OUTPUT_DIR)
         output_dir.mkdir(exist_ok=True)
         
         # Dosya adı oluştur
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        timestamp = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
         customer_name_safe = customer_data.get('name', 'musteri').replace(' ', '_')[:30]
-        output_path = output_dir / f'teklif_{customer_name_safe}_{timestamp}.xlsx'
-        
-        # Kaydet
-        wb.save(output_path)
-        
-        return str(output_path)
+        return output_dir / f'teklif_{customer_name_safe}_{timestamp}{suffix}'
     
     def _generate_offer_no(self):
         """DEPRECATED: Kullanılmıyor, _get_next_offer_number() kullanın"""
@@ -283,7 +518,11 @@ class ExcelHandler:
 
 
 if __name__ == '__main__':
-    # Test
+    # Test ve karşılaştırma: python excel_handler.py [tekrar]
+    import sys
+    import time
+    
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20
     handler = ExcelHandler()
     
     test_customer = {
@@ -308,3 +547,36 @@ if __name__ == '__main__':
     
     output = handler.create_offer(test_customer, test_services, test_offer_info)
     print(f'Test teklif oluşturuldu: {output}')
+    
+    # create_offer süresi: her seferinde diskten yükleme, önbellekteki şablonun kopyası, XML yaması
+    uncached = ExcelHandler()
+    uncached._template = uncached._patch_template = None
+    cached = ExcelHandler().prepare()
+    cached._patch_template = None
+    patched = ExcelHandler().prepare()
+    for label, bench_handler in (('önbelleksiz', uncached), ('önbellekli', cached), ('XML yaması', patched)):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            Path(bench_handler.create_offer(test_customer, test_services, test_offer_info)).unlink()
+        print(f'📊 create_offer {label}: {(time.perf_counter() - started) / repeat * 1000:.1f} ms')
+    
+    # Çok kalemli teklifler: iki yolun eşdeğerliği ve süreler (eklenen satırlar, sayfa sonları)
+    from xlsx_patch import compare_workbooks
+    for count in (10, 100, 1000):
+        services = [{'name': f'EKİPMAN {index}', 'quantity': index, 'unit_price': 1250.5} for index in range(1, count + 1)]
+        timings = {}
+        outputs = {}
+        for label, bench_handler in (('openpyxl', cached), ('XML yaması', patched)):
+            started = time.perf_counter()
+            outputs[label] = bench_handler.create_offer(test_customer, services, test_offer_info)
+            timings[label] = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        pdf = patched.create_offer_pdf(test_customer, services, dict(test_offer_info))
+        timings['PDF'] = (time.perf_counter() - started) * 1000
+        differences = compare_workbooks(outputs['openpyxl'], outputs['XML yaması'])
+        print(f'{"✅" if not differences else "❌"} {count} kalem: '
+              + ', '.join(f'{label} {ms:.0f} ms' for label, ms in timings.items())
+              + ('' if not differences else f' ({"; ".join(differences[:3])})'))
+        for output in (*outputs.values(), pdf):
+            if output:
+                Path(output).unlink()
@@ -0,0 +1,210 @@
+"""
+Şablon manifestlerinin doldurma planlarına derlenmesi
+
+Manifest (document_manifests.MANIFESTS) bir belgenin şablonunu, alanlarını,
+değerlerin hangi girdi anahtarlarından hangi biçimde üretileceğini ve çıktı
+dosya adını tarif eden düz bir sözlüktür. Derleyici başlangıçta manifesti
+doğrular ve biçim dizgelerini bir kez ayrıştırır; her istekte sadece
+parçalar birleştirilir.
+
+Biçim dizgeleri str.format sözdizimindedir: "{company_name} ({tax_number})".
+Biçim belirteci yerine TRANSFORMS'taki bir kural yazılabilir:
+"{proje_turu:upper}". Girdide olmayan anahtarlar boş metin olur; hesaplanan
+anahtarlar (tarih, zaman damgası...) sadece kullanıldıklarında üretilir.
+"""
+import re
+from string import Formatter
+
+# Biçimlendirme kuralları: "{anahtar:kural}"
+TRANSFORMS = {
+    'upper': str.upper,
+    # Dosya adında kullanılabilir kısa ad
+    'safe': lambda value: value[:30].replace('/', '_').replace('\\', '_') or 'firma',
+}
+FORMATS = ('docx', 'xlsx')
+
+
+class ManifestError(ValueError):
+    """Manifest eksik veya hatalı"""
+
+
+def compile_format(text, where):
+    """Biçim dizgesi -> ((sabit metin, anahtar veya None, kural), ...)"""
+    parts = []
+    try:
+        parsed = list(Formatter().parse(text))
+    except ValueError as e:
+        raise ManifestError(f'{where}: geçersiz biçim "{text}": {e}') from e
+    for literal, key, spec, conversion in parsed:
+        if key is not None:
+            if not key.isidentifier():
+                raise ManifestError(f'{where}: "{{{key}}}" geçersiz anahtar (sadece düz ad kullanılabilir)')
+            if conversion or (spec and spec not in TRANSFORMS):
+                raise ManifestError(f'{where}: "{{{key}:{spec}}}" bilinmeyen kural (kurallar: {", ".join(TRANSFORMS)})')
+        parts.append((literal, key, TRANSFORMS[spec] if spec else None))
+    return tuple(parts)
+
+
+def render(parts, context):
+    pieces = []
+    for literal, key, transform in parts:
+        pieces.append(literal)
+        if key is not None:
+            value = context[key]
+            value = '' if value is None else str(value)
+            pieces.append(transform(value) if transform else value)
+    return ''.join(pieces)
+
+
+class FillContext(dict):
+    """Girdi verisi + istendiğinde hesaplanan anahtarlar; olmayan anahtar boş metin"""
+
+    def __init__(self, data, computed):
+        super().__init__(data)
+        self._computed = computed
+
+    def __missing__(self, key):
+        if key in self._computed:
+            value = self[key] = self._computed[key]()
+            return value
+        return ''
+
+
+class ValuePlan:
+    """
+    Args:
+        parts: compile_format() sonucu
+        when: Bu anahtar boşsa değer None olur (yer tutucu şablondaki gibi kalır)
+    """
+
+    def __init__(self, parts, when=None):
+        self.parts = parts
+        self.when = when
+
+    def value(self, context):
+        if self.when and not context[self.when]:
+            return None
+        return render(self.parts, context)
+
+
+class FieldPlan:
+    """
+    Args:
+        name: Alan adı
+        target: docx'te yer tutucu (alt metin veya regex), xlsx'te hücre (ör: E6)
+        label: Log satırında görünen ad
+        value: ValuePlan (her eşleşmeye aynı değer)
+        each: ValuePlan listesi (n. eşleşmeye n. değer; sadece docx)
+        when: Bu anahtar boşsa alan hiç doldurulmaz
+    """
+
+    def __init__(self, name, target, label, value=None, each=None, when=None):
+        self.name = name
+        self.target = target
+        self.label = label
+        self._value = value
+        self._each = each
+        self.when = when
+
+    def value(self, context):
+        if self.when and not context[self.when]:
+            return None
+        if self._each is not None:
+            return [plan.value(context) for plan in self._each]
+        return self._value.value(context)
+
+
+class FillPlan:
+    """Derlenmiş manifest: şablon, alanlar ve çıktı adı"""
+
+    def __init__(self, name, label, template, format, fields, output, layout=None):
+        self.name = name
+        self.label = label
+        self.template = template
+        self.format = format
+        self.fields = fields
+        self.output = output
+        self.layout = layout
+
+    @property
+    def markers(self):
+        """docx_templates.compile_markers için {alan adı: yer tutucu}"""
+        return {field.name: field.target for field in self.fields}
+
+    def context(self, data, computed):
+        return FillContext({key: value for key, value in data.items() if value is not None}, computed)
+
+    def values(self, context):
+        """{alan adı: değer} (None: alan doldurulmaz)"""
+        return {field.name: field.value(context) for field in self.fields}
+
+    def cells(self, values):
+        """xlsx: {hücre: değer}"""
+        return {field.target: values[field.name] for field in self.fields if values[field.name] is not None}
+
+    def output_name(self, context):
+        return render(self.output, context)
+
+
+def _value_plan(spec, where):
+    """'{biçim}' veya {'value': '{biçim}', 'when': anahtar}"""
+    if isinstance(spec, str):
+        return ValuePlan(compile_format(spec, where))
+    if isinstance(spec, dict) and isinstance(spec.get('value'), str):
+        return ValuePlan(compile_format(spec['value'], where), spec.get('when'))
+    raise ManifestError(f'{where}: değer "{{biçim}}" veya {{"value": ..., "when": ...}} olmalı')
+
+
+def compile_manifest(name, manifest):
+    """
+    Manifest sözlüğünü FillPlan'a derle.
+
+    Raises:
+        ManifestError: Eksik anahtar, bilinmeyen biçim veya kural
+    """
+    for key in ('label', 'template', 'fields', 'output'):
+        if key not in manifest:
+            raise ManifestError(f'{name}: "{key}" eksik')
+    format = manifest.get('format') or manifest['template'].rsplit('.', 1)[-1].lower()
+    if format not in FORMATS:
+        raise ManifestError(f'{name}: desteklenmeyen biçim "{format}" ({", ".join(FORMATS)})')
+    target_key = 'marker' if format == 'docx' else 'cell'
+
+    fields = []
+    for field_name, spec in manifest['fields'].items():
+        where = f'{name}.{field_name}'
+        if not field_name.isidentifier():
+            raise ManifestError(f'{where}: alan adı Python tanımlayıcısı olmalı')
+        target = spec.get(target_key)
+        if not isinstance(target, (str, re.Pattern)) or not target:
+            raise ManifestError(f'{where}: "{target_key}" eksik')
+        if 'each' in spec:
+            if format != 'docx':
+                raise ManifestError(f'{where}: "each" sadece docx alanlarında kullanılabilir')
+            each = [_value_plan(item, f'{where}[{index}]') for index, item in enumerate(spec['each'])]
+            value = None
+        else:
+            each = None
+            value = _value_plan({'value': spec.get('value', f'{{{field_name}}}')}, where)
+        fields.append(FieldPlan(field_name, target, spec.get('label', field_name), value, each, spec.get('when')))
+
+    return FillPlan(
+        name, manifest['label'], manifest['template'], format, tuple(fields),
+        compile_format(manifest['output'], f'{name}.output'), manifest.get('layout'),
+    )
+
+
+if __name__ == '__main__':
+    # Manifest kontrolü: python fill_plans.py (hatalı manifestte çıkış kodu 1)
+    import sys
+    from document_manifests import MANIFESTS
+
+    failed = False
+    for name, manifest in MANIFESTS.items():
+        try:
+            plan = compile_manifest(name, manifest)
+            print(f'✅ {name}: {plan.format}, {len(plan.fields)} alan -> {manifest["output"]}')
+        except ManifestError as e:
+            failed = True
+            print(f'❌ {e}')
+    sys.exit(1 if failed else 0)
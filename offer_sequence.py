@@ -0,0 +1,167 @@
+"""
+Teklif numarası sayacı (SQLite)
+
+Numaralar yıl bazında tutulur ve her yıl OFFER_NUMBER_START'tan yeniden
+başlar. Her süreç veritabanından tek işlemde (BEGIN IMMEDIATE) bir blok
+numara ayırır ve blok bitene kadar diske dokunmadan dağıtır; aynı anda
+çalışan süreçler veya thread'ler aynı numarayı alamaz. Kapanan sürecin
+kullanmadığı numaralar atlanır (numaralarda boşluk olabilir).
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class OfferSequence:
+    """Yıl bazında artan, süreçler arası güvenli numara üreticisi"""
+
+    def __init__(self, path=None, block_size=None, start=None, legacy_path=None):
+        """
+        Args:
+            path: SQLite dosyası
+            block_size: Süreç başına tek seferde ayrılan numara sayısı
+            start: Her yılın ilk numarasından bir önceki değer (10000 -> 10001)
+            legacy_path: Eski offer_counter.json (varsa ilk açılışta içeri alınır)
+        """
+        self.path = Path(path or config.OFFER_SEQUENCE_PATH)
+        self.block_size = max(1, block_size or config.OFFER_NUMBER_BLOCK_SIZE)
+        self.start = config.OFFER_NUMBER_START if start is None else start
+        self.legacy_path = Path(legacy_path) if legacy_path else None
+
+        # (pid, yıl, sıradaki numara, bloğun sonu): fork edilen süreç ebeveynin bloğunu kullanmamalı
+        self._block = None
+        self._lock = threading.Lock()
+
+    def next(self, year=None):
+        """Verilen yılın (varsayılan bu yıl) sıradaki numarası"""
+        year = year or datetime.now().year
+        with self._lock:
+            block = self._block
+            if block is None or block[0] != os.getpid() or block[1] != year or block[2] >= block[3]:
+                first = self._allocate(year, self.block_size)
+                block = (os.getpid(), year, first, first + self.block_size)
+            number = block[2]
+            self._block = (block[0], block[1], number + 1, block[3])
+            return number
+
+    def _allocate(self, year, count):
+        """Veritabanından [ilk, ilk + count) aralığını ayır; ilk numarayı döndür"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(sqlite3.connect(self.path, timeout=30, isolation_level=None)) as connection:
+            # IMMEDIATE: yazma kilidi okuma öncesi alınır, iki süreç aynı değeri okuyamaz
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                connection.execute(
+                    'CREATE TABLE IF NOT EXISTS offer_sequence (year INTEGER PRIMARY KEY, last_number INTEGER NOT NULL)'
+                )
+                row = connection.execute('SELECT last_number FROM offer_sequence WHERE year = ?', (year,)).fetchone()
+                if row is None:
+                    last_number = self._initial_value(connection, year)
+                    connection.execute('INSERT INTO offer_sequence (year, last_number) VALUES (?, ?)', (year, last_number + count))
+                else:
+                    last_number = row[0]
+                    connection.execute('UPDATE offer_sequence SET last_number = ? WHERE year = ?', (last_number + count, year))
+                connection.execute('COMMIT')
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+        return last_number + 1
+
+    def _initial_value(self, connection, year):
+        """Yılın ilk kaydı; tablo tamamen boşsa eski JSON sayacı bu yıla taşınır"""
+        first_use = connection.execute('SELECT COUNT(*) FROM offer_sequence').fetchone()[0] == 0
+        if first_use and self.legacy_path and self.legacy_path.exists():
+            try:
+                counter = int(json.loads(self.legacy_path.read_text())['counter'])
+                logger.info(f'🔢 {self.legacy_path.name} sayacı ({counter}) {year} yılına taşındı')
+                return max(counter, self.start)
+            except (ValueError, KeyError, TypeError) as e:
+                logger.warning(f'⚠️ {self.legacy_path} okunamadı, sayaç {self.start} ile başlıyor: {e}')
+        return self.start
+
+    def peek(self, year=None):
+        """Veritabanındaki son ayrılmış numara (diagnostics için; blok içi dağıtımı göstermez)"""
+        year = year or datetime.now().year
+        if not self.path.exists():
+            return None
+        with closing(sqlite3.connect(self.path, timeout=30)) as connection:
+            try:
+                row = connection.execute('SELECT last_number FROM offer_sequence WHERE year = ?', (year,)).fetchone()
+            except sqlite3.OperationalError:
+                return None
+        return row[0] if row else None
+
+
+_sequence = None
+_sequence_lock = threading.Lock()
+
+
+def get_offer_sequence():
+    """Süreç genelinde paylaşılan sayaç"""
+    global _sequence
+    if _sequence is None:
+        with _sequence_lock:
+            if _sequence is None:
+                _sequence = OfferSequence(legacy_path=Path(config.OUTPUT_DIR) / 'offer_counter.json')
+    return _sequence
+
+
+def _stress_worker(path, block_size, count, results):
+    sequence = OfferSequence(path, block_size=block_size, start=10000)
+    results.put([sequence.next(2026) for _ in range(count)])
+
+
+if __name__ == '__main__':
+    # Süreçler arası çakışma testi: python offer_sequence.py [süreç] [süreç başına numara]
+    import multiprocessing
+    import sys
+    import tempfile
+    import time
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    processes = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        for block_size in (1, 25):
+            path = Path(tmp) / f'sequence_{block_size}.sqlite3'
+            results = multiprocessing.Queue()
+            workers = [
+                multiprocessing.Process(target=_stress_worker, args=(path, block_size, count, results))
+                for _ in range(processes)
+            ]
+            started = time.perf_counter()
+            for worker in workers:
+                worker.start()
+            numbers = [number for _ in workers for number in results.get()]
+            for worker in workers:
+                worker.join()
+            elapsed = time.perf_counter() - started
+
+            duplicates = len(numbers) - len(set(numbers))
+            # Blok = 1 iken numaralar boşluksuz olmalı
+            contiguous = block_size > 1 or sorted(numbers) == list(range(10001, 10001 + len(numbers)))
+            failed = failed or duplicates > 0 or not contiguous
+            print(f'{"✅" if not duplicates and contiguous else "❌"} blok {block_size}: {processes} süreç x {count} numara, '
+                  f'{duplicates} çakışma, {"boşluksuz" if contiguous and block_size == 1 else "aralık " + str(min(numbers)) + "-" + str(max(numbers))}, '
+                  f'{elapsed:.2f} sn')
+
+        # Yıl değişince numara baştan başlar; eski JSON sayacı ilk açılışta taşınır
+        legacy = Path(tmp) / 'offer_counter.json'
+        legacy.write_text(json.dumps({'counter': 10021}))
+        sequence = OfferSequence(Path(tmp) / 'yearly.sqlite3', block_size=5, start=10000, legacy_path=legacy)
+        yearly = [sequence.next(2026), sequence.next(2026), sequence.next(2027), sequence.next(2026)]
+        expected = [10022, 10023, 10001, 10027]
+        failed = failed or yearly != expected
+        print(f'{"✅" if yearly == expected else "❌"} yıl değişimi ve taşıma: {yearly}')
+
+    sys.exit(1 if failed else 0)
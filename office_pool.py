@@ -0,0 +1,374 @@
+"""
+Kalıcı LibreOffice dönüştürme havuzu (UNO)
+
+Her belge için yeni bir soffice başlatmak yerine N adet LibreOffice
+arka planda açık tutulur ve dosyalar yerel soket üzerinden UNO ile
+PDF'e çevrilir.
+"""
+import atexit
+import logging
+import queue
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+import config
+from pdf_converter import find_soffice, kill_process_group
+
+logger = logging.getLogger(__name__)
+
+# Uzantıya göre PDF filtresi
+PDF_FILTERS = {
+    '.xlsx': 'calc_pdf_Export',
+    '.xls': 'calc_pdf_Export',
+    '.ods': 'calc_pdf_Export',
+    '.csv': 'calc_pdf_Export',
+    '.docx': 'writer_pdf_Export',
+    '.doc': 'writer_pdf_Export',
+    '.odt': 'writer_pdf_Export',
+    '.rtf': 'writer_pdf_Export',
+}
+
+_uno = None
+
+
+def _import_uno():
+    """
+    uno modülünü yükle. Debian paketindeki python3-uno sistem Python'una
+    kurulur; bulunamazsa UNO_PYTHON_PATHS sys.path'in sonuna eklenir.
+    """
+    global _uno
+    if _uno is not None:
+        return _uno
+    try:
+        import uno
+    except ImportError:
+        for path in config.UNO_PYTHON_PATHS:
+            if Path(path).is_dir() and path not in sys.path:
+                sys.path.append(path)
+        try:
+            import uno
+        except ImportError:
+            return None
+    _uno = uno
+    return _uno
+
+
+def _free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _properties(**values):
+    from com.sun.star.beans import PropertyValue
+    properties = []
+    for name, value in values.items():
+        prop = PropertyValue()
+        prop.Name = name
+        prop.Value = value
+        properties.append(prop)
+    return tuple(properties)
+
+
+class OfficeInstance:
+    """Soket üzerinden UNO bağlantısı kabul eden tek bir headless LibreOffice"""
+
+    def __init__(self, index, soffice_cmd, base_dir):
+        self.index = index
+        self.soffice_cmd = soffice_cmd
+        # Her örneğin kendi profili olmalı, yoksa profil kilidinde beklerler
+        self.profile_dir = Path(base_dir) / f'profile_{index}'
+        self.process = None
+        self.desktop = None
+        self.conversions = 0
+        self._hung = False
+
+    @property
+    def running(self):
+        return self.process is not None and self.process.poll() is None
+
+    def start(self, timeout):
+        uno = _import_uno()
+        port = _free_port()
+        connection = f'socket,host=127.0.0.1,port={port};urp;StarOffice.ComponentContext'
+        self.process = subprocess.Popen(
+            [
+                self.soffice_cmd,
+                '--headless', '--invisible', '--nologo', '--nodefault',
+                '--norestore', '--nolockcheck', '--nofirststartwizard',
+                f'-env:UserInstallation={self.profile_dir.resolve().as_uri()}',
+                f'--accept={connection}',
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+
+        local_context = uno.getComponentContext()
+        resolver = local_context.ServiceManager.createInstanceWithContext(
+            'com.sun.star.bridge.UnoUrlResolver', local_context
+        )
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                context = resolver.resolve(f'uno:{connection}')
+                break
+            except Exception:
+                if self.process.poll() is not None or time.monotonic() > deadline:
+                    self.stop()
+                    raise RuntimeError(f'LibreOffice #{self.index} {timeout} sn içinde bağlantı kabul etmedi')
+                time.sleep(0.25)
+
+        self.desktop = context.ServiceManager.createInstanceWithContext('com.sun.star.frame.Desktop', context)
+        self.conversions = 0
+        self._hung = False
+        logger.info(f'📄 LibreOffice #{self.index} hazır (port {port}, pid {self.process.pid})')
+
+    @contextmanager
+    def _watchdog(self, timeout):
+        """UNO çağrıları zaman aşımı desteklemez; süre dolarsa süreci öldür"""
+        self._hung = False
+        timer = threading.Timer(timeout, self._kill_hung)
+        timer.daemon = True
+        timer.start()
+        try:
+            yield
+        finally:
+            timer.cancel()
+
+    def is_healthy(self, timeout):
+        """Süreç ayakta ve UNO çağrılarına timeout saniye içinde cevap veriyor mu?"""
+        if not self.running or self.desktop is None:
+            return False
+        try:
+            with self._watchdog(timeout):
+                self.desktop.getComponents()
+        except Exception:
+            return False
+        return not self._hung
+
+    def convert(self, input_path, pdf_path, timeout):
+        input_path = Path(input_path).resolve()
+        pdf_filter = PDF_FILTERS.get(input_path.suffix.lower())
+        if pdf_filter is None:
+            raise ValueError(f'Desteklenmeyen dosya türü: {input_path.suffix}')
+
+        document = None
+        try:
+            with self._watchdog(timeout):
+                document = self.desktop.loadComponentFromURL(
+                    input_path.as_uri(), '_blank', 0, _properties(Hidden=True, ReadOnly=True)
+                )
+                if document is None:
+                    raise RuntimeError(f'Belge açılamadı: {input_path.name}')
+                document.storeToURL(Path(pdf_path).resolve().as_uri(), _properties(FilterName=pdf_filter))
+        except Exception:
+            if self._hung:
+                raise TimeoutError(f'LibreOffice #{self.index} {timeout} sn içinde cevap vermedi')
+            raise
+        finally:
+            if document is not None and not self._hung:
+                try:
+                    document.close(True)
+                except Exception:
+                    pass
+        if self._hung:
+            raise TimeoutError(f'LibreOffice #{self.index} {timeout} sn içinde cevap vermedi')
+        self.conversions += 1
+
+    def _kill_hung(self):
+        self._hung = True
+        logger.warning(f'⚠️ LibreOffice #{self.index} takıldı, sonlandırılıyor')
+        if self.process is not None:
+            kill_process_group(self.process)
+
+    def stop(self):
+        process, self.process, self.desktop = self.process, None, None
+        if process is None:
+            return
+        if process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                kill_process_group(process)
+                process.wait()
+
+
+class OfficePool:
+    """
+    Sıcak LibreOffice örnekleri havuzu.
+
+    convert() boştaki bir örneği alır, sağlığını kontrol eder, gerekirse
+    yeniden başlatır. Her örnek max_conversions dönüşümden sonra ya da
+    takılınca yenilenir. UNO veya soffice yoksa available False olur ve
+    çağıran taraf tek seferlik soffice çalıştırmaya düşer.
+    """
+
+    def __init__(self, size=None, max_conversions=None, timeout=None, soffice_cmd=None):
+        self.size = config.OFFICE_POOL_SIZE if size is None else size
+        self.max_conversions = max_conversions or config.OFFICE_POOL_MAX_CONVERSIONS
+        self.timeout = timeout or config.OFFICE_CONVERT_TIMEOUT
+        self.start_timeout = config.OFFICE_START_TIMEOUT
+        self.health_timeout = config.OFFICE_HEALTH_TIMEOUT
+        self.soffice_cmd = soffice_cmd
+
+        self._base_dir = None
+        self._instances = []
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._initialized = False
+        self._disabled_reason = None
+
+    @property
+    def available(self):
+        self._initialize()
+        return self._disabled_reason is None
+
+    @property
+    def disabled_reason(self):
+        self._initialize()
+        return self._disabled_reason
+
+    def _initialize(self):
+        if self._initialized:
+            return
+        with self._lock:
+            if self._initialized:
+                return
+            if self.size <= 0:
+                self._disabled_reason = 'OFFICE_POOL_SIZE=0'
+            elif _import_uno() is None:
+                self._disabled_reason = 'uno modülü bulunamadı (python3-uno)'
+            else:
+                if self.soffice_cmd is None:
+                    self.soffice_cmd = find_soffice()
+                if not self.soffice_cmd:
+                    self._disabled_reason = 'LibreOffice (soffice) bulunamadı'
+
+            if self._disabled_reason is None:
+                self._base_dir = Path(tempfile.mkdtemp(prefix='office_pool_'))
+                for index in range(self.size):
+                    instance = OfficeInstance(index, self.soffice_cmd, self._base_dir)
+                    self._instances.append(instance)
+                    self._idle.put(instance)
+                logger.info(f'📄 LibreOffice havuzu: {self.size} örnek, {self.max_conversions} dönüşümde bir yenileme')
+            else:
+                logger.warning(f'⚠️ LibreOffice havuzu kullanılamıyor: {self._disabled_reason}')
+            self._initialized = True
+
+    def start(self):
+        """Tüm örnekleri önceden başlat (ısınma için; hatalar sadece loglanır)"""
+        if not self.available:
+            return self
+        instances = []
+        for _ in range(self.size):
+            instance = self._idle.get()
+            instances.append(instance)
+        try:
+            for instance in instances:
+                if not instance.running:
+                    try:
+                        instance.start(self.start_timeout)
+                    except Exception as e:
+                        logger.warning(f'⚠️ {e}')
+        finally:
+            for instance in instances:
+                self._idle.put(instance)
+        return self
+
+    def convert(self, input_path, pdf_path):
+        """
+        Dosyayı PDF'e çevir.
+
+        Raises:
+            RuntimeError: Havuz kullanılamıyor veya boşta örnek yok
+            TimeoutError: Dönüşüm zaman aşımına uğradı
+        """
+        with self._checkout() as instance:
+            self._prepare(instance)
+            self._convert(instance, input_path, pdf_path)
+
+    def convert_batch(self, items):
+        """
+        Birden fazla dosyayı aynı LibreOffice oturumunda sırayla çevir.
+
+        Args:
+            items: [(kaynak yol, PDF yolu), ...]
+
+        Returns:
+            dict: {str(kaynak yol): str(PDF yolu) veya None}
+        """
+        results = {}
+        with self._checkout() as instance:
+            for input_path, pdf_path in items:
+                try:
+                    self._prepare(instance)
+                    self._convert(instance, input_path, pdf_path)
+                    results[str(input_path)] = str(pdf_path)
+                except Exception as e:
+                    logger.warning(f'⚠️ {Path(input_path).name} çevrilemedi: {e}')
+                    results[str(input_path)] = None
+        return results
+
+    @contextmanager
+    def _checkout(self):
+        """Boştaki bir örneği al, iş bitince geri bırak"""
+        if not self.available:
+            raise RuntimeError(f'LibreOffice havuzu kullanılamıyor: {self._disabled_reason}')
+        try:
+            instance = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise RuntimeError('LibreOffice havuzunda boş örnek yok')
+        try:
+            yield instance
+        finally:
+            self._idle.put(instance)
+
+    def _prepare(self, instance):
+        """Gerekirse örneği yenile veya yeniden başlat"""
+        if instance.conversions >= self.max_conversions:
+            logger.info(f'♻️ LibreOffice #{instance.index} {instance.conversions} dönüşümden sonra yenileniyor')
+            instance.stop()
+        elif instance.running and not instance.is_healthy(self.health_timeout):
+            logger.warning(f'⚠️ LibreOffice #{instance.index} cevap vermiyor, yeniden başlatılıyor')
+            instance.stop()
+        if not instance.running:
+            instance.start(self.start_timeout)
+
+    def _convert(self, instance, input_path, pdf_path):
+        started = time.perf_counter()
+        try:
+            instance.convert(input_path, pdf_path, self.timeout)
+        except Exception:
+            instance.stop()
+            raise
+        logger.info(f'📄 UNO dönüşümü: {Path(input_path).name} ({time.perf_counter() - started:.2f} sn, #{instance.index})')
+
+    def shutdown(self):
+        for instance in self._instances:
+            instance.stop()
+        if self._base_dir is not None:
+            shutil.rmtree(self._base_dir, ignore_errors=True)
+            self._base_dir = None
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_office_pool():
+    """Süreç genelinde paylaşılan havuz (ilk çağrıda oluşturulur)"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = OfficePool()
+                atexit.register(_pool.shutdown)
+    return _pool
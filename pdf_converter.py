@@ -1,9 +1,314 @@
 """
 Excel'den PDF'e dönüştürme modülü
 """
+import os
+import queue
+import shutil
+import signal
 import subprocess
+import tempfile
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 import platform
+import config
+
+# LibreOffice yolları (sıralama önemli - Railway için)
+SOFFICE_PATHS = [
+    '/usr/bin/soffice',  # Railway/Linux
+    '/usr/bin/libreoffice',  # Linux alternatif
+    '/usr/lib/libreoffice/program/soffice',  # Ubuntu alternatif yol
+    '/opt/libreoffice/program/soffice',  # Manuel kurulum
+    '/Applications/LibreOffice.app/Contents/MacOS/soffice',  # macOS
+    '/usr/local/bin/libreoffice',
+    'soffice',
+    'libreoffice',
+]
+
+_soffice_cmd = None
+_soffice_searched = False
+_soffice_lock = threading.Lock()
+
+
+def find_soffice():
+    """LibreOffice çalıştırılabilir dosyasını bul (sonuç, bulunamasa da önbelleğe alınır)"""
+    global _soffice_cmd, _soffice_searched
+    if _soffice_cmd or _soffice_searched:
+        return _soffice_cmd
+    
+    with _soffice_lock:
+        if _soffice_cmd or _soffice_searched:
+            return _soffice_cmd
+        _soffice_searched = True
+        for path in SOFFICE_PATHS:
+            try:
+                if Path(path).exists():
+                    _soffice_cmd = path
+                    break
+                # which komutu ile de kontrol et
+                result = subprocess.run(['which', path], capture_output=True, text=True, timeout=5)
+                if result.returncode == 0 and result.stdout.strip():
+                    _soffice_cmd = result.stdout.strip()
+                    break
+            except Exception:
+                continue
+        
+        if _soffice_cmd:
+            print(f"✅ LibreOffice bulundu: {_soffice_cmd}")
+        else:
+            print("❌ LibreOffice (soffice) hiçbir yerde bulunamadı")
+        return _soffice_cmd
+
+
+def convert_office_to_pdf(input_path):
+    """
+    Word/Excel dosyasını aynı klasöre PDF olarak çevir.
+    
+    Dosya, başlangıçta yoklanan arka uçlardan (LibreOffice havuzu, tek
+    seferlik soffice, macOS'ta Numbers) en hızlı sağlıklı olanla çevrilir;
+    başarısız olursa sıradaki denenir.
+    
+    Args:
+        input_path (str): Dönüştürülecek dosya
+        
+    Returns:
+        str: PDF dosya yolu veya None
+    """
+    from converter_backends import get_registry
+    return get_registry().convert(input_path)
+
+
+_profile_slots = None
+_profile_slots_lock = threading.Lock()
+
+
+@contextmanager
+def _profile_slot():
+    """
+    Boştaki bir LibreOffice profil dizinini al.
+    
+    Aynı profili kullanan iki soffice birbirini kilitte bekletir ya da
+    hata verir; her slotun kendi profili olduğu için OFFICE_SPAWN_SLOTS
+    kadar dönüşüm gerçekten paralel çalışır. Profiller diskte kalır,
+    ilk kullanımdan sonra yeniden oluşturulmaz.
+    """
+    global _profile_slots
+    if _profile_slots is None:
+        with _profile_slots_lock:
+            if _profile_slots is None:
+                base_dir = Path(config.TEMP_DIR).resolve() / 'libreoffice'
+                base_dir.mkdir(parents=True, exist_ok=True)
+                slots = queue.Queue()
+                for index in range(max(1, config.OFFICE_SPAWN_SLOTS)):
+                    slots.put(base_dir / f'profile_{index}')
+                _profile_slots = slots
+    
+    profile_dir = _profile_slots.get()
+    try:
+        yield profile_dir
+    finally:
+        _profile_slots.put(profile_dir)
+
+
+def run_with_watchdog(cmd, timeout):
+    """
+    Komutu kendi süreç grubunda çalıştır; süre dolarsa tüm grubu öldür.
+    
+    soffice asıl işi alt süreçte (soffice.bin) yapar. subprocess.run(timeout=)
+    sadece ilk süreci öldürdüğü için takılan LibreOffice arkada kalıp
+    profili kilitli tutardı.
+    
+    Raises:
+        subprocess.TimeoutExpired: Süre dolduysa (süreç ağacı öldürülmüş olarak)
+    """
+    process = subprocess.Popen(
+        cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, start_new_session=True
+    )
+    try:
+        stdout, stderr = process.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        kill_process_group(process)
+        try:
+            process.communicate(timeout=5)
+        except subprocess.TimeoutExpired:
+            pass
+        raise
+    return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
+
+
+def kill_process_group(process):
+    """Süreci ve start_new_session ile açtığı tüm alt süreçleri öldür"""
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (AttributeError, ProcessLookupError, PermissionError):
+        # Windows'ta süreç grubu yok / süreç zaten bitmiş
+        try:
+            process.kill()
+        except ProcessLookupError:
+            pass
+
+
+def _convert_with_soffice(input_path, pdf_path):
+    """Tek seferlik soffice --convert-to pdf"""
+    return _run_soffice([input_path], config.OFFICE_CONVERT_TIMEOUT).get(str(input_path))
+
+
+def _run_soffice(input_paths, timeout):
+    """
+    Dosyaları tek soffice çağrısında çevir (kendi profili ve çıktı dizini ile).
+    PDF'ler kaynak dosyaların yanına taşınır.
+    
+    Returns:
+        dict: {str(kaynak yol): str(PDF yolu) veya None}
+    """
+    results = {str(path): None for path in input_paths}
+    soffice_cmd = find_soffice()
+    if not soffice_cmd:
+        return results
+    
+    with _profile_slot() as profile_dir:
+        # soffice çıktıyı <ad>.pdf olarak yazar; her çağrı ayrı dizine yazsın
+        output_dir = Path(tempfile.mkdtemp(prefix='convert_', dir=profile_dir.parent))
+        try:
+            result = run_with_watchdog([
+                soffice_cmd,
+                f'-env:UserInstallation={profile_dir.as_uri()}',
+                '--headless',
+                '--norestore',
+                '--convert-to', 'pdf',
+                '--outdir', str(output_dir),
+                *(str(path) for path in input_paths)
+            ], timeout)
+            
+            if result.returncode != 0:
+                print(f"❌ LibreOffice hata (returncode={result.returncode}): {result.stderr}")
+            
+            # soffice bazı dosyalar başarısız olsa da 0 dönebilir, her çıktıyı kontrol et
+            for path in input_paths:
+                produced = output_dir / f'{path.stem}.pdf'
+                if produced.exists():
+                    pdf_path = path.with_suffix('.pdf')
+                    shutil.move(str(produced), str(pdf_path))
+                    results[str(path)] = str(pdf_path)
+                else:
+                    print(f'❌ PDF dosyası oluşmadı: {path.with_suffix(".pdf")}')
+        except subprocess.TimeoutExpired:
+            print(f'⏱️ LibreOffice {timeout:.0f} sn içinde bitmedi, süreç ağacı sonlandırıldı')
+        except Exception as e:
+            print(f'LibreOffice dönüştürme hatası: {e}')
+        finally:
+            shutil.rmtree(output_dir, ignore_errors=True)
+    
+    return results
+
+
+def _batch_chunks(paths, size):
+    """
+    Dosyaları en fazla size elemanlı parçalara böl. soffice bir çağrıdaki
+    tüm çıktıları aynı dizine <ad>.pdf olarak yazdığı için aynı adlı iki
+    dosya aynı parçaya düşmez.
+    """
+    chunks = []
+    for path in paths:
+        for chunk in chunks:
+            if len(chunk) < size and all(other.stem != path.stem for other in chunk):
+                chunk.append(path)
+                break
+        else:
+            chunks.append([path])
+    return chunks
+
+
+def convert_batch(input_paths):
+    """
+    Birden fazla Word/Excel dosyasını toplu olarak PDF'e çevir.
+    
+    Dosyalar OFFICE_BATCH_SIZE'lık parçalara bölünür. Her parça ya tek bir
+    havuz örneğinde aynı oturumda ya da (havuz yoksa) tek bir soffice
+    çağrısında çevrilir; böylece LibreOffice açılış maliyeti dosya başına
+    değil parça başına ödenir. Parçalar paralel çalışır.
+    
+    soffice çağrıları libreoffice-cli arka ucunun devre kesicisinden geçer:
+    devre açıksa soffice çalıştırılmaz (dosyalar PDF'siz kalır, çağıran
+    taraf Word/Excel gönderir), sonuç başarı/hata olarak kaydedilir.
+    
+    Args:
+        input_paths: Dönüştürülecek dosyalar
+        
+    Returns:
+        dict: {str(kaynak yol): str(PDF yolu) veya None}, giriş sırasıyla
+    """
+    paths = [Path(path) for path in input_paths]
+    if not paths:
+        return {}
+    
+    import time
+    from converter_backends import get_registry
+    from office_pool import get_office_pool
+    registry = get_registry()
+    pool = get_office_pool()
+    use_pool = registry.is_usable('libreoffice-uno')
+    soffice = registry.backend('libreoffice-cli')
+    if not use_pool and not registry.is_usable('libreoffice-cli'):
+        return {}
+    
+    def convert_chunk(chunk):
+        results = {}
+        if use_pool:
+            try:
+                results = pool.convert_batch([(path, path.with_suffix('.pdf')) for path in chunk])
+            except Exception as e:
+                print(f"⚠️ LibreOffice havuzu ile toplu dönüştürülemedi: {e}")
+        failed = [path for path in chunk if not results.get(str(path))]
+        # Devre başka bir parçanın hatasıyla açılmış olabilir; her çağrıdan önce bakılır
+        if not failed or soffice is None or not (soffice.available and soffice.breaker.allow()):
+            return results
+        
+        # Dosya başına süre, ama tek çağrı OFFICE_BATCH_TIMEOUT'u geçmez
+        timeout = min(config.OFFICE_CONVERT_TIMEOUT * len(failed), config.OFFICE_BATCH_TIMEOUT)
+        started = time.perf_counter()
+        converted = _run_soffice(failed, timeout)
+        missing = [path.name for path in failed if not converted.get(str(path))]
+        if missing:
+            soffice.record_failure(f"Toplu dönüşümde PDF oluşmadı: {', '.join(missing)}")
+        else:
+            soffice.record_success((time.perf_counter() - started) / len(failed))
+        results.update(converted)
+        return results
+    
+    chunks = _batch_chunks(paths, max(1, config.OFFICE_BATCH_SIZE))
+    workers = min(len(chunks), pool.size if use_pool else config.OFFICE_SPAWN_SLOTS)
+    if workers <= 1:
+        chunk_results = [convert_chunk(chunk) for chunk in chunks]
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            chunk_results = list(executor.map(convert_chunk, chunks))
+    
+    merged = {}
+    for results in chunk_results:
+        merged.update(results)
+    return {str(path): merged.get(str(path)) for path in paths}
+
+
+def conversion_available():
+    """Şu an istek kabul eden bir dönüştürücü var mı? (hepsinin devresi açıksa False)"""
+    from converter_backends import get_registry
+    return get_registry().any_usable()
+
+
+def prefers_batch():
+    """
+    Belge seti toplu mu çevrilmeli? Sıcak havuz varsa belgeler ayrı
+    örneklerde paralel çevrilir ve hazır oldukça gönderilebilir; havuz
+    yoksa her dönüşüm yeni bir soffice açılışı demek, toplu çevirmek daha hızlı.
+    """
+    if config.OFFICE_BATCH_MODE == 'always':
+        return True
+    if config.OFFICE_BATCH_MODE == 'never':
+        return False
+    from converter_backends import get_registry
+    return not get_registry().is_usable('libreoffice-uno')
 
 
 class PDFConverter:
@@ -26,16 +331,11 @@ class PDFConverter:
         pdf_path = excel_path.with_suffix('.pdf')
         
         try:
-            # Yöntem 1: LibreOffice (macOS/Linux için en güvenilir)
+            # Yöntem 1: Kayıtlı dönüştürücüler (LibreOffice havuzu/CLI, macOS'ta Numbers)
             if self._convert_with_libreoffice(excel_path, pdf_path):
                 return str(pdf_path)
             
-            # Yöntem 2: macOS'ta Numbers kullan
-            if self.system == 'Darwin':
-                if self._convert_with_numbers(excel_path, pdf_path):
-                    return str(pdf_path)
-            
-            # Yöntem 3: Python kütüphaneleri ile (basit)
+            # Yöntem 2: Python kütüphaneleri ile (basit)
             if self._convert_with_python(excel_path, pdf_path):
                 return str(pdf_path)
                 
@@ -44,57 +344,19 @@ class PDFConverter:
         
         return None
     
+    def convert_batch(self, paths):
+        """Dosyaları toplu olarak PDF'e çevir, {kaynak: PDF veya None} döndür"""
+        return convert_batch(paths)
+    
+    def prefers_batch(self):
+        return prefers_batch()
+    
+    def conversion_available(self):
+        return conversion_available()
+    
     def _convert_with_libreoffice(self, excel_path, pdf_path):
-        """LibreOffice ile dönüştür"""
-        try:
-            # LibreOffice yollarını kontrol et (sıralama önemli - Railway için)
-            libreoffice_paths = [
-                '/usr/bin/soffice',  # Railway/Linux
-                '/usr/bin/libreoffice',  # Linux alternatif
-                '/Applications/LibreOffice.app/Contents/MacOS/soffice',  # macOS
-                '/usr/local/bin/libreoffice',
-                'soffice',
-                'libreoffice',
-            ]
-            
-            libreoffice_cmd = None
-            for path in libreoffice_paths:
-                try:
-                    if Path(path).exists():
-                        libreoffice_cmd = path
-                        break
-                    # which komutu ile de kontrol et
-                    result = subprocess.run(['which', path], capture_output=True, text=True, timeout=5)
-                    if result.returncode == 0 and result.stdout.strip():
-                        libreoffice_cmd = result.stdout.strip()
-                        break
-                except:
-                    continue
-            
-            if not libreoffice_cmd:
-                print("❌ LibreOffice bulunamadı")
-                return False
-            
-            print(f"✅ LibreOffice bulundu: {libreoffice_cmd}")
-            
-            # Excel'i PDF'e çevir
-            output_dir = excel_path.parent
-            result = subprocess.run([
-                libreoffice_cmd,
-                '--headless',
-                '--convert-to', 'pdf',
-                '--outdir', str(output_dir),
-                str(excel_path)
-            ], capture_output=True, timeout=30, text=True)
-            
-            if result.returncode != 0:
-                print(f"❌ LibreOffice hata: {result.stderr}")
-            
-            return result.returncode == 0 and pdf_path.exists()
-            
-        except Exception as e:
-            print(f'LibreOffice dönüştürme hatası: {e}')
-            return False
+        """En hızlı sağlıklı dönüştürücü ile çevir (bkz. converter_backends)"""
+        return convert_office_to_pdf(excel_path) == str(pdf_path)
     
     def _convert_with_numbers(self, excel_path, pdf_path):
         """macOS Numbers ile dönüştür"""
@@ -136,10 +398,80 @@ class PDFConverter:
             return False
 
 
+def _concurrency_check(source, count):
+    """
+    Aynı dosyanın count kopyasını aynı anda çevir; hepsinin başarılı
+    olduğunu ve sürenin tek dönüşüme göre nasıl ölçeklendiğini göster.
+    """
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    
+    source = Path(source)
+    Path(config.TEMP_DIR).mkdir(exist_ok=True)
+    work_dir = Path(tempfile.mkdtemp(prefix='concurrency_', dir=config.TEMP_DIR))
+    try:
+        copies = []
+        for index in range(count + 1):
+            copy_path = work_dir / f'{source.stem}_{index}{source.suffix}'
+            shutil.copy(source, copy_path)
+            copies.append(copy_path)
+        
+        # İlk dönüşüm profili de oluşturur, ölçüme katma
+        convert_office_to_pdf(copies.pop())
+        
+        started = time.perf_counter()
+        convert_office_to_pdf(copies[0])
+        single = time.perf_counter() - started
+        
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=count) as executor:
+            results = list(executor.map(convert_office_to_pdf, copies))
+        elapsed = time.perf_counter() - started
+        
+        succeeded = sum(1 for result in results if result and Path(result).exists())
+        print(f'Tek dönüşüm: {single:.2f} sn')
+        print(f'{count} eşzamanlı dönüşüm: {elapsed:.2f} sn, {succeeded}/{count} başarılı '
+              f'(sıralı olsa ~{single * count:.2f} sn, hızlanma x{single * count / elapsed:.1f})')
+        return succeeded == count
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
 if __name__ == '__main__':
+    import glob
+    import sys
+    
+    # Toplu dönüştürme: python pdf_converter.py --batch dosya_veya_klasör [...]
+    if len(sys.argv) > 2 and sys.argv[1] == '--batch':
+        import time
+        from office_pool import PDF_FILTERS
+        
+        inputs = []
+        for arg in sys.argv[2:]:
+            path = Path(arg)
+            if path.is_dir():
+                inputs.extend(sorted(p for p in path.rglob('*') if p.suffix.lower() in PDF_FILTERS))
+            else:
+                inputs.append(path)
+        
+        started = time.perf_counter()
+        results = convert_batch(inputs)
+        elapsed = time.perf_counter() - started
+        # Dönüştürücü yoksa sonuç boş döner; tüm girdiler başarısız sayılır
+        failed = [str(path) for path in inputs if not results.get(str(path))]
+        for source in failed:
+            print(f'❌ {source}')
+        print(f'{len(inputs) - len(failed)}/{len(inputs)} dosya {elapsed:.1f} sn içinde çevrildi '
+              f'({elapsed / max(1, len(inputs)):.2f} sn/dosya)')
+        sys.exit(1 if failed else 0)
+    
+    # Eşzamanlılık testi: python pdf_converter.py --concurrency 4 [dosya]
+    if len(sys.argv) > 2 and sys.argv[1] == '--concurrency':
+        source = sys.argv[3] if len(sys.argv) > 3 else config.TEMPLATE_PATH
+        sys.exit(0 if _concurrency_check(source, int(sys.argv[2])) else 1)
+    
     # Test
     converter = PDFConverter()
-    import glob
     
     # Son oluşturulan Excel dosyasını bul
     files = sorted(glob.glob('outputs/teklif_*.xlsx'), key=lambda x: x, reverse=True)
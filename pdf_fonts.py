@@ -0,0 +1,127 @@
+"""
+PDF çizimi için yazı tipi bulma ve satır kaydırma
+
+Şablonlardaki yazı tipleri (Calibri, Trebuchet MS, Times New Roman) sunucuda
+genelde yoktur. Önce aynı isimli, sonra ölçüleri uyumlu açık yazı tipi
+(Carlito, Liberation) aranır; bulunamazsa veya metindeki bir karakter
+(ş, ğ, İ...) eksikse PDF_FONT_PATHS'teki yedeklere geçilir.
+"""
+import os
+import threading
+from pathlib import Path
+import config
+
+# Ölçüleri uyumlu açık kaynak karşılıklar (fonts-liberation, fonts-crosextra-carlito)
+SUBSTITUTES = {
+    'calibri': 'carlito',
+    'cambria': 'caladea',
+    'arial': 'liberationsans',
+    'helvetica': 'liberationsans',
+    'timesnewroman': 'liberationserif',
+    'times': 'liberationserif',
+    'couriernew': 'liberationmono',
+}
+
+
+class FontNotFoundError(Exception):
+    """Metni çizebilecek yazı tipi yok"""
+
+
+def normalize_font_name(name):
+    """'ABCDEF+Liberation Sans-Bold' -> 'liberationsansbold'"""
+    name = name.split('+', 1)[-1]
+    return ''.join(char for char in name.lower() if char.isalnum())
+
+
+class FontResolver:
+    """Yazı tipi adı -> fitz.Font (dosya dizini ve Font nesneleri önbelleklenir)"""
+
+    def __init__(self, font_dirs=None, fallback_paths=None, bold_fallback_paths=None):
+        self.font_dirs = config.PDF_FONT_DIRS if font_dirs is None else font_dirs
+        self.fallback_paths = config.PDF_FONT_PATHS if fallback_paths is None else fallback_paths
+        self.bold_fallback_paths = config.PDF_BOLD_FONT_PATHS if bold_fallback_paths is None else bold_fallback_paths
+        self._index = None
+        self._fonts = {}
+        self._lock = threading.Lock()
+
+    def font(self, name, text='', bold=False):
+        """
+        Args:
+            name: Şablondaki yazı tipi adı (PDF'teki ad da olabilir)
+            text: Çizilecek metin (tüm karakterleri içeren yazı tipi seçilir)
+            bold: Kalın kesim
+
+        Raises:
+            FontNotFoundError: Hiçbir aday metni çizemiyor
+        """
+        import fitz
+
+        fallbacks = list(self.bold_fallback_paths) + list(self.fallback_paths) if bold else list(self.fallback_paths)
+        for path in [self.find(name, bold)] + fallbacks:
+            if not path or not os.path.exists(path):
+                continue
+            with self._lock:
+                font = self._fonts.get(path)
+                if font is None:
+                    font = self._fonts[path] = fitz.Font(fontfile=path)
+            if all(font.has_glyph(ord(char)) for char in text if not char.isspace()):
+                return font
+        raise FontNotFoundError(f'"{name}" veya yedek yazı tipleri bulunamadı / karakterler eksik')
+
+    def find(self, name, bold=False):
+        """Yazı tipi dosyasının yolu (yoksa None)"""
+        if self._index is None:
+            index = {}
+            for font_dir in self.font_dirs:
+                if not Path(font_dir).is_dir():
+                    continue
+                for path in sorted(Path(font_dir).rglob('*')):
+                    if path.suffix.lower() in ('.ttf', '.otf'):
+                        index.setdefault(normalize_font_name(path.stem), str(path))
+            self._index = index
+
+        base = normalize_font_name(name or '')
+        for family in (base, SUBSTITUTES.get(base.replace('bold', ''))):
+            if not family:
+                continue
+            names = [family] if family.endswith('bold') else (
+                [family + 'bold', family + 'b'] if bold else [family, family + 'regular']
+            )
+            for candidate in names:
+                if candidate in self._index:
+                    return self._index[candidate]
+        return None
+
+
+def wrap_text(font, text, size, width):
+    """
+    Metni kelime kelime satırlara böl (satır sonları korunur).
+
+    Returns:
+        list: Satırlar; tek bir kelime bile sığmıyorsa None
+    """
+    lines = []
+    for paragraph in str(text).split('\n'):
+        current = ''
+        for word in paragraph.split():
+            candidate = f'{current} {word}' if current else word
+            if font.text_length(candidate, fontsize=size) <= width:
+                current = candidate
+            elif font.text_length(word, fontsize=size) > width:
+                return None
+            else:
+                lines.append(current)
+                current = word
+        lines.append(current)
+    return lines
+
+
+_resolver = None
+
+
+def get_font_resolver():
+    """Süreç genelinde paylaşılan çözümleyici"""
+    global _resolver
+    if _resolver is None:
+        _resolver = FontResolver()
+    return _resolver
@@ -0,0 +1,565 @@
+"""
+Sabit düzenli formlar için PDF overlay hızlı yolu
+
+Kullanıcı Yetkilendirme Formu'nda sadece E6-E9 hücreleri, Yetkilendirme
+Taahhütnamesi'nde ise iki ". . ." alanı ile tarih değişir. Bu şablonlar
+bir kez işaretçi metinlerle doldurulup PDF'e çevrilir; işaretçilerin
+konumu, yazı boyutu, rengi ve yazı tipi kaydedilip PDF'ten silinir.
+Sonraki isteklerde LibreOffice çağrılmaz, değerler önbellekteki sayfanın
+üzerine yazılır.
+
+Metni akan (paragrafı yeniden dizilen) şablonlar eski yoldan devam eder.
+Bir değer ayrılan alana en küçük yazı boyutunda bile sığmazsa render()
+None döner ve çağıran taraf normal doldur + çevir yoluna düşer.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+import config
+import document_handler
+import document_manifests
+import docx_templates
+import fill_plans
+import xlsx_patch
+from pdf_fonts import FontNotFoundError, get_font_resolver, wrap_text
+
+logger = logging.getLogger(__name__)
+
+# Önbellek biçimi veya işaretçiler değişirse artırılır (eski önbellek yeniden oluşturulur)
+LAYOUT_VERSION = 1
+
+# Çok satırlı alanlarda satır yüksekliği (yazı boyutunun katı)
+LINE_HEIGHT = 1.15
+
+# Hücre kenarlığı ile yazı arasındaki boşluk (pt)
+CELL_PADDING = 1.5
+
+# Doldurma kodu (sayfa kenar boşlukları, yazı boyutları, işaretçi eşleme) değişirse yerleşim de değişir
+FILL_MODULES = (document_handler, document_manifests, fill_plans, docx_templates, xlsx_patch)
+
+# PyMuPDF thread güvenli değil; overlay işlemleri sırayla yapılır (her biri birkaç ms)
+_fitz_lock = threading.Lock()
+
+
+class OverlayError(Exception):
+    """Overlay kullanılamıyor veya değer alana sığmıyor"""
+
+
+class OverlayField:
+    """
+    Args:
+        name: Alan adı (değer sözlüğündeki anahtar)
+        sentinel: Şablon PDF'e çevrilirken alana yazılan işaretçi metin.
+            Satır içi alanlarda işaretçinin genişliği değere ayrılan yerdir.
+        cell: Alan bir Excel hücresi mi? (kutu hücre kenarlıklarından bulunur,
+            uzun değerler hücre içinde alt satıra kaydırılabilir)
+        required: Değer boşsa overlay kullanılmaz (şablon eski yoldan doldurulur)
+    """
+
+    def __init__(self, name, sentinel, cell=False, required=False):
+        self.name = name
+        self.sentinel = sentinel
+        self.cell = cell
+        self.required = required
+
+
+class OverlayForm:
+    """
+    Args:
+        name: Form adı
+        template: gerek/ altındaki şablon dosyası
+        output_prefix: Çıktı PDF adının başı
+        fields: OverlayField listesi
+        render_source: callable(document_handler, sentinels, output_path) -> dosya yolu
+        values: callable(*doldurma argümanları) -> {alan adı: değer}
+    """
+
+    def __init__(self, name, template, output_prefix, fields, render_source, values):
+        self.name = name
+        self.template = template
+        self.output_prefix = output_prefix
+        self.fields = fields
+        self.render_source = render_source
+        self.values = values
+
+    @property
+    def suffix(self):
+        return Path(self.template).suffix
+
+
+def _kullanici_formu_source(handler, sentinels, output_path):
+    tax_data = {
+        'company_name': sentinels['company_name'],
+        'tax_number': sentinels['tax_number'],
+        'address': sentinels['address'],
+    }
+    return handler.fill_kullanici_yetkilendirme_formu(tax_data, sentinels['email'], output_path)
+
+
+def _kullanici_formu_values(tax_data, email):
+    return {
+        'company_name': tax_data.get('company_name', ''),
+        'tax_number': tax_data.get('tax_number', ''),
+        'address': tax_data.get('address', ''),
+        'email': email,
+    }
+
+
+def _taahhutname_source(handler, sentinels, output_path):
+    tax_data = {'tax_number': sentinels['tax_number'], 'company_name': sentinels['company_name']}
+    return handler.fill_yetkilendirme_taahhutnamesi(tax_data, output_path, current_date=sentinels['date'])
+
+
+def _taahhutname_values(tax_data):
+    return {
+        'tax_number': tax_data.get('tax_number', ''),
+        'company_name': tax_data.get('company_name', ''),
+        'date': datetime.now().strftime('%d/%m/%Y'),
+    }
+
+
+FORMS = {
+    form.name: form
+    for form in (
+        OverlayForm(
+            'kullanici_yetkilendirme_formu', 'Kullanıcı Yetkilendirme Formu.xlsx', 'Kullanici_Yetkilendirme_Formu',
+            [
+                OverlayField('company_name', '@@UNVAN@@', cell=True),
+                OverlayField('tax_number', '@@VKN@@', cell=True),
+                OverlayField('address', '@@ADRES@@', cell=True),
+                OverlayField('email', '@@EPOSTA@@', cell=True),
+            ],
+            _kullanici_formu_source, _kullanici_formu_values,
+        ),
+        OverlayForm(
+            'yetkilendirme_taahhutnamesi', 'YetkilendirmeTaahhutname.docx', 'Yetkilendirme_Taahhutnamesi',
+            [
+                # Rakamlar eşit genişlikte: 11 hane T.C. kimlik / 10 hane vergi no'ya yetecek yer
+                OverlayField('tax_number', '00000000000', required=True),
+                # Unvan satır içinde; işaretçi kadar yer ayrılır, sığmazsa eski yol
+                OverlayField('company_name', 'X' * config.OVERLAY_NAME_WIDTH, required=True),
+                OverlayField('date', '00/00/0000', required=True),
+            ],
+            _taahhutname_source, _taahhutname_values,
+        ),
+    )
+}
+
+
+def _manifest_digest(name):
+    """Formun manifestinin özeti (işaretçi, hücre veya biçim değişince önbellek geçersiz olur)"""
+    manifest = document_manifests.MANIFESTS.get(name)
+    return hashlib.sha256(repr(manifest).encode('utf-8')).hexdigest()[:16]
+
+
+class _Prepared:
+    """Önbellekteki temel PDF ve alan yerleşimleri"""
+
+    def __init__(self, key, base_pdf, placements):
+        self.key = key
+        self.base_pdf = base_pdf
+        self.placements = placements
+
+
+class OverlayEngine:
+    """
+    Form başına temel PDF'i hazırlar (diskte ve bellekte önbelleklenir) ve
+    değerleri üzerine yazarak son PDF'i üretir. Önbellek şablon dosyası,
+    formun manifesti veya doldurma kodu değişince yeniden oluşturulur.
+    """
+
+    def __init__(self, cache_dir=None, convert=None, min_font_size=None):
+        """
+        Args:
+            cache_dir: Temel PDF'lerin saklanacağı klasör
+            convert: callable(kaynak, pdf) -> pdf yolu veya None (varsayılan: dönüştürücü kaydı)
+            min_font_size: Sığmayan değerler en fazla bu boyuta kadar küçültülür
+        """
+        self.cache_dir = Path(cache_dir or config.OVERLAY_CACHE_DIR)
+        self.min_font_size = min_font_size or config.OVERLAY_MIN_FONT_SIZE
+        self.templates_dir = Path('gerek')
+        self._convert = convert
+
+        self._prepared = {}
+        self._errors = {}
+        self._failed_at = {}
+        self._locks = {name: threading.Lock() for name in FORMS}
+        self.renders = 0
+        self.fallbacks = 0
+
+    def prepare(self):
+        """Tüm formların temel PDF'ini hazırla (ısınma için; hatalar sadece loglanır)"""
+        for name in FORMS:
+            try:
+                self._load(FORMS[name])
+            except Exception as e:
+                logger.warning(f'⚠️ {name} için overlay hazırlanamadı, normal yol kullanılacak: {e}')
+        return self
+
+    def render(self, form_name, *args):
+        """
+        Formu overlay ile PDF olarak oluştur.
+
+        Args:
+            form_name: FORMS anahtarı
+            *args: Formun doldurma fonksiyonuna verilen argümanlar
+
+        Returns:
+            str: PDF yolu veya None (normal doldur + çevir yolu kullanılmalı)
+        """
+        form = FORMS[form_name]
+        started = time.perf_counter()
+        try:
+            prepared = self._load(form)
+            values = form.values(*args)
+            output_path = Path(config.OUTPUT_DIR) / f'{form.output_prefix}_{document_handler.unique_timestamp()}.pdf'
+            self._stamp(form, prepared, values, output_path)
+        except OverlayError as e:
+            self.fallbacks += 1
+            logger.info(f'📄 {form_name} overlay ile oluşturulamadı, normal yola geçiliyor: {e}')
+            return None
+        except Exception as e:
+            self.fallbacks += 1
+            logger.warning(f'⚠️ {form_name} overlay hatası, normal yola geçiliyor: {e}')
+            return None
+        self.renders += 1
+        logger.info(f'⚡ {form_name} overlay ile oluşturuldu ({(time.perf_counter() - started) * 1000:.0f} ms)')
+        return str(output_path)
+
+    def diagnostics(self):
+        return {
+            'ready': sorted(self._prepared),
+            'errors': dict(self._errors),
+            'renders': self.renders,
+            'fallbacks': self.fallbacks,
+        }
+
+    # --- Hazırlık -------------------------------------------------------
+
+    def _cache_key(self, form):
+        template = self.templates_dir / form.template
+        if not template.exists():
+            raise OverlayError(f'şablon bulunamadı: {template}')
+        stat = template.stat()
+        code = '-'.join(str(Path(module.__file__).stat().st_mtime_ns) for module in FILL_MODULES)
+        return f'{LAYOUT_VERSION}:{stat.st_size}:{stat.st_mtime_ns}:{code}:{_manifest_digest(form.name)}:{config.OVERLAY_NAME_WIDTH}'
+
+    def _load(self, form):
+        key = self._cache_key(form)
+        prepared = self._prepared.get(form.name)
+        if prepared is not None and prepared.key == key:
+            return prepared
+
+        with self._locks[form.name]:
+            prepared = self._prepared.get(form.name)
+            if prepared is not None and prepared.key == key:
+                return prepared
+            # Hazırlık başarısız olduysa her istekte yeniden denenmez (ör: dönüştürücü yok)
+            failed = self._failed_at.get(form.name)
+            if failed and failed[0] == key and time.monotonic() - failed[1] < config.CONVERTER_RECOVERY_TIMEOUT:
+                raise OverlayError(self._errors[form.name])
+            try:
+                prepared = self._read_cache(form, key) or self._build(form, key)
+            except Exception as e:
+                self._errors[form.name] = str(e)
+                self._failed_at[form.name] = (key, time.monotonic())
+                raise
+            self._errors.pop(form.name, None)
+            self._failed_at.pop(form.name, None)
+            self._prepared[form.name] = prepared
+            return prepared
+
+    def _read_cache(self, form, key):
+        meta_path = self.cache_dir / f'{form.name}.json'
+        pdf_path = self.cache_dir / f'{form.name}.pdf'
+        try:
+            meta = json.loads(meta_path.read_text(encoding='utf-8'))
+            if meta.get('key') != key:
+                return None
+            return _Prepared(key, pdf_path.read_bytes(), meta['placements'])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _build(self, form, key):
+        """Şablonu işaretçilerle doldur, PDF'e çevir, işaretçileri bulup sil"""
+        import fitz
+
+        started = time.perf_counter()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        work_dir = Path(tempfile.mkdtemp(prefix=f'{form.name}_', dir=self.cache_dir))
+        try:
+            sentinels = {field.name: field.sentinel for field in form.fields}
+            source = form.render_source(document_handler.DocumentHandler(), sentinels, str(work_dir / f'{form.name}{form.suffix}'))
+            if not source:
+                raise OverlayError('şablon işaretçilerle doldurulamadı')
+            pdf_path = self._convert_source(source, work_dir / f'{form.name}.pdf')
+            if not pdf_path:
+                raise OverlayError('şablon PDF\'e çevrilemedi')
+
+            with _fitz_lock:
+                doc = fitz.open(pdf_path)
+                try:
+                    placements = _locate(doc, form)
+                    _redact(doc, placements)
+                    base_pdf = doc.tobytes(garbage=3, deflate=True)
+                finally:
+                    doc.close()
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        # Önce PDF, sonra anahtarı içeren JSON yazılır; yarım kalan yazım geçersiz sayılır
+        _write_atomic(self.cache_dir / f'{form.name}.pdf', base_pdf)
+        meta = {'key': key, 'placements': placements}
+        _write_atomic(self.cache_dir / f'{form.name}.json', json.dumps(meta, ensure_ascii=False, indent=1).encode('utf-8'))
+        logger.info(
+            f'📄 {form.name} overlay şablonu hazırlandı: {len(placements)} alan '
+            f'({time.perf_counter() - started:.2f} sn)'
+        )
+        return _Prepared(key, base_pdf, placements)
+
+    def _convert_source(self, source, pdf_path):
+        if self._convert is not None:
+            return self._convert(source, pdf_path)
+        from converter_backends import get_registry
+        return get_registry().convert(source, pdf_path)
+
+    # --- Yazma ------------------------------------------------------------
+
+    def _stamp(self, form, prepared, values, output_path):
+        import fitz
+
+        fields = {field.name: field for field in form.fields}
+        for name, field in fields.items():
+            if field.required and not str(values.get(name) or '').strip():
+                raise OverlayError(f'{name} boş')
+
+        with _fitz_lock:
+            # Önce tüm alanlar yerleştirilir; biri sığmazsa hiçbir şey yazılmadan vazgeçilir
+            writes = []
+            for placement in prepared.placements:
+                field = fields[placement['field']]
+                text = str(values.get(field.name) or '').strip()
+                if not field.cell:
+                    # Satır içi alanlar tek satırdır
+                    text = ' '.join(text.split())
+                if not text:
+                    continue
+                try:
+                    font = get_font_resolver().font(placement['font'], text)
+                except FontNotFoundError as e:
+                    raise OverlayError(str(e))
+                size, lines = self._fit(font, text, placement, field)
+                writes.append((placement, font, size, lines))
+
+            doc = fitz.open('pdf', prepared.base_pdf)
+            try:
+                for placement, font, size, lines in writes:
+                    page = doc[placement['page']]
+                    writer = fitz.TextWriter(page.rect)
+                    for origin, line in _line_origins(font, size, lines, placement):
+                        writer.append(origin, line, font=font, fontsize=size)
+                    writer.write_text(page, color=fitz.sRGB_to_pdf(placement['color']))
+                doc.save(str(output_path), garbage=1, deflate=True)
+            finally:
+                doc.close()
+
+    def _fit(self, font, text, placement, field):
+        """Değeri alana sığdır: gerekirse küçült, hücrelerde alt satıra kaydır"""
+        box = placement['box']
+        width = box[2] - box[0]
+        height = box[3] - box[1]
+        size = placement['size']
+        while size >= self.min_font_size:
+            if '\n' not in text and font.text_length(text, fontsize=size) <= width:
+                return size, [text]
+            if field.cell:
+                lines = wrap_text(font, text, size, width)
+                if lines and len(lines) * size * LINE_HEIGHT <= height:
+                    return size, lines
+            size -= 0.5
+        raise OverlayError(f'{field.name} alana sığmıyor ({len(text)} karakter)')
+
+
+def _locate(doc, form):
+    """İşaretçilerin PDF'teki yerini, boyutunu, rengini ve yazı tipini bul"""
+    import fitz
+
+    placements = []
+    for page in doc:
+        cell_lines = None
+        for block in page.get_text('rawdict')['blocks']:
+            for line in block.get('lines', ()):
+                for span in line['spans']:
+                    chars = span['chars']
+                    text = ''.join(char['c'] for char in chars)
+                    for field in form.fields:
+                        start = text.find(field.sentinel)
+                        while start != -1:
+                            found = chars[start:start + len(field.sentinel)]
+                            rect = fitz.Rect(found[0]['bbox'])
+                            for char in found[1:]:
+                                rect |= char['bbox']
+                            if field.cell:
+                                if cell_lines is None:
+                                    cell_lines = _ruling_lines(page)
+                                box = _cell_box(page, rect, cell_lines)
+                            else:
+                                box = rect
+                            placements.append({
+                                'field': field.name,
+                                'page': page.number,
+                                'origin': list(found[0]['origin']),
+                                'rect': list(rect),
+                                'box': list(box),
+                                'size': round(span['size'], 2),
+                                'color': span['color'],
+                                'font': span['font'],
+                            })
+                            start = text.find(field.sentinel, start + len(field.sentinel))
+
+    missing = {field.name for field in form.fields} - {placement['field'] for placement in placements}
+    if missing:
+        raise OverlayError(f'işaretçiler PDF\'te bulunamadı: {", ".join(sorted(missing))}')
+    return placements
+
+
+def _redact(doc, placements):
+    """İşaretçi metinleri sil (çizgiler ve arka plan korunur)"""
+    import fitz
+
+    pages = set()
+    for placement in placements:
+        page = doc[placement['page']]
+        rect = fitz.Rect(placement['rect'])
+        # Komşu satırlardaki harflere değmesin diye dikeyde biraz daraltılır
+        inset = rect.height * 0.2
+        page.add_redact_annot(fitz.Rect(rect.x0, rect.y0 + inset, rect.x1, rect.y1 - inset), fill=False)
+        pages.add(placement['page'])
+    for number in pages:
+        doc[number].apply_redactions(images=fitz.PDF_REDACT_IMAGE_NONE)
+
+
+def _ruling_lines(page):
+    """Sayfadaki yatay ve dikey çizgiler (hücre kenarlıkları)"""
+    vertical, horizontal = [], []
+
+    def add(x0, y0, x1, y1):
+        if abs(x1 - x0) < 2:
+            vertical.append(((x0 + x1) / 2, min(y0, y1), max(y0, y1)))
+        elif abs(y1 - y0) < 2:
+            horizontal.append(((y0 + y1) / 2, min(x0, x1), max(x0, x1)))
+
+    for drawing in page.get_drawings():
+        for item in drawing['items']:
+            if item[0] == 'l':
+                add(item[1].x, item[1].y, item[2].x, item[2].y)
+            elif item[0] == 're':
+                rect = item[1]
+                if rect.width < 2 or rect.height < 2:
+                    add(rect.x0, rect.y0, rect.x1, rect.y1)
+                else:
+                    add(rect.x0, rect.y0, rect.x0, rect.y1)
+                    add(rect.x1, rect.y0, rect.x1, rect.y1)
+                    add(rect.x0, rect.y0, rect.x1, rect.y0)
+                    add(rect.x0, rect.y1, rect.x1, rect.y1)
+    return vertical, horizontal
+
+
+def _cell_box(page, rect, lines):
+    """
+    İşaretçiyi çevreleyen hücre kenarlıkları. Kenarlık bulunamazsa yukarı/aşağı
+    işaretçinin kendi sınırı, sağda sayfa kenar boşluğu kullanılır.
+    """
+    import fitz
+
+    vertical, horizontal = lines
+    mid_x = (rect.x0 + rect.x1) / 2
+    mid_y = (rect.y0 + rect.y1) / 2
+    right = min((x for x, y0, y1 in vertical if x >= rect.x1 - 1 and y0 <= mid_y <= y1), default=None)
+    top = max((y for y, x0, x1 in horizontal if y <= rect.y0 + 1 and x0 <= mid_x <= x1), default=None)
+    bottom = min((y for y, x0, x1 in horizontal if y >= rect.y1 - 1 and x0 <= mid_x <= x1), default=None)
+    return fitz.Rect(
+        rect.x0,
+        top + CELL_PADDING if top is not None else rect.y0,
+        right - CELL_PADDING if right is not None else page.rect.x1 - rect.x0,
+        bottom - CELL_PADDING if bottom is not None else rect.y1,
+    )
+
+
+def _line_origins(font, size, lines, placement):
+    """Tek satır işaretçinin taban çizgisine, çok satır hücrede dikey ortalanır"""
+    if len(lines) == 1:
+        yield placement['origin'], lines[0]
+        return
+    x0, y0, _, y1 = placement['box']
+    line_height = size * LINE_HEIGHT
+    top = y0 + max(0, (y1 - y0) - len(lines) * line_height) / 2
+    for number, line in enumerate(lines):
+        yield (x0, top + number * line_height + size * font.ascender), line
+
+
+def _write_atomic(path, data):
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_overlay_engine():
+    """Süreç genelinde paylaşılan overlay motoru (PDF_OVERLAY_ENABLED kapalıysa None)"""
+    global _engine
+    if not config.PDF_OVERLAY_ENABLED:
+        return None
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = OverlayEngine()
+    return _engine
+
+
+if __name__ == '__main__':
+    # Karşılaştırma: python pdf_overlay.py [tekrar]
+    import sys
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    sample_tax = {
+        'company_name': 'ÖRNEK YAZILIM SANAYİ VE TİCARET LTD ŞTİ',
+        'tax_number': '1234567890',
+        'address': 'ATATÜRK MAH. CUMHURİYET CAD. NO: 1\nÇANKAYA / ANKARA',
+    }
+    samples = {
+        'kullanici_yetkilendirme_formu': (sample_tax, 'info@ornek.com.tr'),
+        'yetkilendirme_taahhutnamesi': (sample_tax,),
+    }
+
+    engine = OverlayEngine().prepare()
+    handler = document_handler.DocumentHandler()
+    for name, args in samples.items():
+        started = time.perf_counter()
+        paths = [engine.render(name, *args) for _ in range(repeat)]
+        overlay_seconds = (time.perf_counter() - started) / repeat
+        if not all(paths):
+            print(f'❌ {name}: overlay kullanılamadı ({engine.diagnostics()["errors"].get(name) or "ayrıntı yukarıdaki logda"})')
+            continue
+
+        fill = handler.fill_kullanici_yetkilendirme_formu if name == 'kullanici_yetkilendirme_formu' else handler.fill_yetkilendirme_taahhutnamesi
+        started = time.perf_counter()
+        source = fill(*args)
+        pdf = handler.convert_to_pdf(source) if source else None
+        normal_seconds = time.perf_counter() - started
+        print(f'📊 {name}: overlay {overlay_seconds * 1000:.1f} ms, doldur + çevir {normal_seconds * 1000:.0f} ms'
+              f'{"" if pdf else " (PDF oluşturulamadı)"}')
+        for path in paths + [source, pdf]:
+            if path:
+                Path(path).unlink(missing_ok=True)
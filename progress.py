@@ -0,0 +1,78 @@
+"""
+Tek mesaj üzerinde canlı ilerleme bildirimi
+"""
+import asyncio
+import logging
+from telegram.error import BadRequest, TelegramError
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressReporter:
+    """
+    İşlem adımlarını ayrı ayrı mesajlar yerine tek bir durum mesajını
+    düzenleyerek gösterir.
+
+    update() beklemez: metni kaydeder ve arka planda gönderir. Düzenlemeler
+    min_interval saniyede bir ile sınırlıdır; arada gelen ara durumlar
+    atlanır, her zaman en güncel metin gösterilir. finish() son metnin
+    ekrana yazılmasını bekler.
+    """
+
+    def __init__(self, reply_to, min_interval=None, **send_kwargs):
+        """
+        Args:
+            reply_to: Durum mesajının cevap olarak gönderileceği Message
+            min_interval: İki düzenleme arasındaki en kısa süre (saniye)
+            send_kwargs: İlk mesaj için ek reply_text argümanları (ör: reply_markup)
+        """
+        self._reply_to = reply_to
+        self._send_kwargs = send_kwargs
+        self.min_interval = config.PROGRESS_MIN_INTERVAL if min_interval is None else min_interval
+        self.message = None
+
+        self._text = None  # Gösterilmesi istenen son metin
+        self._parse_mode = None
+        self._shown = None  # Ekrandaki metin
+        self._last_sent = 0.0
+        self._task = None
+
+    def update(self, text, parse_mode=None):
+        """Durum metnini değiştir (bloklamaz)"""
+        self._text = text
+        self._parse_mode = parse_mode
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush())
+
+    async def finish(self, text=None, parse_mode=None):
+        """Son durumu yaz ve gönderimin bitmesini bekle"""
+        if text is not None:
+            self.update(text, parse_mode)
+        if self._task is not None:
+            await self._task
+
+    async def _flush(self):
+        loop = asyncio.get_running_loop()
+        while self._text != self._shown:
+            if self.message is not None:
+                wait = self._last_sent + self.min_interval - loop.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+
+            text, parse_mode = self._text, self._parse_mode
+            try:
+                if self.message is None:
+                    self.message = await self._reply_to.reply_text(
+                        text, parse_mode=parse_mode, **self._send_kwargs
+                    )
+                else:
+                    await self.message.edit_text(text, parse_mode=parse_mode)
+            except BadRequest as e:
+                if 'not modified' not in str(e).lower():
+                    logger.warning(f'⚠️ İlerleme mesajı güncellenemedi: {e}')
+            except TelegramError as e:
+                logger.warning(f'⚠️ İlerleme mesajı gönderilemedi: {e}')
+
+            self._shown = text
+            self._last_sent = loop.time()
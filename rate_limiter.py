@@ -0,0 +1,242 @@
+"""
+Giden Bot API istekleri için hız sınırlayıcı (sohbet + global token bucket, öncelik, RetryAfter)
+"""
+import asyncio
+import contextlib
+import itertools
+import logging
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+import config
+
+logger = logging.getLogger(__name__)
+
+# Öncelikler (küçük sayı önce gider)
+PRIORITY_DOCUMENT = 0  # Belge teslimi
+PRIORITY_MESSAGE = 1  # Normal mesajlar / sorular
+PRIORITY_PROGRESS = 2  # İlerleme düzenlemeleri, "yazıyor..." vb.
+
+ENDPOINT_PRIORITIES = {
+    'sendDocument': PRIORITY_DOCUMENT,
+    'sendMediaGroup': PRIORITY_DOCUMENT,
+    'sendPhoto': PRIORITY_DOCUMENT,
+    'editMessageText': PRIORITY_PROGRESS,
+    'editMessageCaption': PRIORITY_PROGRESS,
+    'deleteMessage': PRIORITY_PROGRESS,
+    'sendChatAction': PRIORITY_PROGRESS,
+}
+
+
+class TokenBucket:
+    """Saniyede rate jeton dolan, en fazla capacity jeton tutan kova"""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate, capacity, now):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def wait_time(self, now):
+        """Bir jeton için beklenmesi gereken süre (0 = hemen)"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self):
+        self.tokens -= 1
+
+    def is_full(self, now):
+        return self.tokens + (now - self.updated) * self.rate >= self.capacity
+
+
+class _Waiter:
+    __slots__ = ('priority', 'seq', 'chat_id', 'future', 'enqueued_at')
+
+    def __init__(self, priority, seq, chat_id, future, enqueued_at):
+        self.priority = priority
+        self.seq = seq
+        self.chat_id = chat_id
+        self.future = future
+        self.enqueued_at = enqueued_at
+
+    def sort_key(self):
+        return (self.priority, self.seq)
+
+
+class OutboundRateLimiter(BaseRateLimiter):
+    """
+    Tüm giden istekler tek bir kuyruktan geçer.
+
+    - Global ve sohbet başına token bucket (gruplar için dakikalık sınır)
+    - Öncelik: belge teslimi > normal mesaj > ilerleme düzenlemeleri
+      (rate_limit_args ile çağrı bazında öncelik verilebilir)
+    - RetryAfter gelirse tüm gönderimler retry_after süresince durur,
+      istek max_retries kadar tekrar denenir
+    - metrics(): kısıtlama gecikmesi istatistikleri
+
+    chat_id içermeyen istekler (getUpdates, getMe, setWebhook...) sınırlanmaz.
+    """
+
+    def __init__(self, global_rate=None, chat_rate=None, chat_burst=None, group_rate_per_min=None, max_retries=None):
+        self.global_rate = global_rate or config.RATE_LIMIT_GLOBAL_PER_SEC
+        self.chat_rate = chat_rate or config.RATE_LIMIT_CHAT_PER_SEC
+        self.chat_burst = chat_burst or config.RATE_LIMIT_CHAT_BURST
+        self.group_rate = (group_rate_per_min or config.RATE_LIMIT_GROUP_PER_MIN) / 60
+        self.max_retries = config.RATE_LIMIT_MAX_RETRIES if max_retries is None else max_retries
+
+        self._queue = []
+        self._seq = itertools.count()
+        self._global = None
+        self._chats = {}
+        self._paused_until = 0.0
+        self._wakeup = None
+        self._dispatcher = None
+
+        self._stats = {
+            'requests': 0,
+            'throttled': 0,
+            'total_delay': 0.0,
+            'max_delay': 0.0,
+            'retry_after_hits': 0,
+            'retry_after_seconds': 0.0,
+            'by_priority': {PRIORITY_DOCUMENT: 0, PRIORITY_MESSAGE: 0, PRIORITY_PROGRESS: 0},
+        }
+
+    async def initialize(self):
+        loop = asyncio.get_running_loop()
+        self._global = TokenBucket(self.global_rate, self.global_rate, loop.time())
+        self._wakeup = asyncio.Event()
+
+    async def shutdown(self):
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            self._dispatcher = None
+        for waiter in self._queue:
+            if not waiter.future.done():
+                waiter.future.cancel()
+        self._queue.clear()
+
+    def metrics(self):
+        """Kısıtlama istatistikleri (diagnostik için)"""
+        stats = dict(self._stats)
+        stats['by_priority'] = dict(self._stats['by_priority'])
+        stats['avg_delay'] = stats['total_delay'] / stats['requests'] if stats['requests'] else 0.0
+        stats['queued'] = len(self._queue)
+        stats['tracked_chats'] = len(self._chats)
+        return stats
+
+    async def process_request(self, callback, args, kwargs, endpoint, data, rate_limit_args):
+        chat_id = data.get('chat_id')
+        if chat_id is None:
+            return await callback(*args, **kwargs)
+        # Sayısal string id'ler int'e çevrilir (@kanal adları string kalır)
+        with contextlib.suppress(ValueError, TypeError):
+            chat_id = int(chat_id)
+
+        if isinstance(rate_limit_args, int):
+            priority = rate_limit_args
+        else:
+            priority = ENDPOINT_PRIORITIES.get(endpoint, PRIORITY_MESSAGE)
+
+        for attempt in range(self.max_retries + 1):
+            await self._acquire(chat_id, priority)
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as exc:
+                retry_after = exc.retry_after
+                if hasattr(retry_after, 'total_seconds'):
+                    retry_after = retry_after.total_seconds()
+                self._stats['retry_after_hits'] += 1
+                self._stats['retry_after_seconds'] += retry_after
+
+                if attempt == self.max_retries:
+                    logger.error(f'❌ Flood limiti: {endpoint} {self.max_retries} denemeden sonra gönderilemedi')
+                    raise
+
+                # Telegram hangi sınırın aşıldığını söylemez, tüm gönderimleri durdur
+                loop = asyncio.get_running_loop()
+                self._paused_until = max(self._paused_until, loop.time() + retry_after + 0.1)
+                self._wakeup.set()
+                logger.warning(f'⏸️ Flood limiti: {endpoint} için {retry_after} sn bekleniyor (deneme {attempt + 1})')
+
+    async def _acquire(self, chat_id, priority):
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(priority, next(self._seq), chat_id, loop.create_future(), loop.time())
+        self._queue.append(waiter)
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        self._wakeup.set()
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter in self._queue:
+                self._queue.remove(waiter)
+            raise
+
+        delay = loop.time() - waiter.enqueued_at
+        self._stats['requests'] += 1
+        self._stats['by_priority'][priority] = self._stats['by_priority'].get(priority, 0) + 1
+        if delay > 0.01:
+            self._stats['throttled'] += 1
+            self._stats['total_delay'] += delay
+            self._stats['max_delay'] = max(self._stats['max_delay'], delay)
+
+    def _chat_bucket(self, chat_id, now):
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            # Negatif id / @kanal: grup veya kanal, dakikalık sınır
+            is_group = isinstance(chat_id, str) or chat_id < 0
+            rate = self.group_rate if is_group else self.chat_rate
+            bucket = self._chats[chat_id] = TokenBucket(rate, self.chat_burst, now)
+        return bucket
+
+    async def _dispatch(self):
+        """Kuyruktaki en öncelikli, sohbet kovası uygun isteğe izin ver"""
+        loop = asyncio.get_running_loop()
+        while self._queue:
+            self._wakeup.clear()
+            now = loop.time()
+
+            if now < self._paused_until:
+                await self._sleep(self._paused_until - now)
+                continue
+
+            wait = self._global.wait_time(now)
+            if wait > 0:
+                await self._sleep(wait)
+                continue
+
+            wait = None
+            for waiter in sorted(self._queue, key=_Waiter.sort_key):
+                if waiter.future.done():
+                    self._queue.remove(waiter)
+                    continue
+                bucket = self._chat_bucket(waiter.chat_id, now)
+                chat_wait = bucket.wait_time(now)
+                if chat_wait == 0:
+                    bucket.consume()
+                    self._global.consume()
+                    self._queue.remove(waiter)
+                    waiter.future.set_result(None)
+                    break
+                wait = chat_wait if wait is None else min(wait, chat_wait)
+            else:
+                if wait is not None:
+                    await self._sleep(wait)
+
+        # Boşta kalan, dolu kovaları unut
+        if len(self._chats) > 1000:
+            now = loop.time()
+            self._chats = {k: v for k, v in self._chats.items() if not v.is_full(now)}
+
+    async def _sleep(self, timeout):
+        """Süre dolana ya da yeni istek gelene kadar bekle"""
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
@@ -0,0 +1,456 @@
+"""
+Excel çalışma sayfasını LibreOffice olmadan doğrudan PDF'e çizer
+
+Doldurulmuş sayfanın sütun genişlikleri, satır yükseklikleri, birleşik
+hücreleri, dolgu/kenarlık/yazı stilleri ve resimleri (logo) PyMuPDF ile
+A4 sayfaya çizilir. Kalem satırları şablondaki kalem satırlarının
+stilleriyle (dönüşümlü) çoğaltılır; sayfaya sığmayınca tablo başlığı
+tekrarlanarak yeni sayfaya geçilir, alt bölüm (toplamlar, imza) son
+kalemden sonra gelir.
+"""
+import logging
+import re
+import time
+import config
+from pdf_fonts import get_font_resolver, wrap_text
+
+logger = logging.getLogger(__name__)
+
+# A4 dikey, create_offer'daki 0.5 inç kenar boşluğu ile
+PAGE_WIDTH = 595.28
+PAGE_HEIGHT = 841.89
+MARGIN = 36
+
+CELL_PADDING = 2
+LINE_HEIGHT = 1.2
+EMU_PER_POINT = 12700
+
+BORDER_WIDTHS = {
+    'hair': 0.25, 'thin': 0.5, 'dotted': 0.5, 'dashed': 0.5, 'dashDot': 0.5, 'dashDotDot': 0.5,
+    'medium': 1.0, 'mediumDashed': 1.0, 'mediumDashDot': 1.0, 'mediumDashDotDot': 1.0, 'slantDashDot': 1.0,
+    'thick': 1.5, 'double': 1.5,
+}
+
+# Tema renk indeksi -> clrScheme adı (Excel 0/1 ve 2/3'ü ters sıralar)
+THEME_ORDER = ('lt1', 'dk1', 'lt2', 'dk2', 'accent1', 'accent2', 'accent3',
+               'accent4', 'accent5', 'accent6', 'hlink', 'folHlink')
+
+
+class SheetLayout:
+    """
+    Sayfanın çizim düzeni: sütun konumları, birleşik hücreler ve tema renkleri.
+
+    Args:
+        ws: openpyxl çalışma sayfası (doldurulmuş)
+        last_col: Çizilecek son sütun (print alanının sağ kenarı)
+        last_row: Çizilecek son satır
+    """
+
+    def __init__(self, ws, last_col, last_row):
+        self.ws = ws
+        self.last_col = last_col
+        self.last_row = last_row
+        self.theme = _theme_colors(ws.parent)
+
+        widths = [_column_points(ws, col) for col in range(1, last_col + 1)]
+        # Sayfa genişliğine sığdır (fitToWidth=1 gibi); yükseklik sayfalara bölünür
+        self.scale = min(1.0, (PAGE_WIDTH - 2 * MARGIN) / sum(widths))
+        self.col_x = [MARGIN]
+        for width in widths:
+            self.col_x.append(self.col_x[-1] + width * self.scale)
+
+        self.merges = {}
+        self.covered = {}
+        for merged in ws.merged_cells.ranges:
+            self.merges[(merged.min_row, merged.min_col)] = merged
+            for row in range(merged.min_row, merged.max_row + 1):
+                for col in range(merged.min_col, merged.max_col + 1):
+                    if (row, col) != (merged.min_row, merged.min_col):
+                        self.covered[(row, col)] = merged
+
+    def row_height(self, row):
+        height = self.ws.row_dimensions[row].height
+        if height is None:
+            height = self.ws.sheet_format.defaultRowHeight or 15
+        return height * self.scale
+
+    def page_breaks(self, item_heights, item_rows, table_header_row=None):
+        """
+        Kalemlerin sayfalara bölünmesi (PDF'te ve Excel sayfa sonlarında aynı kural).
+
+        Args:
+            item_heights: Kalem satırlarının yükseklikleri (ölçeklenmiş)
+            item_rows: (ilk, son) şablondaki kalem satırları
+            table_header_row: Yeni sayfalarda tekrarlanacak tablo başlığı satırı
+
+        Returns:
+            list: Yeni sayfanın başladığı kalem indeksleri; len(item_heights)
+                listedeyse alt bölüm (toplamlar, imza) yeni sayfada başlar
+        """
+        first, last = item_rows
+        bottom = PAGE_HEIGHT - MARGIN
+        header = self.row_height(table_header_row) if table_header_row else 0
+        y = MARGIN + sum(self.row_height(row) for row in range(1, first))
+        breaks = []
+        for index, height in enumerate(item_heights):
+            if y + height > bottom:
+                breaks.append(index)
+                y = MARGIN + header
+            y += height
+        if y + sum(self.row_height(row) for row in range(last + 1, self.last_row + 1)) > bottom:
+            breaks.append(len(item_heights))
+        return breaks
+
+    def color(self, color):
+        """openpyxl rengi -> (r, g, b) 0-1 arası; renk yoksa None"""
+        if color is None:
+            return None
+        if color.type == 'rgb':
+            rgb = color.rgb if isinstance(color.rgb, str) else None
+            if not rgb or rgb == '00000000':
+                return None
+            value = rgb[-6:]
+        elif color.type == 'theme':
+            if color.theme is None or color.theme >= len(THEME_ORDER):
+                return None
+            value = self.theme.get(THEME_ORDER[color.theme])
+            if value is None:
+                return None
+        elif color.type == 'indexed':
+            from openpyxl.styles.colors import COLOR_INDEX
+            if color.indexed is None or color.indexed >= len(COLOR_INDEX) - 2:
+                return None
+            value = COLOR_INDEX[color.indexed][-6:]
+        else:
+            return None
+        rgb = [int(value[i:i + 2], 16) / 255 for i in (0, 2, 4)]
+        tint = color.tint or 0
+        if tint > 0:
+            rgb = [c + (1 - c) * tint for c in rgb]
+        elif tint < 0:
+            rgb = [c * (1 + tint) for c in rgb]
+        return tuple(rgb)
+
+
+class _PageCanvas:
+    """Bir sayfanın çizimlerini toplar: önce dolgu/çizgi, sonra resim, en son yazı"""
+
+    def __init__(self, doc):
+        import fitz
+        self.page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        self.shape = self.page.new_shape()
+        self.images = []
+        self.writers = {}
+        self._fitz = fitz
+
+    def fill(self, rect, color):
+        self.shape.draw_rect(rect)
+        self.shape.finish(color=None, fill=color, width=0)
+
+    def line(self, start, end, color, width):
+        self.shape.draw_line(start, end)
+        self.shape.finish(color=color, width=width)
+
+    def image(self, rect, data):
+        self.images.append((rect, data))
+
+    def text(self, origin, text, font, size, color):
+        writer = self.writers.get(color)
+        if writer is None:
+            writer = self.writers[color] = self._fitz.TextWriter(self.page.rect, color=color)
+        writer.append(origin, text, font=font, fontsize=size)
+
+    def commit(self):
+        self.shape.commit()
+        for rect, data in self.images:
+            self.page.insert_image(rect, stream=data, keep_proportion=False)
+        for writer in self.writers.values():
+            writer.write_text(self.page)
+
+
+class SheetRenderer:
+    """
+    Args:
+        layout: SheetLayout
+        fonts: FontResolver (varsayılan: paylaşılan çözümleyici)
+    """
+
+    def __init__(self, layout, fonts=None):
+        self.layout = layout
+        self.ws = layout.ws
+        self.fonts = fonts or get_font_resolver()
+
+    def render(self, output_path, items=(), table_header_row=None, item_rows=None, item_styles=None):
+        """
+        Sayfayı PDF'e çiz.
+
+        Args:
+            output_path: PDF yolu
+            items: Kalem satırları [{sütun no: değer}, ...]
+            table_header_row: Yeni sayfalarda tekrarlanacak tablo başlığı satırı
+            item_rows: (ilk, son) şablondaki kalem satırları; yerlerine items
+                çizilir. None ise sayfa olduğu gibi çizilir.
+            item_styles: Kalemlere sırayla (dönüşümlü) uygulanacak şablon
+                satırları (varsayılan: item_rows aralığının tümü)
+
+        Returns:
+            int: Sayfa sayısı
+        """
+        import fitz
+
+        started = time.perf_counter()
+        doc = fitz.open()
+        canvas = _PageCanvas(doc)
+        try:
+            if item_rows is None:
+                self._draw_block(canvas, range(1, self.layout.last_row + 1), MARGIN)
+            else:
+                first, last = item_rows
+                styles = list(item_styles or range(first, last + 1))
+                style_rows = [styles[index % len(styles)] for index in range(len(items))]
+                heights = [self._item_height(style_row, values) for style_row, values in zip(style_rows, items)]
+                breaks = set(self.layout.page_breaks(heights, item_rows, table_header_row))
+
+                y = self._draw_block(canvas, range(1, first), MARGIN)
+                for index, values in enumerate(items):
+                    if index in breaks:
+                        canvas.commit()
+                        canvas = _PageCanvas(doc)
+                        y = MARGIN
+                        if table_header_row:
+                            y = self._draw_block(canvas, [table_header_row], y)
+                    self._draw_row(canvas, style_rows[index], y, heights[index], values)
+                    y += heights[index]
+
+                if len(items) in breaks:
+                    canvas.commit()
+                    canvas = _PageCanvas(doc)
+                    y = MARGIN
+                self._draw_block(canvas, range(last + 1, self.layout.last_row + 1), y)
+            canvas.commit()
+
+            pages = len(doc)
+            if pages > 1:
+                self._number_pages(doc)
+            _subset_fonts(doc)
+            doc.save(str(output_path), garbage=3, deflate=True)
+        finally:
+            doc.close()
+        logger.info(f'📄 PDF çizildi: {pages} sayfa, {len(items)} kalem ({(time.perf_counter() - started) * 1000:.0f} ms)')
+        return pages
+
+    def _draw_block(self, canvas, rows, top):
+        """Ardışık şablon satırlarını çiz (blok içindeki birleşik hücreler ve resimler dahil)"""
+        tops = {}
+        y = top
+        for row in rows:
+            tops[row] = (y, self.layout.row_height(row))
+            y += tops[row][1]
+
+        for row, (row_top, height) in tops.items():
+            for col in range(1, self.layout.last_col + 1):
+                merged = self.layout.covered.get((row, col))
+                if merged is not None and merged.min_row in tops:
+                    continue
+                rect = self._cell_rect(row, col, row_top, height, tops)
+                self._draw_cell(canvas, row, col, rect, self.ws.cell(row=row, column=col).value)
+
+        for image in getattr(self.ws, '_images', ()):
+            rect = self._image_rect(image, tops)
+            if rect is not None:
+                canvas.image(rect, image._data())
+        return y
+
+    def _draw_row(self, canvas, style_row, top, height, values):
+        """Kalem satırı: stil şablon satırından, değerler values'tan"""
+        tops = {style_row: (top, height)}
+        for col in range(1, self.layout.last_col + 1):
+            merged = self.layout.covered.get((style_row, col))
+            if merged is not None and merged.min_row == style_row:
+                continue
+            rect = self._cell_rect(style_row, col, top, height, tops)
+            self._draw_cell(canvas, style_row, col, rect, values.get(col))
+
+    def _cell_rect(self, row, col, top, height, tops):
+        import fitz
+
+        col_x = self.layout.col_x
+        merged = self.layout.merges.get((row, col))
+        if merged is not None and merged.max_row in tops:
+            last_col = min(merged.max_col, self.layout.last_col)
+            bottom_top, bottom_height = tops[merged.max_row]
+            return fitz.Rect(col_x[col - 1], top, col_x[last_col], bottom_top + bottom_height)
+        return fitz.Rect(col_x[col - 1], top, col_x[col], top + height)
+
+    def _item_height(self, style_row, values):
+        """Kaydırılan uzun açıklamalar için satırı büyüt"""
+        height = self.layout.row_height(style_row)
+        for col, value in values.items():
+            if value in (None, ''):
+                continue
+            cell = self.ws.cell(row=style_row, column=col)
+            if not cell.alignment.wrap_text:
+                continue
+            rect = self._cell_rect(style_row, col, 0, height, {style_row: (0, height)})
+            text = _display_value(value)
+            font, size = self._font(cell, text)
+            lines = wrap_text(font, text, size, rect.width - 2 * CELL_PADDING) or text.split('\n')
+            height = max(height, len(lines) * size * LINE_HEIGHT + 2 * CELL_PADDING)
+        return height
+
+    def _draw_cell(self, canvas, row, col, rect, value):
+        cell = self.ws.cell(row=row, column=col)
+        merged = self.layout.merges.get((row, col))
+        last_row = merged.max_row if merged is not None else row
+        last_col = min(merged.max_col, self.layout.last_col) if merged is not None else col
+
+        if cell.fill is not None and cell.fill.fill_type == 'solid':
+            color = self.layout.color(cell.fill.fgColor)
+            if color is not None:
+                canvas.fill(rect, color)
+
+        # Birleşik hücrede her kenar o kenardaki hücrenin kenarlığından alınır
+        edges = (
+            (self.ws.cell(row=row, column=col).border.left, rect.tl, rect.bl),
+            (self.ws.cell(row=row, column=last_col).border.right, rect.tr, rect.br),
+            (self.ws.cell(row=row, column=col).border.top, rect.tl, rect.tr),
+            (self.ws.cell(row=last_row, column=col).border.bottom, rect.bl, rect.br),
+        )
+        for side, start, end in edges:
+            if side is not None and side.style:
+                width = BORDER_WIDTHS.get(side.style, 0.5) * self.layout.scale
+                canvas.line(start, end, self.layout.color(side.color) or (0, 0, 0), width)
+
+        if value is not None and str(value) != '':
+            self._draw_text(canvas, cell, rect, value)
+
+    def _font(self, cell, text):
+        style = cell.font
+        size = (style.sz or 11) * self.layout.scale
+        return self.fonts.font(style.name, text, bold=bool(style.b)), size
+
+    def _draw_text(self, canvas, cell, rect, value):
+        text = _display_value(value)
+        font, size = self._font(cell, text)
+        color = self.layout.color(cell.font.color) or (0, 0, 0)
+        alignment = cell.alignment
+
+        inner_x0 = rect.x0 + CELL_PADDING
+        inner_x1 = rect.x1 - CELL_PADDING
+        if alignment.wrap_text:
+            lines = wrap_text(font, text, size, inner_x1 - inner_x0) or text.split('\n')
+        else:
+            lines = [' '.join(text.split())]
+
+        line_height = size * LINE_HEIGHT
+        block_height = len(lines) * line_height
+        vertical = alignment.vertical or 'bottom'
+        if vertical == 'top':
+            y = rect.y0 + CELL_PADDING
+        elif vertical in ('center', 'justify', 'distributed'):
+            y = rect.y0 + (rect.height - block_height) / 2
+        else:
+            y = rect.y1 - CELL_PADDING - block_height
+
+        horizontal = alignment.horizontal or ('right' if isinstance(value, (int, float)) else 'left')
+        indent = (alignment.indent or 0) * 7.5 * self.layout.scale
+        glyph_height = (font.ascender - font.descender) * size
+        for number, line in enumerate(lines):
+            width = font.text_length(line, fontsize=size)
+            if horizontal in ('center', 'centerContinuous', 'distributed'):
+                x = inner_x0 + (inner_x1 - inner_x0 - width) / 2
+            elif horizontal == 'right':
+                x = inner_x1 - width - indent
+            else:
+                x = inner_x0 + indent
+            baseline = y + number * line_height + (line_height - glyph_height) / 2 + font.ascender * size
+            canvas.text((x, baseline), line, font, size, color)
+
+    def _image_rect(self, image, tops):
+        """Hücreye bağlı resmin konumu (bağlandığı satırlar bu blokta değilse None)"""
+        import fitz
+
+        anchor = image.anchor
+        start = getattr(anchor, '_from', None)
+        if start is None or start.row + 1 not in tops:
+            return None
+        scale = self.layout.scale
+        x0 = self.layout.col_x[min(start.col, self.layout.last_col)] + start.colOff / EMU_PER_POINT * scale
+        y0 = tops[start.row + 1][0] + start.rowOff / EMU_PER_POINT * scale
+        end = getattr(anchor, 'to', None)
+        if end is not None and end.row + 1 in tops:
+            x1 = self.layout.col_x[min(end.col, self.layout.last_col)] + end.colOff / EMU_PER_POINT * scale
+            y1 = tops[end.row + 1][0] + end.rowOff / EMU_PER_POINT * scale
+        else:
+            # Tek hücreye bağlı: piksel boyutu (96 dpi)
+            x1 = x0 + image.width * 0.75 * scale
+            y1 = y0 + image.height * 0.75 * scale
+        return fitz.Rect(x0, y0, x1, y1)
+
+    def _number_pages(self, doc):
+        """Birden fazla sayfada sağ alta 'Sayfa 1/2' yazılır"""
+        import fitz
+
+        font = self.fonts.font(None, 'Sayfa 0123456789/')
+        total = len(doc)
+        size = 7
+        for page in doc:
+            text = f'Sayfa {page.number + 1}/{total}'
+            writer = fitz.TextWriter(page.rect, color=(0.4, 0.4, 0.4))
+            x = PAGE_WIDTH - MARGIN - font.text_length(text, fontsize=size)
+            writer.append((x, PAGE_HEIGHT - MARGIN / 2), text, font=font, fontsize=size)
+            writer.write_text(page)
+
+
+def render_sheet(ws, output_path, last_col, last_row, **options):
+    """SheetLayout + SheetRenderer kısayolu (seçenekler için SheetRenderer.render)"""
+    layout = SheetLayout(ws, last_col, last_row)
+    return SheetRenderer(layout).render(output_path, **options)
+
+
+def _column_points(ws, col):
+    """Excel sütun genişliği (karakter) -> punto; 7 px karakter genişliği, 5 px kenar boşluğu"""
+    from openpyxl.utils import get_column_letter
+    dimension = ws.column_dimensions.get(get_column_letter(col))
+    width = dimension.width if dimension is not None and dimension.width else None
+    if width is None:
+        width = ws.sheet_format.defaultColWidth or ((ws.sheet_format.baseColWidth or 8) + 0.71)
+    return int(width * 7 + 5) * 0.75
+
+
+def _theme_colors(workbook):
+    theme = getattr(workbook, 'loaded_theme', None)
+    if not theme:
+        return {'lt1': 'FFFFFF', 'dk1': '000000'}
+    if isinstance(theme, bytes):
+        theme = theme.decode('utf-8', errors='ignore')
+    colors = {}
+    for name, body in re.findall(r'<a:(dk1|lt1|dk2|lt2|accent\d|hlink|folHlink)>(.*?)</a:\1>', theme, re.S):
+        match = re.search(r'(?:lastClr|val)="([0-9A-Fa-f]{6})"', body)
+        if match:
+            colors[name] = match.group(1)
+    return colors
+
+
+def _display_value(value):
+    """Hücre değerinin görünen metni (tarih ve sayılar Excel'deki gibi)"""
+    from datetime import date, datetime
+    if isinstance(value, datetime):
+        return value.strftime('%d.%m.%Y %H:%M') if value.time() != datetime.min.time() else value.strftime('%d.%m.%Y')
+    if isinstance(value, date):
+        return value.strftime('%d.%m.%Y')
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _subset_fonts(doc):
+    """Gömülü yazı tiplerinden sadece kullanılan karakterleri bırak (fontTools varsa)"""
+    if not config.PDF_SUBSET_FONTS:
+        return
+    try:
+        doc.subset_fonts()
+    except ImportError:
+        pass
+    except Exception as e:
+        logger.warning(f'⚠️ Yazı tipi alt kümesi oluşturulamadı: {e}')
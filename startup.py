@@ -0,0 +1,99 @@
+"""
+Ağır modüllerin geç yüklenmesi ve başlangıç süresi raporu
+"""
+import importlib
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Süreç başlangıcına yakın bir referans (bot.py bu modülü ilk sıralarda import eder)
+PROCESS_START = time.perf_counter()
+
+
+class StartupReport:
+    """Modül başına import ve nesne oluşturma sürelerini toplar"""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, import_seconds, init_seconds):
+        with self._lock:
+            self._entries[name] = (import_seconds, init_seconds)
+
+    def entries(self):
+        with self._lock:
+            return dict(self._entries)
+
+    def log(self, title='Başlangıç süresi raporu'):
+        entries = self.entries()
+        lines = [f'⏱️ {title} (süreç başlangıcından beri {time.perf_counter() - PROCESS_START:.2f} sn):']
+        for name, (import_seconds, init_seconds) in sorted(entries.items(), key=lambda item: -sum(item[1])):
+            lines.append(
+                f'   {name:<18} import {import_seconds * 1000:7.0f} ms   '
+                f'başlatma {init_seconds * 1000:7.0f} ms'
+            )
+        total = sum(sum(times) for times in entries.values())
+        lines.append(f'   {"toplam":<18} {total * 1000:.0f} ms')
+        logger.info('\n'.join(lines))
+
+
+class LazyComponent:
+    """
+    Modülü ve ondan üretilen nesneyi ilk kullanımda bir kez oluşturur.
+
+    get() thread güvenlidir; ısınma görevi ile ilk kullanıcı isteği aynı
+    anda gelirse ikincisi birincinin bitmesini bekler. optional=True ise
+    import/başlatma hatası None olarak döner (ör: Gemini yoksa Tesseract).
+    """
+
+    def __init__(self, name, module, factory, report=None, optional=False):
+        """
+        Args:
+            name: Raporda görünecek ad
+            module: Import edilecek modül adı
+            factory: callable(module) -> nesne
+            report: StartupReport (opsiyonel)
+            optional: Hata durumunda None döndür
+        """
+        self.name = name
+        self.module = module
+        self.factory = factory
+        self.report = report
+        self.optional = optional
+
+        self._value = None
+        self._ready = False
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self):
+        return self._ready
+
+    def get(self):
+        if self._ready:
+            return self._value
+
+        with self._lock:
+            if not self._ready:
+                started = time.perf_counter()
+                imported = started
+                try:
+                    module = importlib.import_module(self.module)
+                    imported = time.perf_counter()
+                    value = self.factory(module)
+                except Exception as e:
+                    if not self.optional:
+                        raise
+                    logger.warning(f'⚠️ {self.name} yüklenemedi: {e}')
+                    value = None
+                finished = time.perf_counter()
+
+                if self.report:
+                    self.report.record(self.name, imported - started, finished - imported)
+                self._value = value
+                self._ready = True
+
+        return self._value
@@ -0,0 +1,61 @@
+"""
+Hazırlanmış şablonların bellekte tutulması
+
+Şablon diskten bir kez okunur, her istekte aynı olan düzeltmeler
+uygulanır ve sonuç pickle ile bellekte saklanır. Her istek bu
+anlık görüntüden bağımsız bir kopya alır; şablon dosyası değişirse
+(boyut veya mtime) bir sonraki istekte yeniden hazırlanır.
+"""
+import logging
+import pickle
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+class TemplateCache:
+    """Tek bir şablon dosyası için hazır kopya üreticisi (thread güvenli)"""
+
+    def __init__(self, path, prepare, clone=True):
+        """
+        Args:
+            path: Şablon dosyası
+            prepare: callable(path) -> doldurulmaya hazır nesne (pickle edilebilir olmalı)
+            clone: False ise kopya yerine aynı nesne döner (değiştirilmeyen şablonlar için);
+                callable(nesne) ise kopya onunla alınır (pickle edilemeyen nesneler, ör: docx baytları)
+        """
+        self.path = Path(path)
+        self.prepare = prepare
+        self.clone = clone
+        self.loads = 0
+        self.copies = 0
+
+        self._entry = None  # ((boyut, mtime), pickle baytları veya nesnenin kendisi)
+        self._pickle = clone is True
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Hazırlanmış şablonun yeni bir kopyası"""
+        stat = self.path.stat()
+        key = (stat.st_size, stat.st_mtime_ns)
+        entry = self._entry
+        if entry is None or entry[0] != key:
+            with self._lock:
+                entry = self._entry
+                if entry is None or entry[0] != key:
+                    started = time.perf_counter()
+                    prepared = self.prepare(self.path)
+                    if self._pickle:
+                        prepared = pickle.dumps(prepared, pickle.HIGHEST_PROTOCOL)
+                    entry = self._entry = (key, prepared)
+                    self.loads += 1
+                    logger.info(f'📋 {self.path.name} şablonu hazırlandı ({(time.perf_counter() - started) * 1000:.0f} ms)')
+        if not self.clone:
+            return entry[1]
+        self.copies += 1
+        return pickle.loads(entry[1]) if self._pickle else self.clone(entry[1])
+
+    def diagnostics(self):
+        return {'path': str(self.path), 'loads': self.loads, 'copies': self.copies, 'ready': self._entry is not None}
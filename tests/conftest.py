@@ -0,0 +1,73 @@
+"""
+Ortak test ayarları
+
+Modüller depo kökünde düz dosyalardır ve şablonlara (gerek/, yeni.xlsx)
+göreli yollarla erişir; testler depo kökünde çalışır, çıktılar ve teklif
+sayacı geçici dizine yazılır.
+"""
+import asyncio
+import selectors
+import sys
+from pathlib import Path
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture(autouse=True)
+def repo_root(monkeypatch, tmp_path):
+    import config
+    import offer_sequence
+    monkeypatch.chdir(ROOT)
+    monkeypatch.setattr(config, 'OUTPUT_DIR', str(tmp_path / 'outputs'))
+    monkeypatch.setattr(config, 'OFFER_SEQUENCE_PATH', str(tmp_path / 'offer_sequence.sqlite3'))
+    # Paylaşılan sayaç her testte geçici veritabanıyla yeniden oluşturulur
+    monkeypatch.setattr(offer_sequence, '_sequence', None)
+    return ROOT
+
+
+class _VirtualSelector(selectors.DefaultSelector):
+    """Beklemek yerine sahte saati ilerletir"""
+
+    loop = None
+
+    def select(self, timeout=None):
+        events = super().select(0)
+        if not events and timeout:
+            self.loop.now += timeout
+        elif not events and timeout is None:
+            raise RuntimeError('Olay döngüsü kilitlendi: bekleyen zamanlayıcı yok')
+        return events
+
+
+class VirtualTimeLoop(asyncio.SelectorEventLoop):
+    """
+    Sahte saatli olay döngüsü: loop.time() sanal zamandır, asyncio.sleep /
+    wait_for beklemeden en yakın zamanlayıcıya atlar.
+    """
+
+    def __init__(self):
+        self.now = 0.0
+        selector = _VirtualSelector()
+        super().__init__(selector)
+        selector.loop = self
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def run_virtual():
+    """Coroutine'i sahte saatli döngüde çalıştır (asyncio.run yerine)"""
+    loops = []
+
+    def run(coro):
+        loop = VirtualTimeLoop()
+        loops.append(loop)
+        return loop.run_until_complete(coro)
+
+    yield run
+    for loop in loops:
+        loop.close()
@@ -0,0 +1,151 @@
+import asyncio
+import json
+import pytest
+from telegram import Update
+from telegram.ext import Application, ConversationHandler
+from telegram.request import BaseRequest
+import config
+from bot import ASK_DELIVERY_DATE, OfferBot, add_handlers
+from document_queue import DocumentJobQueue
+from update_processor import ChatSerialUpdateProcessor
+from webhook_server import fake_update
+
+BOT_USER = {'id': 123456, 'is_bot': True, 'first_name': 'Test', 'username': 'test_bot'}
+
+
+class FakeRequest(BaseRequest):
+    """Telegram API yerine: çağrıları kaydeder, mesaj gönderen metotlara sahte Message döner"""
+
+    def __init__(self):
+        self.calls = []
+        self._message_id = 0
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def do_request(self, url, method, request_data=None, **kwargs):
+        endpoint = url.rsplit('/', 1)[-1]
+        parameters = request_data.parameters if request_data else {}
+        self.calls.append((endpoint, parameters))
+        if endpoint == 'getMe':
+            result = BOT_USER
+        elif endpoint in ('sendMessage', 'editMessageText'):
+            self._message_id += 1
+            result = {
+                'message_id': parameters.get('message_id', self._message_id), 'date': 0,
+                'chat': {'id': parameters['chat_id'], 'type': 'private'}, 'text': parameters.get('text', ''),
+            }
+        else:
+            result = True
+        return 200, json.dumps({'ok': True, 'result': result}).encode()
+
+    def texts(self, chat_id):
+        return [parameters.get('text') for endpoint, parameters in self.calls
+                if endpoint == 'sendMessage' and parameters.get('chat_id') == chat_id]
+
+
+async def _until(condition, timeout=10):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError('Beklenen durum oluşmadı')
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+def offer_bot(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'TEMP_DIR', str(tmp_path / 'temp'))
+    monkeypatch.setattr(config, 'PROGRESS_MIN_INTERVAL', 0)
+    bot = OfferBot()
+    yield bot
+    bot.worker_pool.shutdown()
+
+
+def test_queued_jobs_do_not_block_other_chats(offer_bot):
+    chats = 24
+    offer_bot.document_queue = DocumentJobQueue(max_concurrent=1, per_user_limit=1, max_waiting=50)
+    release = asyncio.Event()
+    finished = []
+
+    async def create_documents(update, context, progress):
+        await release.wait()
+        await progress.finish('✅ Belgeler hazır')
+        finished.append(update.effective_chat.id)
+        return ConversationHandler.END
+
+    offer_bot._create_documents = create_documents
+
+    async def deliver(application, conversation, request):
+        for chat_id in range(1, chats + 1):
+            # Teslim tarihi sorusunda bekleyen YTB konuşması; cevap belge oluşturmayı başlatır
+            conversation._conversations[(chat_id, chat_id)] = ASK_DELIVERY_DATE
+            await application.update_queue.put(Update.de_json(fake_update('15.11.2025', chat_id, chat_id), application.bot))
+        await _until(lambda: offer_bot.document_queue.waiting == chats - 1)
+        assert offer_bot.document_queue.active == 1
+
+        await application.update_queue.put(Update.de_json(fake_update('/start', 999, 1000), application.bot))
+        await _until(lambda: config.MESSAGES['start'] in request.texts(999))
+
+        # İş sürerken aynı sohbetten gelen mesaj WAITING durumunda cevaplanır
+        await application.update_queue.put(Update.de_json(fake_update('merhaba', 1, 1001), application.bot))
+        await _until(lambda: any('hazırlanıyor' in text for text in request.texts(1)[1:]))
+
+        release.set()
+        await _until(lambda: len(finished) == chats)
+
+    async def scenario():
+        request = FakeRequest()
+        application = (
+            Application.builder().token('123456:TEST').request(request).updater(None)
+            # Sohbet slotu iş sayısından az: bekleyen işler slot tutsaydı /start cevapsız kalırdı
+            .concurrent_updates(ChatSerialUpdateProcessor(max_concurrent_updates=4)).build()
+        )
+        add_handlers(application, offer_bot)
+        conversation = next(handler for handler in application.handlers[0] if isinstance(handler, ConversationHandler))
+
+        async with application:
+            await application.start()
+            try:
+                await deliver(application, conversation, request)
+            finally:
+                # Hata olsa da uygulama durdurulmalı (update döngüsü iptali yok sayar)
+                release.set()
+                await application.stop()
+        assert offer_bot.document_queue.active == offer_bot.document_queue.waiting == 0
+
+    asyncio.run(scenario())
+
+
+def test_warm_up_conversions_wait_behind_interactive_jobs(offer_bot, monkeypatch):
+    offer_bot.document_queue = DocumentJobQueue(max_concurrent=1, per_user_limit=1, max_waiting=10)
+    offer_bot._components = {}
+    order = []
+
+    async def warm_up_conversions():
+        order.append('warm_up')
+
+    monkeypatch.setattr(offer_bot, '_warm_up_conversions', warm_up_conversions)
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def interactive_job(user_id):
+            async with offer_bot.document_queue.slot(user_id):
+                order.append(user_id)
+                await release.wait()
+
+        holder = asyncio.create_task(interactive_job(1))
+        await asyncio.sleep(0)
+        warm_up = asyncio.create_task(offer_bot.warm_up())
+        await _until(lambda: offer_bot.document_queue.waiting == 1)
+        later = asyncio.create_task(interactive_job(2))
+        await _until(lambda: offer_bot.document_queue.waiting == 2)
+
+        release.set()
+        await asyncio.gather(holder, later, warm_up)
+        assert order == [1, 2, 'warm_up']
+
+    asyncio.run(scenario())
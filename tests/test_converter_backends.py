@@ -0,0 +1,172 @@
+import time
+import types
+
+import pytest
+
+import config
+import converter_backends
+from converter_backends import BackendRegistry, CircuitBreaker, ConverterBackend
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class StubBackend(ConverterBackend):
+    """LibreOffice yerine: süresi ve sonucu testte belirlenen arka uç"""
+
+    def __init__(self, name, seconds, available=True, extensions=None, clock=None):
+        self.name = name
+        super().__init__()
+        self.seconds = seconds
+        self.ok = True
+        self.calls = []
+        self._available = available
+        self._clock = clock
+        if extensions:
+            self.extensions = extensions
+        self.breaker.failure_threshold = 2
+        self.breaker.recovery_timeout = 0.05
+        self.breaker.probe_successes = 2
+
+    def detect(self):
+        return self._available
+
+    def _convert(self, input_path, pdf_path):
+        self.calls.append(input_path.name)
+        self._clock.now += self.seconds
+        if self.ok:
+            pdf_path.write_bytes(b'%PDF-1.4')
+        return self.ok
+
+
+@pytest.fixture
+def clock(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, 'TEMP_DIR', str(tmp_path / 'temp'))
+    fake = FakeClock()
+    # Sadece bu modülün gecikme ölçümü sahte saati kullanır
+    monkeypatch.setattr(converter_backends, 'time', types.SimpleNamespace(perf_counter=fake))
+    return fake
+
+
+@pytest.fixture
+def make_registry(clock):
+    registries = []
+
+    def make(*backends):
+        for backend in backends:
+            backend._clock = clock
+        registry = BackendRegistry(list(backends))
+        registries.append(registry)
+        return registry.probe()
+
+    yield make
+    for registry in registries:
+        registry.shutdown()
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'Beklenen durum oluşmadı'
+        time.sleep(0.01)
+
+
+def test_circuit_breaker_transitions():
+    opened = []
+    breaker = CircuitBreaker('stub', failure_threshold=2, recovery_timeout=30, probe_successes=2, on_open=opened.append)
+
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow()
+    assert breaker.trips == 1 and breaker.opened_at is not None
+    assert opened == [breaker]
+
+    breaker.half_open()
+    assert breaker.state == CircuitBreaker.HALF_OPEN and not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.opened_at is None
+
+    # Yarı açıkken tek hata devreyi tekrar açar
+    breaker.half_open()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.trips == 2 and len(opened) == 2
+
+
+def test_candidates_are_ordered_by_measured_latency(make_registry):
+    slow = StubBackend('slow', 0.3)
+    fast = StubBackend('fast', 0.1)
+    medium = StubBackend('medium', 0.2)
+    missing = StubBackend('missing', 0.01, available=False)
+    docx_only = StubBackend('docx-only', 0.01, extensions=('.docx',))
+    registry = make_registry(slow, fast, missing, medium, docx_only)
+
+    assert [b.name for b in registry.candidates('teklif.xlsx')] == ['fast', 'medium', 'slow']
+    # Yoklanamayan (gecikmesi bilinmeyen) arka uç en sona düşer
+    assert [b.name for b in registry.candidates('teklif.docx')] == ['fast', 'medium', 'slow', 'docx-only']
+    assert missing.calls == [] and docx_only.calls == []
+
+    # Ölçülen gecikme değişince sıra da değişir
+    fast.seconds = 2.0
+    fast.ok = True
+    for _ in range(3):
+        fast.convert(registry._sample, registry._sample.with_suffix('.pdf'))
+    assert [b.name for b in registry.candidates('teklif.xlsx')] == ['medium', 'slow', 'fast']
+
+
+def test_convert_falls_back_to_next_backend(make_registry, tmp_path):
+    fast = StubBackend('fast', 0.1)
+    slow = StubBackend('slow', 0.3)
+    registry = make_registry(fast, slow)
+    source = tmp_path / 'teklif.xlsx'
+    source.write_bytes(b'')
+
+    fast.ok = False
+    assert registry.convert(source) == str(tmp_path / 'teklif.pdf')
+    assert fast.calls[-1] == slow.calls[-1] == 'teklif.xlsx'
+    assert fast.failures == 1 and fast.last_error == 'PDF oluşmadı'
+    assert fast.healthy
+
+    # Hiçbir arka uç çeviremezse None
+    slow.ok = False
+    assert registry.convert(source) is None
+
+
+def test_open_backend_is_skipped_and_recovers(make_registry, tmp_path):
+    fast = StubBackend('fast', 0.1)
+    slow = StubBackend('slow', 0.3)
+    registry = make_registry(fast, slow)
+    source = tmp_path / 'teklif.xlsx'
+    source.write_bytes(b'')
+
+    fast.ok = False
+    fast.breaker.recovery_timeout = 30
+    registry.convert(source)
+    registry.convert(source)
+    assert fast.breaker.state == CircuitBreaker.OPEN
+    assert [b.name for b in registry.candidates(source)] == ['slow']
+
+    # Açık devre istek almaz
+    calls = len(fast.calls)
+    assert registry.convert(source)
+    assert len(fast.calls) == calls
+
+    # Kurtarma denemesi başarısızsa devre yeniden açılır, başarılı olunca kapanır
+    fast.breaker.recovery_timeout = 0.05
+    registry._schedule_recovery(fast)
+    _wait_for(lambda: fast.breaker.trips == 2)
+    fast.ok = True
+    _wait_for(lambda: fast.breaker.state == CircuitBreaker.CLOSED)
+    assert fast.calls[-2:] == ['probe_fast.xlsx', 'probe_fast.xlsx']
+    assert [b.name for b in registry.candidates(source)] == ['fast', 'slow']
@@ -0,0 +1,165 @@
+import asyncio
+
+import pytest
+
+from document_queue import DocumentJobQueue, QueueFullError, PRIORITY_BULK, PRIORITY_INTERACTIVE
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def _job(queue, user_id, started, release, priority=PRIORITY_INTERACTIVE, on_position=None):
+    async with queue.slot(user_id, priority=priority, on_position=on_position):
+        started.append(user_id)
+        await release.wait()
+
+
+def test_interactive_jobs_start_before_earlier_bulk_jobs():
+    async def scenario():
+        queue = DocumentJobQueue(max_concurrent=1, per_user_limit=1, max_waiting=10)
+        started = []
+        releases = {user_id: asyncio.Event() for user_id in ('holder', 'bulk1', 'user1', 'bulk2', 'user2')}
+
+        tasks = [asyncio.create_task(_job(queue, 'holder', started, releases['holder']))]
+        await _settle()
+        for user_id in ('bulk1', 'user1', 'bulk2', 'user2'):
+            priority = PRIORITY_BULK if user_id.startswith('bulk') else PRIORITY_INTERACTIVE
+            tasks.append(asyncio.create_task(_job(queue, user_id, started, releases[user_id], priority)))
+            await _settle()
+        assert queue.waiting == 4
+
+        for user_id in ('holder', 'user1', 'user2', 'bulk1', 'bulk2'):
+            assert started[-1] == user_id
+            releases[user_id].set()
+            await _settle()
+
+        await asyncio.gather(*tasks)
+        assert started == ['holder', 'user1', 'user2', 'bulk1', 'bulk2']
+        assert queue.active == 0 and queue.waiting == 0
+
+    asyncio.run(scenario())
+
+
+def test_per_user_limit_rejects_second_job():
+    async def scenario():
+        queue = DocumentJobQueue(max_concurrent=4, per_user_limit=1, max_waiting=10)
+        release = asyncio.Event()
+        task = asyncio.create_task(_job(queue, 42, [], release))
+        await _settle()
+
+        with pytest.raises(QueueFullError) as error:
+            async with queue.slot(42):
+                pass
+        assert error.value.per_user
+
+        # Başka kullanıcı etkilenmez, iş bitince aynı kullanıcı tekrar girebilir
+        async with queue.slot(43):
+            pass
+        release.set()
+        await task
+        async with queue.slot(42):
+            assert queue.active == 1
+
+    asyncio.run(scenario())
+
+
+def test_max_waiting_rejects_when_queue_is_full():
+    async def scenario():
+        queue = DocumentJobQueue(max_concurrent=1, per_user_limit=1, max_waiting=2)
+        release = asyncio.Event()
+        tasks = [asyncio.create_task(_job(queue, user_id, [], release)) for user_id in (1, 2, 3)]
+        await _settle()
+        assert queue.active == 1 and queue.waiting == 2
+
+        with pytest.raises(QueueFullError) as error:
+            async with queue.slot(4):
+                pass
+        assert not error.value.per_user
+        assert queue.waiting == 2
+
+        release.set()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiting_job_leaves_queue():
+    async def scenario():
+        queue = DocumentJobQueue(max_concurrent=1, per_user_limit=1, max_waiting=10)
+        started = []
+        releases = {user_id: asyncio.Event() for user_id in (1, 2, 3)}
+        positions = []
+
+        async def on_position(position):
+            positions.append(position)
+
+        holder = asyncio.create_task(_job(queue, 1, started, releases[1]))
+        await _settle()
+        cancelled = asyncio.create_task(_job(queue, 2, started, releases[2]))
+        await _settle()
+        last = asyncio.create_task(_job(queue, 3, started, releases[3], on_position=on_position))
+        await _settle()
+        assert positions == [2]
+
+        cancelled.cancel()
+        await _settle()
+        assert cancelled.cancelled()
+        assert queue.waiting == 1
+        assert positions == [2, 1]
+
+        # İptal edilen kullanıcı yeniden iş açabilir (sayacı bırakıldı)
+        assert 2 not in queue._user_jobs
+
+        releases[1].set()
+        await _settle()
+        assert started == [1, 3]
+        assert queue.active == 1 and queue.waiting == 0
+
+        releases[3].set()
+        await asyncio.gather(holder, last)
+        assert queue.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_on_position_reports_latest_position_until_start():
+    async def scenario():
+        queue = DocumentJobQueue(max_concurrent=1, per_user_limit=1, max_waiting=10)
+        started = []
+        releases = {user_id: asyncio.Event() for user_id in (1, 2, 3, 4)}
+        positions = []
+        gate = asyncio.Event()
+
+        async def on_position(position):
+            positions.append(position)
+            await gate.wait()
+
+        tasks = [asyncio.create_task(_job(queue, 1, started, releases[1]))]
+        await _settle()
+        for user_id in (2, 3):
+            tasks.append(asyncio.create_task(_job(queue, user_id, started, releases[user_id])))
+            await _settle()
+        tasks.append(asyncio.create_task(_job(queue, 4, started, releases[4], on_position=on_position)))
+        await _settle()
+        assert positions == [3]
+
+        # Callback meşgulken sıra iki kez değişir; yalnızca en güncel değer gönderilir
+        releases[1].set()
+        await _settle()
+        releases[2].set()
+        await _settle()
+        gate.set()
+        await _settle()
+        assert positions == [3, 1]
+
+        releases[3].set()
+        await _settle()
+        assert started == [1, 2, 3, 4]
+        assert positions == [3, 1]
+
+        releases[4].set()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
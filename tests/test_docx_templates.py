@@ -0,0 +1,152 @@
+import re
+import pytest
+from docx import Document
+from docx_templates import DocxTemplateRegistry, compile_markers
+from document_handler import DocumentHandler
+from document_manifests import MANIFESTS
+from fill_plans import compile_manifest
+
+SOZLESME_VALUES = {
+    'company': 'ÖRNEK A.Ş. (1234567890)', 'project': 'TÜBİTAK 1501 PROJESİ', 'address': 'ATATÜRK CAD. NO:1',
+    'amount': '80.000', 'description': "onaylanan tutar üzerinden %5'i", 'fixed_amount': '80.000',
+}
+# Eski yöntem: her paragrafta her yer tutucu için metin araması ve paragraph.text ataması
+LEGACY_SOZLESME = [
+    ('... (....)', SOZLESME_VALUES['company']),
+    ('... hazırlanması', f"{SOZLESME_VALUES['project']} hazırlanması"),
+    ('..... adresindeki', f"{SOZLESME_VALUES['address']} adresindeki"),
+    ('... TL projenin', f"{SOZLESME_VALUES['amount']} TL projenin"),
+    ('... talep edilir', f"{SOZLESME_VALUES['description']} talep edilir"),
+    ('Sabit tutarın ... TL', f"Sabit tutarın {SOZLESME_VALUES['amount']} TL"),
+]
+
+
+def _run_layout(document):
+    """Her paragrafın run biçimleri (metin hariç)"""
+    return [[run.element.rPr.xml if run.element.rPr is not None else None for run in paragraph.runs]
+            for paragraph in document.paragraphs]
+
+
+def _template(tmp_path, markers, build):
+    document = Document()
+    build(document)
+    document.save(tmp_path / 'sablon.docx')
+    return DocxTemplateRegistry(tmp_path).register('sablon', 'sablon.docx', markers).get('sablon')
+
+
+def test_marker_split_across_runs_keeps_formatting(tmp_path):
+    def build(document):
+        paragraph = document.add_paragraph()
+        paragraph.add_run('Firma: ')
+        paragraph.add_run('. .').bold = True
+        paragraph.add_run(' .').italic = True
+        paragraph.add_run(' sonu')
+
+    template = _template(tmp_path, {'dots': '. . .'}, build)
+    assert template.fill({'dots': 'ÖRNEK'}) == {'dots': 1}
+    runs = template.document.paragraphs[0].runs
+    assert [run.text for run in runs] == ['Firma: ', 'ÖRNEK', '', ' sonu']
+    assert runs[1].bold and runs[2].italic
+
+
+def test_list_callable_and_none_values(tmp_path):
+    def build(document):
+        document.add_paragraph('A: ... B: ... C: ...')
+        document.add_paragraph('Tarih 01/02/2026, 03/04/2026')
+
+    markers = {'dots': '...', 'date': re.compile(r'\d{2}/\d{2}/\d{4}')}
+    template = _template(tmp_path, markers, build)
+    counts = template.fill({'dots': ['1', None], 'date': lambda match: match.group()[-4:]})
+    # None ve listede olmayan eşleşmeler şablondaki gibi kalır
+    assert [paragraph.text for paragraph in template.document.paragraphs] == ['A: 1 B: ... C: ...', 'Tarih 2026, 2026']
+    assert counts == {'dots': 1, 'date': 2}
+
+
+def test_tabs_headers_footers_and_tables(tmp_path):
+    def build(document):
+        document.add_paragraph().add_run('Ad:\t...')
+        document.add_table(rows=1, cols=1).cell(0, 0).paragraphs[0].add_run('Tablo ...')
+        document.sections[0].header.add_paragraph('Üst ...')
+        document.sections[0].footer.add_paragraph('Alt ...')
+
+    template = _template(tmp_path, {'dots': '...'}, build)
+    assert template.fill({'dots': 'X'}) == {'dots': 4}
+    document = template.document
+    assert document.paragraphs[0].text == 'Ad:\tX'
+    assert document.tables[0].cell(0, 0).text == 'Tablo X'
+    assert document.sections[0].header.paragraphs[-1].text == 'Üst X'
+    assert document.sections[0].footer.paragraphs[-1].text == 'Alt X'
+
+
+def test_copies_are_independent(tmp_path):
+    registry = DocxTemplateRegistry(tmp_path)
+    document = Document()
+    document.add_paragraph('Ad: ...')
+    document.save(tmp_path / 'sablon.docx')
+    registry.register('sablon', 'sablon.docx', {'dots': '...'})
+    registry.get('sablon').fill({'dots': 'İLK'})
+    assert registry.get('sablon').document.paragraphs[0].text == 'Ad: ...'
+
+
+def test_sozlesme_matches_legacy_fill_and_keeps_runs(tmp_path):
+    markers = compile_manifest('sozlesme', MANIFESTS['sozlesme']).markers
+    template = DocxTemplateRegistry('gerek').register('sozlesme', 'Sözleşme.docx', markers).get('sozlesme')
+    counts = template.fill(SOZLESME_VALUES)
+    template.document.save(tmp_path / 'yeni.docx')
+
+    legacy = Document('gerek/Sözleşme.docx')
+    for paragraph in legacy.paragraphs:
+        for marker, value in LEGACY_SOZLESME:
+            if marker in paragraph.text:
+                paragraph.text = paragraph.text.replace(marker, value)
+
+    filled = Document(tmp_path / 'yeni.docx')
+    assert [p.text for p in filled.paragraphs] == [p.text for p in legacy.paragraphs]
+    assert set(counts) == set(SOZLESME_VALUES)
+    # paragraph.text ataması run'ları tek run'a indirir; yeni yol şablonun run'larını korur
+    assert _run_layout(filled) == _run_layout(Document('gerek/Sözleşme.docx'))
+
+
+@pytest.mark.parametrize('name, data, expected', [
+    ('yetkilendirme_taahhutnamesi', {'company_name': 'ÖRNEK A.Ş. <&>', 'tax_number': '1234567890', 'date': '01/02/2026'},
+     ['ÖRNEK A.Ş. <&>', '1234567890', '01/02/2026']),
+    ('sozlesme', {'company_name': 'ÖRNEK A.Ş.', 'tax_number': '1234567890', 'address': 'ATATÜRK CAD.',
+                  'proje_turu': 'kosgeb', 'tutar': '80.000', 'aciklama': 'açıklama'},
+     ['ÖRNEK A.Ş. (1234567890)', 'KOSGEB hazırlanması', 'ATATÜRK CAD. adresindeki', '80.000 TL', 'açıklama talep edilir']),
+    ('kosgeb_vekaletname', {'company_name': 'ÖRNEK A.Ş.', 'tax_number': '1234567890', 'address': 'ATATÜRK CAD.', 'email': 'a@b.com'},
+     ['Vergi Numarası: 1234567890', 'Adresi: ATATÜRK CAD.', 'Elektronik Posta Adresi: a@b.com']),
+    # Boş bilgiler şablondaki "…" olarak kalır
+    ('kosgeb_vekaletname', {}, ['Vergi Numarası: …', 'Adresi: …']),
+])
+def test_handler_fills_keep_template_runs(tmp_path, name, data, expected):
+    handler = DocumentHandler()
+    output = handler.fill(name, data, str(tmp_path / 'out.docx'))
+    assert output
+    # Düzen (layout) hazırlıkta uygulanır; karşılaştırma hazırlanmış şablonla yapılır
+    prepared = handler.templates.get(name).document
+    filled = Document(output)
+    assert _run_layout(filled) == _run_layout(prepared)
+    text = '\n'.join(paragraph.text for paragraph in filled.paragraphs)
+    for value in expected:
+        assert value in text
+
+
+def test_compile_markers_keeps_regex_flags():
+    matcher = compile_markers({
+        'word': re.compile('firma', re.IGNORECASE),
+        'line': re.compile(r'^…$', re.MULTILINE),
+        'text': '. . .',
+    })
+    assert matcher.search('ÖRNEK FIRMA').group() == 'FIRMA'
+    assert matcher.search('a\n…\nb').lastgroup == 'line'
+    # Bayrak sadece kendi yer tutucusunda geçerli
+    assert compile_markers({'a': re.compile('x', re.I), 'b': 'y'}).search('Y') is None
+
+
+def test_compile_markers_folds_leading_flags():
+    assert compile_markers({'a': re.compile(r'(?i)abc')}).search('ABC').lastgroup == 'a'
+
+
+def test_compile_markers_rejects_bytes():
+    with pytest.raises(ValueError):
+        compile_markers({'a': re.compile(rb'abc')})
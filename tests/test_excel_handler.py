@@ -0,0 +1,58 @@
+from datetime import datetime
+import pytest
+from openpyxl import load_workbook
+from excel_handler import ITEM_ROWS, PRINT_LAST_ROW, TABLE_HEADER_ROW, ExcelHandler
+from xlsx_patch import compare_workbooks
+
+CUSTOMER = {'name': 'TEST FİRMA A.Ş.', 'contact_person': 'AHMET BEY'}
+OFFER_INFO = {'offer_no': '05274', 'offer_date': '28.10.2025', 'payment_method': 'PEŞİN', 'delivery_date': '-', 'notes': 'not'}
+
+
+def _services(count):
+    return [{'name': f'EKİPMAN {index}', 'quantity': index, 'unit_price': 1250.5} for index in range(1, count + 1)]
+
+
+@pytest.fixture
+def handlers():
+    patched = ExcelHandler().prepare()
+    openpyxl_handler = ExcelHandler().prepare()
+    openpyxl_handler._patch_template = None
+    return openpyxl_handler, patched
+
+
+@pytest.mark.parametrize('count', [1, 3, 4, 5, 100])
+def test_patched_offer_matches_openpyxl(handlers, count):
+    openpyxl_handler, patched = handlers
+    expected = openpyxl_handler.create_offer(CUSTOMER, _services(count), dict(OFFER_INFO))
+    actual = patched.create_offer(CUSTOMER, _services(count), dict(OFFER_INFO))
+    assert compare_workbooks(expected, actual) == []
+
+
+@pytest.mark.parametrize('count', [3, 5, 100])
+def test_line_items_shift_totals_and_paginate(handlers, count):
+    _, patched = handlers
+    ws = load_workbook(patched.create_offer(CUSTOMER, _services(count), dict(OFFER_INFO))).active
+    extra = max(0, count - len(ITEM_ROWS))
+
+    names = [ws.cell(row=ITEM_ROWS[0] + index, column=3).value for index in range(count)]
+    assert names == [f'EKİPMAN {index}' for index in range(1, count + 1)]
+    # Toplamlar eklenen satır kadar aşağı kayar
+    subtotal = sum(index * 1250.5 for index in range(1, count + 1))
+    assert ws[f'K{20 + extra}'].value.startswith(f'{subtotal:,.2f}')
+    assert ws[f'K{22 + extra}'].value
+    if extra:
+        assert ws.print_area == f"'{ws.title}'!$A$1:$K${PRINT_LAST_ROW + extra}"
+        assert ws.print_title_rows == f'${TABLE_HEADER_ROW}:${TABLE_HEADER_ROW}'
+    breaks = [brk.id for brk in ws.row_breaks.brk]
+    # 100 kalem tek sayfaya sığmaz; sonlar tablonun içinde ve artan sırada
+    assert bool(breaks) == (count == 100)
+    assert breaks == sorted(breaks)
+    assert all(ITEM_ROWS[0] <= row < ITEM_ROWS[0] + count for row in breaks)
+
+
+def test_offer_numbers_come_from_the_sequence(handlers):
+    _, patched = handlers
+    year = datetime.now().year
+    first, second = patched._new_offer_no(), patched._new_offer_no()
+    assert first.startswith(f'T-{year}-') and second.startswith(f'T-{year}-')
+    assert int(second.rsplit('-', 1)[1]) == int(first.rsplit('-', 1)[1]) + 1
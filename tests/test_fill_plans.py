@@ -0,0 +1,92 @@
+import re
+import pytest
+from document_handler import DocumentHandler
+from document_manifests import COMPUTED, MANIFESTS
+from fill_plans import ManifestError, compile_format, compile_manifest, render
+
+
+def _manifest(**overrides):
+    manifest = {
+        'label': 'Deneme',
+        'template': 'deneme.docx',
+        'output': 'Deneme_{company_name:safe}.docx',
+        'fields': {'company': {'marker': '...', 'value': '{company_name}'}},
+    }
+    manifest.update(overrides)
+    return manifest
+
+
+@pytest.mark.parametrize('name', sorted(MANIFESTS))
+def test_shipped_manifests_compile(name):
+    plan = compile_manifest(name, MANIFESTS[name])
+    assert plan.fields
+
+
+@pytest.mark.parametrize('overrides, message', [
+    ({'label': None}, '"label" eksik'),
+    ({'output': None}, '"output" eksik'),
+    ({'template': 'deneme.pdf'}, 'desteklenmeyen biçim "pdf"'),
+    ({'fields': {'company': {'value': '{company_name}'}}}, '"marker" eksik'),
+    ({'fields': {'company': {'marker': ''}}}, '"marker" eksik'),
+    ({'fields': {'firma adı': {'marker': '...'}}}, 'Python tanımlayıcısı'),
+    ({'fields': {'company': {'marker': '...', 'value': '{company_name:lower}'}}}, 'bilinmeyen kural'),
+    ({'fields': {'company': {'marker': '...', 'value': '{company_name!r}'}}}, 'bilinmeyen kural'),
+    ({'fields': {'company': {'marker': '...', 'value': '{data[0]}'}}}, 'geçersiz anahtar'),
+    ({'fields': {'company': {'marker': '...', 'value': '{company_name'}}}, 'geçersiz biçim'),
+    ({'fields': {'company': {'marker': '...', 'each': ['{a}', 5]}}}, 'company[1]'),
+    ({'output': 'Deneme_{timestamp:x}.docx'}, 'deneme.output'),
+])
+def test_compile_errors(overrides, message):
+    manifest = _manifest(**overrides)
+    for key in [key for key, value in overrides.items() if value is None]:
+        del manifest[key]
+    with pytest.raises(ManifestError, match=re.escape(message)):
+        compile_manifest('deneme', manifest)
+
+
+def test_each_is_docx_only():
+    manifest = _manifest(template='deneme.xlsx', fields={'company': {'cell': 'E6', 'each': ['{a}']}})
+    with pytest.raises(ManifestError, match='sadece docx'):
+        compile_manifest('deneme', manifest)
+
+
+def test_xlsx_fields_need_cells():
+    manifest = _manifest(template='deneme.xlsx')
+    with pytest.raises(ManifestError, match='"cell" eksik'):
+        compile_manifest('deneme', manifest)
+
+
+def test_unknown_layout_is_rejected():
+    with pytest.raises(ManifestError, match='bilinmeyen düzen "wide"'):
+        DocumentHandler({'deneme': _manifest(layout='wide')})
+
+
+def test_values_and_output_name():
+    plan = compile_manifest('deneme', _manifest(
+        fields={
+            'company': {'marker': '...', 'value': '{company_name} ({tax_number})', 'when': 'company_name'},
+            'dots': {'marker': '. . .', 'each': ['{tax_number}', {'value': '{company_name:upper}', 'when': 'company_name'}]},
+        },
+    ))
+    context = plan.context({'company_name': 'örnek/firma', 'tax_number': None}, {})
+    assert plan.values(context) == {'company': 'örnek/firma ()', 'dots': ['', 'ÖRNEK/FIRMA']}
+    assert plan.output_name(context) == 'Deneme_örnek_firma.docx'
+
+    empty = plan.context({}, {})
+    assert plan.values(empty) == {'company': None, 'dots': ['', None]}
+    assert plan.output_name(empty) == 'Deneme_firma.docx'
+
+
+def test_computed_keys_are_lazy():
+    calls = []
+    computed = {'date': lambda: calls.append(1) or '01/02/2026'}
+    plan = compile_manifest('deneme', _manifest(output='Deneme.docx'))
+    plan.values(plan.context({'company_name': 'X'}, computed))
+    assert calls == []
+    assert render(compile_format('{date} {date}', 'deneme'), plan.context({}, computed)) == '01/02/2026 01/02/2026'
+    assert calls == [1]
+
+
+def test_vekalet_expiry_in_words():
+    from datetime import datetime
+    assert COMPUTED['vekalet_expiry'](datetime(2026, 10, 15)).startswith('12.10.2036 (oniki ekim ikibinotuzaltı)')
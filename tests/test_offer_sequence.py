@@ -0,0 +1,78 @@
+import json
+import multiprocessing
+import threading
+import pytest
+from offer_sequence import OfferSequence, _stress_worker
+
+
+def _run_processes(path, block_size, processes, count):
+    results = multiprocessing.Queue()
+    workers = [
+        multiprocessing.Process(target=_stress_worker, args=(path, block_size, count, results))
+        for _ in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    numbers = [number for _ in workers for number in results.get(timeout=60)]
+    for worker in workers:
+        worker.join(timeout=60)
+        assert worker.exitcode == 0
+    return numbers
+
+
+def test_processes_get_contiguous_unique_numbers(tmp_path):
+    numbers = _run_processes(tmp_path / 'sequence.sqlite3', 1, 4, 50)
+    # Blok = 1 iken numaralar boşluksuz olmalı
+    assert sorted(numbers) == list(range(10001, 10001 + 4 * 50))
+
+
+@pytest.mark.parametrize('block_size', [7, 25])
+def test_processes_with_blocks_never_share_numbers(tmp_path, block_size):
+    numbers = _run_processes(tmp_path / 'sequence.sqlite3', block_size, 4, 60)
+    assert len(set(numbers)) == len(numbers)
+    assert min(numbers) == 10001
+
+
+def test_threads_share_one_block(tmp_path):
+    sequence = OfferSequence(tmp_path / 'sequence.sqlite3', block_size=10, start=10000)
+    numbers = []
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(50):
+            number = sequence.next(2026)
+            with lock:
+                numbers.append(number)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(numbers) == list(range(10001, 10401))
+
+
+def test_year_rollover_and_legacy_counter(tmp_path):
+    legacy = tmp_path / 'offer_counter.json'
+    legacy.write_text(json.dumps({'counter': 10021}))
+    sequence = OfferSequence(tmp_path / 'yearly.sqlite3', block_size=5, start=10000, legacy_path=legacy)
+
+    # Eski sayaç sadece ilk yıla taşınır; yeni yıl baştan başlar, eski yıla dönüş yeni blok açar
+    assert [sequence.next(2026), sequence.next(2026), sequence.next(2027), sequence.next(2026)] == [10022, 10023, 10001, 10027]
+    assert sequence.peek(2026) == 10031
+    assert sequence.peek(2027) == 10005
+
+
+def test_new_instance_continues_after_allocated_block(tmp_path):
+    path = tmp_path / 'sequence.sqlite3'
+    first = OfferSequence(path, block_size=5, start=10000)
+    assert first.next(2026) == 10001
+    # Kapanan sürecin kullanmadığı numaralar atlanır
+    assert OfferSequence(path, block_size=5, start=10000).next(2026) == 10006
+
+
+def test_unreadable_legacy_counter_starts_from_start(tmp_path):
+    legacy = tmp_path / 'offer_counter.json'
+    legacy.write_text('{bozuk')
+    sequence = OfferSequence(tmp_path / 'sequence.sqlite3', block_size=1, start=10000, legacy_path=legacy)
+    assert sequence.next(2026) == 10001
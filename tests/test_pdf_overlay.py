@@ -0,0 +1,36 @@
+import copy
+import os
+import types
+
+import document_manifests
+import pdf_overlay
+from pdf_overlay import FORMS, OverlayEngine
+
+
+def _key(tmp_path, name='yetkilendirme_taahhutnamesi'):
+    return OverlayEngine(cache_dir=tmp_path)._cache_key(FORMS[name])
+
+
+def test_cache_key_changes_with_manifest(tmp_path, monkeypatch):
+    before = _key(tmp_path)
+    other = _key(tmp_path, 'kullanici_yetkilendirme_formu')
+    manifests = copy.deepcopy(document_manifests.MANIFESTS)
+    manifests['yetkilendirme_taahhutnamesi']['fields']['dots']['marker'] = '. . . .'
+    monkeypatch.setattr(document_manifests, 'MANIFESTS', manifests)
+
+    assert _key(tmp_path) != before
+    # Diğer formun anahtarı etkilenmez
+    assert _key(tmp_path, 'kullanici_yetkilendirme_formu') == other
+
+
+def test_cache_key_changes_with_fill_code(tmp_path, monkeypatch):
+    source = tmp_path / 'fill_plans.py'
+    source.write_text('')
+    os.utime(source, ns=(1, 1))
+    modules = pdf_overlay.FILL_MODULES[:-1] + (types.SimpleNamespace(__file__=str(source)),)
+    monkeypatch.setattr(pdf_overlay, 'FILL_MODULES', modules)
+    before = _key(tmp_path)
+    assert _key(tmp_path) == before
+
+    os.utime(source, ns=(2, 2))
+    assert _key(tmp_path) != before
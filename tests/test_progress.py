@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+from telegram.error import BadRequest, TimedOut
+
+from progress import ProgressReporter
+
+
+class FakeMessage:
+    """Telegram Message yerine: gönderilen/düzenlenen metinleri sanal zamanla kaydeder"""
+
+    def __init__(self, sent=None, fail_with=None):
+        self.sent = sent if sent is not None else []
+        self.fail_with = fail_with
+        self.edit_calls = 0
+
+    async def reply_text(self, text, parse_mode=None, **kwargs):
+        self.sent.append(('reply', text, asyncio.get_running_loop().time()))
+        return FakeMessage(self.sent, self.fail_with)
+
+    async def edit_text(self, text, parse_mode=None):
+        self.edit_calls += 1
+        self.sent.append(('edit', text, asyncio.get_running_loop().time()))
+        if self.fail_with:
+            raise self.fail_with
+
+
+def test_rapid_updates_are_coalesced(run_virtual):
+    message = FakeMessage()
+    progress = ProgressReporter(message, min_interval=1.0)
+
+    async def scenario():
+        progress.update('1/4 Excel')
+        await asyncio.sleep(0)
+        for text in ('2/4 Word', '3/4 PDF', '4/4 E-posta'):
+            progress.update(text)
+            await asyncio.sleep(0.1)
+        await progress.finish()
+
+    run_virtual(scenario())
+    assert message.sent == [('reply', '1/4 Excel', 0), ('edit', '4/4 E-posta', pytest.approx(1.0))]
+    assert progress.message.edit_calls == 1
+
+
+def test_edits_are_throttled_to_min_interval(run_virtual):
+    message = FakeMessage()
+    progress = ProgressReporter(message, min_interval=1.0)
+
+    async def scenario():
+        for step in range(30):
+            progress.update(f'adım {step}')
+            await asyncio.sleep(0.2)
+        await progress.finish()
+
+    run_virtual(scenario())
+    times = [at for _, _, at in message.sent]
+    assert all(later - earlier >= 1.0 - 1e-9 for earlier, later in zip(times, times[1:]))
+    # 6 sn boyunca en fazla saniyede bir düzenleme, son metin her zaman gösterilir
+    assert progress.message.edit_calls == 6
+    assert message.sent[-1][1] == 'adım 29'
+
+
+def test_finish_waits_for_pending_flush(run_virtual):
+    message = FakeMessage()
+    progress = ProgressReporter(message, min_interval=1.0)
+
+    async def scenario():
+        progress.update('hazırlanıyor')
+        await asyncio.sleep(0)
+        progress.update('PDF')
+        await progress.finish('✅ Tamamlandı')
+        # finish() döndüğünde son metin ekranda ve arka planda iş kalmamış
+        assert message.sent[-1][:2] == ('edit', '✅ Tamamlandı')
+        assert progress._task.done()
+        return asyncio.get_running_loop().time()
+
+    finished_at = run_virtual(scenario())
+    assert finished_at == pytest.approx(1.0)
+    assert progress.message.edit_calls == 1
+
+
+def test_finish_without_updates_returns_immediately(run_virtual):
+    message = FakeMessage()
+    progress = ProgressReporter(message, min_interval=1.0)
+
+    run_virtual(progress.finish())
+    assert message.sent == [] and progress.message is None
+
+
+@pytest.mark.parametrize('error', [BadRequest('Message is not modified'), TimedOut()])
+def test_failed_edit_does_not_block_finish(run_virtual, error):
+    message = FakeMessage(fail_with=error)
+    progress = ProgressReporter(message, min_interval=1.0)
+
+    async def scenario():
+        progress.update('ilk')
+        await asyncio.sleep(0)
+        await progress.finish('son')
+
+    run_virtual(scenario())
+    assert [text for _, text, _ in message.sent] == ['ilk', 'son']
+    assert progress._shown == 'son'
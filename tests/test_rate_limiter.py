@@ -0,0 +1,167 @@
+import asyncio
+
+import pytest
+from telegram.error import RetryAfter
+
+from rate_limiter import OutboundRateLimiter, PRIORITY_DOCUMENT, PRIORITY_MESSAGE, PRIORITY_PROGRESS
+
+
+class FakeApi:
+    """Bot API yerine: çağrıları sanal zamanla kaydeder, istenirse RetryAfter fırlatır"""
+
+    def __init__(self, retry_after=()):
+        self.calls = []
+        self.retry_after = list(retry_after)
+
+    def callback(self, name):
+        async def call():
+            self.calls.append((name, asyncio.get_running_loop().time()))
+            if self.retry_after:
+                raise RetryAfter(self.retry_after.pop(0))
+            return name
+        return call
+
+    def times(self, name=None):
+        return [at for called, at in self.calls if name is None or called == name]
+
+
+def _limiter(**kwargs):
+    settings = {'global_rate': 1000, 'chat_rate': 1000, 'chat_burst': 1000, 'group_rate_per_min': 60000, 'max_retries': 3}
+    settings.update(kwargs)
+    return OutboundRateLimiter(**settings)
+
+
+async def _send(limiter, api, name, chat_id, endpoint='sendMessage', rate_limit_args=None):
+    return await limiter.process_request(api.callback(name), (), {}, endpoint, {'chat_id': chat_id}, rate_limit_args)
+
+
+async def _with_limiter(limiter, scenario):
+    await limiter.initialize()
+    try:
+        return await scenario()
+    finally:
+        await limiter.shutdown()
+
+
+def test_private_chat_bucket_allows_burst_then_rate(run_virtual):
+    limiter = _limiter(chat_rate=1, chat_burst=3)
+    api = FakeApi()
+
+    async def scenario():
+        await asyncio.gather(*(_send(limiter, api, 'private', 1) for _ in range(6)))
+        # Başka sohbet bu sohbetin kovasını beklemez
+        started = asyncio.get_running_loop().time()
+        await _send(limiter, api, 'other', 2)
+        assert api.times('other') == [started]
+
+    run_virtual(_with_limiter(limiter, scenario))
+    assert api.times('private') == pytest.approx([0, 0, 0, 1, 2, 3])
+
+
+def test_group_chats_use_per_minute_bucket(run_virtual):
+    limiter = _limiter(chat_rate=1, chat_burst=1, group_rate_per_min=6)
+    api = FakeApi()
+
+    async def scenario():
+        await asyncio.gather(
+            *(_send(limiter, api, 'group', -100) for _ in range(3)),
+            *(_send(limiter, api, 'channel', '@kanal') for _ in range(2)),
+            *(_send(limiter, api, 'numeric', '-200') for _ in range(2)),
+        )
+
+    run_virtual(_with_limiter(limiter, scenario))
+    assert api.times('group') == pytest.approx([0, 10, 20])
+    assert api.times('channel') == pytest.approx([0, 10])
+    assert api.times('numeric') == pytest.approx([0, 10])
+
+
+def test_global_bucket_limits_all_chats(run_virtual):
+    limiter = _limiter(global_rate=2)
+    api = FakeApi()
+
+    async def scenario():
+        await asyncio.gather(*(_send(limiter, api, 'chat', chat_id) for chat_id in range(1, 7)))
+        # chat_id'siz istekler (getMe, getUpdates...) sınırlanmaz
+        started = asyncio.get_running_loop().time()
+        await limiter.process_request(api.callback('getMe'), (), {}, 'getMe', {}, None)
+        assert api.times('getMe') == [started]
+
+    run_virtual(_with_limiter(limiter, scenario))
+    assert api.times('chat') == pytest.approx([0, 0, 0.5, 1, 1.5, 2])
+
+
+def test_documents_go_before_messages_before_progress(run_virtual):
+    limiter = _limiter(global_rate=1)
+    api = FakeApi()
+
+    async def scenario():
+        await _send(limiter, api, 'first', 1)
+        await asyncio.gather(
+            _send(limiter, api, 'progress', 2, 'editMessageText'),
+            _send(limiter, api, 'action', 3, 'sendChatAction'),
+            _send(limiter, api, 'message', 4, 'sendMessage'),
+            _send(limiter, api, 'document', 5, 'sendDocument'),
+            # Çağrı bazında öncelik: düzenleme belge önceliğiyle gönderilir
+            _send(limiter, api, 'urgent_edit', 6, 'editMessageText', rate_limit_args=PRIORITY_DOCUMENT),
+        )
+
+    run_virtual(_with_limiter(limiter, scenario))
+    assert [name for name, _ in api.calls] == ['first', 'document', 'urgent_edit', 'message', 'progress', 'action']
+
+
+def test_retry_after_pauses_all_chats_and_retries(run_virtual):
+    limiter = _limiter(max_retries=3)
+    api = FakeApi(retry_after=[5, 5])
+
+    async def scenario():
+        flooded = asyncio.create_task(_send(limiter, api, 'flooded', 1))
+        await asyncio.sleep(1)
+        # Duraklama sırasında başka sohbetten gelen istek de bekler
+        assert await _send(limiter, api, 'other', 2) == 'other'
+        assert await flooded == 'flooded'
+
+    run_virtual(_with_limiter(limiter, scenario))
+    assert api.times('flooded') == pytest.approx([0, 5.1, 10.2])
+    assert api.times('other') == pytest.approx([5.1])
+
+    metrics = limiter.metrics()
+    assert metrics['retry_after_hits'] == 2
+    assert metrics['retry_after_seconds'] == 10
+
+
+def test_retry_after_gives_up_after_max_retries(run_virtual):
+    limiter = _limiter(max_retries=2)
+    api = FakeApi(retry_after=[1, 1, 1, 1])
+
+    async def scenario():
+        with pytest.raises(RetryAfter):
+            await _send(limiter, api, 'flooded', 1)
+
+    run_virtual(_with_limiter(limiter, scenario))
+    assert len(api.calls) == 3
+    assert limiter.metrics()['retry_after_hits'] == 3
+
+
+def test_metrics_count_requests_and_delays(run_virtual):
+    limiter = _limiter(chat_rate=1, chat_burst=1)
+    api = FakeApi()
+
+    async def scenario():
+        await asyncio.gather(
+            _send(limiter, api, 'document', 1, 'sendDocument'),
+            _send(limiter, api, 'message', 1, 'sendMessage'),
+            _send(limiter, api, 'progress', 1, 'editMessageText'),
+            _send(limiter, api, 'other', 2, 'sendMessage'),
+        )
+
+    run_virtual(_with_limiter(limiter, scenario))
+    metrics = limiter.metrics()
+    assert metrics['requests'] == 4
+    assert metrics['by_priority'] == {PRIORITY_DOCUMENT: 1, PRIORITY_MESSAGE: 2, PRIORITY_PROGRESS: 1}
+    assert metrics['throttled'] == 2
+    assert metrics['total_delay'] == pytest.approx(3)
+    assert metrics['max_delay'] == pytest.approx(2)
+    assert metrics['avg_delay'] == pytest.approx(0.75)
+    assert metrics['queued'] == 0
+    assert metrics['tracked_chats'] == 2
+    assert metrics['retry_after_hits'] == 0
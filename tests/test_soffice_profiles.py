@@ -0,0 +1,125 @@
+import subprocess
+import sys
+import textwrap
+import threading
+import time
+from pathlib import Path
+import pytest
+import config
+import pdf_converter
+
+# soffice yerine: profil kilidini taklit eder (aynı profil aynı anda kullanılırsa hata), PDF'i --outdir'e yazar
+FAKE_SOFFICE = '''
+import os, sys, time
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+
+args = sys.argv[1:]
+profile = Path(unquote(urlparse(args[0].split('=', 1)[1]).path))
+outdir = Path(args[args.index('--outdir') + 1])
+log = Path(os.environ['FAKE_SOFFICE_LOG'])
+profile.mkdir(parents=True, exist_ok=True)
+lock = profile / '.lock'
+try:
+    fd = os.open(lock, os.O_CREAT | os.O_EXCL)
+except FileExistsError:
+    sys.exit('profil kilitli')
+try:
+    with open(log, 'a') as f:
+        f.write(f'{profile.name}\\n')
+    time.sleep(float(os.environ.get('FAKE_SOFFICE_SLEEP', '0.2')))
+    for source in args[args.index('--outdir') + 2:]:
+        (outdir / (Path(source).stem + '.pdf')).write_bytes(b'%PDF-1.4')
+finally:
+    os.close(fd)
+    lock.unlink()
+'''
+
+
+@pytest.fixture
+def fake_soffice(tmp_path, monkeypatch):
+    script = tmp_path / 'soffice'
+    script.write_text(f'#!{sys.executable}\n' + textwrap.dedent(FAKE_SOFFICE))
+    script.chmod(0o755)
+    log = tmp_path / 'soffice.log'
+    monkeypatch.setenv('FAKE_SOFFICE_LOG', str(log))
+    monkeypatch.setattr(pdf_converter, 'find_soffice', lambda: str(script))
+    monkeypatch.setattr(pdf_converter, '_profile_slots', None)
+    monkeypatch.setattr(config, 'TEMP_DIR', str(tmp_path / 'temp'))
+    monkeypatch.setattr(config, 'OFFICE_SPAWN_SLOTS', 2)
+    return log
+
+
+def _sources(tmp_path, count):
+    sources = []
+    for index in range(count):
+        # Aynı ad farklı dizinlerde: çıktılar ortak dizinde birbirinin üzerine yazmamalı
+        path = tmp_path / f'is_{index}' / 'teklif.xlsx'
+        path.parent.mkdir()
+        path.write_bytes(b'xlsx')
+        sources.append(path)
+    return sources
+
+
+def test_concurrent_conversions_use_separate_profiles(tmp_path, fake_soffice):
+    sources = _sources(tmp_path, 6)
+    results = {}
+
+    def convert(path):
+        results[path] = pdf_converter._convert_with_soffice(path, path.with_suffix('.pdf'))
+
+    threads = [threading.Thread(target=convert, args=(path,)) for path in sources]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == {path: str(path.with_suffix('.pdf')) for path in sources}
+    assert all(path.with_suffix('.pdf').read_bytes() == b'%PDF-1.4' for path in sources)
+    # Sadece OFFICE_SPAWN_SLOTS kadar profil kullanılır, geçici çıktı dizinleri silinir
+    assert set(fake_soffice.read_text().split()) == {'profile_0', 'profile_1'}
+    assert sorted(p.name for p in (tmp_path / 'temp' / 'libreoffice').iterdir()) == ['profile_0', 'profile_1']
+
+
+def test_batch_call_moves_each_pdf_next_to_its_source(tmp_path, fake_soffice):
+    sources = [tmp_path / 'a.xlsx', tmp_path / 'b.docx']
+    for path in sources:
+        path.write_bytes(b'x')
+    results = pdf_converter._run_soffice(sources, 10)
+    assert results == {str(path): str(path.with_suffix('.pdf')) for path in sources}
+    assert fake_soffice.read_text().split() == ['profile_0']
+
+
+def test_hung_soffice_is_killed_and_profile_released(tmp_path, fake_soffice, monkeypatch):
+    monkeypatch.setenv('FAKE_SOFFICE_SLEEP', '30')
+    monkeypatch.setattr(config, 'OFFICE_SPAWN_SLOTS', 1)
+    source = _sources(tmp_path, 1)[0]
+    started = time.monotonic()
+    assert pdf_converter._run_soffice([source], 0.5) == {str(source): None}
+    assert time.monotonic() - started < 10
+    # Slot geri bırakıldı; sonraki dönüşüm aynı profille çalışır
+    monkeypatch.setenv('FAKE_SOFFICE_SLEEP', '0')
+    profile = tmp_path / 'temp' / 'libreoffice' / 'profile_0'
+    (profile / '.lock').unlink(missing_ok=True)  # Öldürülen sahte soffice kendi kilidini silemez
+    assert pdf_converter._run_soffice([source], 10) == {str(source): str(source.with_suffix('.pdf'))}
+
+
+def _alive(pid):
+    try:
+        state = Path(f'/proc/{pid}/stat').read_text().rsplit(')', 1)[1].split()[0]
+    except FileNotFoundError:
+        return False
+    return state != 'Z'
+
+
+@pytest.mark.skipif(not Path('/proc').is_dir(), reason='/proc gerekli')
+def test_watchdog_kills_the_whole_process_group(tmp_path):
+    # Kabuk arka planda uzun süren bir alt süreç bırakır (soffice -> soffice.bin gibi)
+    pid_file = tmp_path / 'child.pid'
+    with pytest.raises(subprocess.TimeoutExpired):
+        pdf_converter.run_with_watchdog(['sh', '-c', f'sleep 30 & echo $! > {pid_file}; wait'], 0.5)
+    pid = int(pid_file.read_text())
+    deadline = time.monotonic() + 5
+    while _alive(pid) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not _alive(pid)
@@ -0,0 +1,150 @@
+import asyncio
+
+import pytest
+from telegram import Update
+
+from update_processor import ChatSerialUpdateProcessor
+from webhook_server import fake_update
+
+
+def _update(chat_id, update_id):
+    return Update.de_json(fake_update('merhaba', chat_id, update_id), None)
+
+
+async def _settle():
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+class Recorder:
+    """Update işleyicisi yerine: başlangıç/bitiş sırasını ve eşzamanlılığı kaydeder"""
+
+    def __init__(self):
+        self.events = []
+        self.running = 0
+        self.max_running = 0
+        self.gates = {}
+
+    def handle(self, update):
+        gate = self.gates.setdefault(update.update_id, asyncio.Event())
+
+        async def coroutine():
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+            self.events.append(('start', update.update_id))
+            try:
+                await gate.wait()
+            finally:
+                self.running -= 1
+                self.events.append(('end', update.update_id))
+
+        return coroutine()
+
+    def release(self, *update_ids):
+        for update_id in update_ids:
+            self.gates.setdefault(update_id, asyncio.Event()).set()
+
+    def started(self):
+        return [update_id for event, update_id in self.events if event == 'start']
+
+
+async def _processor(**kwargs):
+    processor = ChatSerialUpdateProcessor(**kwargs)
+    await processor.initialize()
+    return processor
+
+
+def _submit(processor, recorder, update):
+    return asyncio.create_task(processor.process_update(update, recorder.handle(update)))
+
+
+def test_same_chat_updates_run_serially_in_order():
+    async def scenario():
+        processor = await _processor(max_concurrent_updates=8)
+        recorder = Recorder()
+        tasks = [_submit(processor, recorder, _update(1, update_id)) for update_id in range(1, 6)]
+        await _settle()
+
+        for update_id in range(1, 6):
+            assert recorder.started() == list(range(1, update_id + 1))
+            assert recorder.running == 1
+            recorder.release(update_id)
+            await _settle()
+
+        await asyncio.gather(*tasks)
+        assert recorder.events == [(event, update_id) for update_id in range(1, 6) for event in ('start', 'end')]
+
+    asyncio.run(scenario())
+
+
+def test_different_chats_run_in_parallel():
+    async def scenario():
+        processor = await _processor(max_concurrent_updates=8)
+        recorder = Recorder()
+        tasks = [_submit(processor, recorder, _update(chat_id, chat_id)) for chat_id in range(1, 5)]
+        await _settle()
+        assert sorted(recorder.started()) == [1, 2, 3, 4]
+        assert recorder.running == 4
+
+        # Bir sohbetin sıradaki update'i diğer sohbetleri beklemez
+        tasks.append(_submit(processor, recorder, _update(1, 10)))
+        recorder.release(1)
+        await _settle()
+        assert recorder.started()[-1] == 10
+        assert recorder.running == 4
+
+        recorder.release(2, 3, 4, 10)
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+
+
+def test_concurrency_cap_holds():
+    async def scenario():
+        processor = await _processor(max_concurrent_updates=3, max_pending_updates=100)
+        recorder = Recorder()
+        tasks = [_submit(processor, recorder, _update(chat_id, chat_id)) for chat_id in range(1, 11)]
+        # Sohbet sırası bekleyen update'ler slot tutmaz
+        tasks += [_submit(processor, recorder, _update(1, update_id)) for update_id in range(11, 16)]
+        await _settle()
+        assert recorder.running == 3
+
+        for update_id in range(1, 16):
+            recorder.release(update_id)
+            await _settle()
+            assert recorder.running <= 3
+
+        await asyncio.gather(*tasks)
+        assert recorder.max_running == 3
+        assert sorted(recorder.started()) == list(range(1, 16))
+
+    asyncio.run(scenario())
+
+
+def test_chat_locks_are_cleaned_up():
+    async def scenario():
+        processor = await _processor(max_concurrent_updates=8)
+        recorder = Recorder()
+        tasks = [_submit(processor, recorder, _update(1, update_id)) for update_id in (1, 2, 3)]
+        tasks.append(_submit(processor, recorder, _update(2, 4)))
+        await _settle()
+        assert processor._chat_locks[1][1] == 3
+        assert processor._chat_locks[2][1] == 1
+
+        recorder.release(4)
+        await _settle()
+        assert 2 not in processor._chat_locks
+
+        recorder.release(1, 2, 3)
+        await asyncio.gather(*tasks)
+        assert processor._chat_locks == {}
+
+        # Hata veren update de kilidi bırakır
+        async def failing():
+            raise RuntimeError('handler hatası')
+
+        with pytest.raises(RuntimeError):
+            await processor.process_update(_update(3, 5), failing())
+        assert processor._chat_locks == {}
+
+    asyncio.run(scenario())
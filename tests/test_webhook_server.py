@@ -0,0 +1,102 @@
+import asyncio
+import json
+import subprocess
+import sys
+from tornado.httpclient import AsyncHTTPClient
+from tornado.httpserver import HTTPServer
+from tornado.netutil import bind_sockets
+from telegram import Update
+from telegram.ext import (
+    ApplicationBuilder,
+    CallbackQueryHandler,
+    CommandHandler,
+    ConversationHandler,
+    MessageHandler,
+    TypeHandler,
+    filters,
+)
+from update_processor import collect_allowed_updates
+from webhook_server import SECRET_TOKEN_HEADER, fake_update, make_web_app
+
+SECRET = 'gizli-token'
+
+
+async def _noop(update, context):
+    pass
+
+
+def _application(*handlers):
+    application = ApplicationBuilder().token('123456:TEST').updater(None).build()
+    for handler in handlers:
+        application.add_handler(handler)
+    return application
+
+
+def _request(application, path, body=None, secret=SECRET):
+    """Sunucuyu rastgele portta aç, tek istek gönder: (durum kodu, gövde)"""
+    async def main():
+        server = HTTPServer(make_web_app(application, url_path='/webhook/', secret_token=SECRET,
+                                         diagnostics=lambda: {'documents': 'ok'}))
+        sockets = bind_sockets(0, '127.0.0.1')
+        server.add_sockets(sockets)
+        headers = {SECRET_TOKEN_HEADER: secret} if secret else {}
+        try:
+            response = await AsyncHTTPClient().fetch(
+                f'http://127.0.0.1:{sockets[0].getsockname()[1]}{path}',
+                method='GET' if body is None else 'POST', body=body, headers=headers, raise_error=False,
+            )
+            return response.code, response.body
+        finally:
+            server.stop()
+    return asyncio.run(main())
+
+
+def test_update_is_queued():
+    application = _application()
+    code, _ = _request(application, '/webhook', json.dumps(fake_update('/teklif', chat_id=42)))
+    assert code == 200
+    update = application.update_queue.get_nowait()
+    assert isinstance(update, Update)
+    assert (update.effective_chat.id, update.message.text) == (42, '/teklif')
+
+
+def test_wrong_or_missing_secret_is_rejected():
+    application = _application()
+    for secret in ('yanlis', SECRET[:-1], SECRET + 'x', None):
+        assert _request(application, '/webhook', json.dumps(fake_update()), secret=secret)[0] == 403
+    assert application.update_queue.empty()
+
+
+def test_invalid_body_is_bad_request():
+    application = _application()
+    assert _request(application, '/webhook/', '{bozuk')[0] == 400
+    assert application.update_queue.empty()
+
+
+def test_health_reports_starting_until_application_runs():
+    code, body = _request(_application(), '/health')
+    body = json.loads(body)
+    assert code == 503
+    assert (body['status'], body['pending_updates'], body['documents']) == ('starting', 0, 'ok')
+
+
+def test_allowed_updates_follow_registered_handlers():
+    conversation = ConversationHandler(
+        entry_points=[CommandHandler('start', _noop)],
+        states={0: [MessageHandler(filters.TEXT, _noop)]},
+        fallbacks=[CommandHandler('iptal', _noop)],
+    )
+    assert collect_allowed_updates(_application(conversation)) == [Update.MESSAGE]
+    assert collect_allowed_updates(_application(conversation, CallbackQueryHandler(_noop))) == [Update.MESSAGE, Update.CALLBACK_QUERY]
+
+
+def test_unknown_handler_requests_all_updates():
+    assert collect_allowed_updates(_application(TypeHandler(Update, _noop))) == Update.ALL_TYPES
+
+
+def test_polling_mode_does_not_load_webhook_server(repo_root):
+    # bot modülü webhook sunucusunu sadece webhook modunda içe aktarır
+    code = 'import sys, bot; print("webhook_server" in sys.modules)'
+    result = subprocess.run([sys.executable, '-c', code], cwd=repo_root, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == 'False'
@@ -0,0 +1,121 @@
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from pdf_reader import PDFReader
+from worker_pool import WorkerPool
+
+
+class Blocker:
+    """Thread havuzunda serbest bırakılana kadar bekleyen iş"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, value):
+        with self._lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            assert self.release.wait(10)
+            return value
+        finally:
+            with self._lock:
+                self.running -= 1
+
+
+async def _until(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'Beklenen durum oluşmadı'
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+def pool():
+    pool = WorkerPool(io_workers=2, cpu_workers=1, queue_size=3)
+    yield pool
+    pool.shutdown(wait=False)
+
+
+def test_run_io_admits_at_most_workers_plus_queue_size(pool):
+    blocker = Blocker()
+
+    async def scenario():
+        tasks = [asyncio.create_task(pool.run_io(blocker, value)) for value in range(8)]
+        await _until(lambda: blocker.running == 2)
+        await asyncio.sleep(0.05)
+
+        # 2 iş çalışıyor, 3 iş executor kuyruğunda, kalan 3 iş slot bekliyor
+        assert pool._io_executor._work_queue.qsize() == 3
+        assert len(pool._io_slots._waiters) == 3
+
+        blocker.release.set()
+        return await asyncio.gather(*tasks)
+
+    assert asyncio.run(scenario()) == list(range(8))
+    assert blocker.max_running == 2
+
+
+def test_run_cpu_admits_at_most_workers_plus_queue_size(pool):
+    async def scenario():
+        tasks = [asyncio.create_task(pool.run_cpu(time.sleep, 0.3)) for _ in range(6)]
+        await _until(lambda: pool._cpu_executor is not None and pool._cpu_executor._pending_work_items)
+        # 1 process + 3 kuyruk: 4 iş havuza girer, 2 iş slot bekler
+        assert len(pool._cpu_executor._pending_work_items) == 4
+        assert len(pool._cpu_slots._waiters) == 2
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+
+
+def test_run_cpu_accepts_pdf_reader_method(pool, tmp_path):
+    fitz = pytest.importorskip('fitz')
+    pdf_path = tmp_path / 'vergi_levhasi.pdf'
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), 'VERGI KIMLIK NO 1234567890', fontname='helv')
+    doc.save(pdf_path)
+    doc.close()
+
+    # bot.py vergi levhası OCR'ını bu şekilde process havuzuna gönderir
+    tax_info = asyncio.run(pool.run_cpu(PDFReader().extract_tax_info, str(pdf_path)))
+    assert tax_info['tax_number'] == '1234567890'
+
+    # İş gerçekten ayrı bir process'te çalışır
+    assert asyncio.run(pool.run_cpu(os.getpid)) != os.getpid()
+
+
+def test_run_cpu_falls_back_to_threads_without_cpu_workers():
+    pool = WorkerPool(io_workers=1, cpu_workers=0, queue_size=1)
+    try:
+        assert asyncio.run(pool.run_cpu(os.getpid)) == os.getpid()
+        assert pool._cpu_executor is None
+    finally:
+        pool.shutdown()
+
+
+def test_shutdown_cancels_queued_jobs(pool):
+    blocker = Blocker()
+
+    async def scenario():
+        tasks = [asyncio.create_task(pool.run_io(blocker, value)) for value in range(5)]
+        await _until(lambda: pool._io_executor._work_queue.qsize() == 3)
+
+        pool.shutdown(wait=False)
+        blocker.release.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        assert results[:2] == [0, 1]
+        assert all(isinstance(result, asyncio.CancelledError) for result in results[2:])
+
+        with pytest.raises(RuntimeError):
+            await pool.run_io(blocker, 5)
+
+    asyncio.run(scenario())
+    assert pool._cpu_executor is None
@@ -0,0 +1,49 @@
+import pytest
+from openpyxl import load_workbook
+from xlsx_patch import XlsxPatchError, XlsxTemplate, compare_workbooks
+
+FORM = 'gerek/Kullanıcı Yetkilendirme Formu.xlsx'
+OFFER = 'yeni.xlsx'
+
+
+def _openpyxl_fill(template_path, template, values, output_path):
+    """Aynı hücreleri openpyxl ile yaz (birleşik aralığın içi sol üst hücreye)"""
+    wb = load_workbook(template_path)
+    for key, value in values.items():
+        position = XlsxTemplate._position(key)
+        row, column = template.merged.get(position, position)
+        wb.active.cell(row=row, column=column).value = value
+    wb.save(output_path)
+
+
+@pytest.mark.parametrize('template_path, values', [
+    # Tipik doldurma (metin, sayı olan hücreye metin, e-posta/hyperlink hücresi)
+    (FORM, {'E6': 'ÖRNEK YAZILIM SANAYİ VE TİCARET LTD ŞTİ', 'E7': '1234567890',
+            'E8': 'ATATÜRK MAH. CUMHURİYET CAD. NO: 1\nÇANKAYA / ANKARA', 'E9': 'info@ornek.com.tr'}),
+    # Sayı/bool/boşaltma, şablonda olan metin, XML kaçışları, baştaki boşluk
+    (FORM, {'E6': 12345, 'E7': 1.5, 'E8': None, 'E9': True, 'C7': ' Adresi', 'E11': '<a & "b">', 'E12': '  boşluklu '}),
+    # Birleşik aralığın içi (B6:D6 -> B6), olmayan hücre ve olmayan satırlar
+    (FORM, {'D6': 'birleşik', 'G8': 'yeni hücre', 'A8': 'satır başı', 'B2': 'yeni satır', 'C30': 'sona yeni satır'}),
+    (OFFER, {'K2': 'Tarih: 18.10.2026', 'C9': 'TEST FİRMA A.Ş.', 'H9': 'T-2026-10001', 'A16': 1, 'C16': 'Hizmet',
+             'H16': 2, 'J16': '1,500.00 ₺', 'K22': '1,800.00 ₺', 'A20': '', 'L16': 'dışarıda', 'D16': 'C16:D16 içi'}),
+])
+def test_patch_matches_openpyxl(tmp_path, template_path, values):
+    template = XlsxTemplate(template_path)
+    expected, actual = tmp_path / 'openpyxl.xlsx', tmp_path / 'patch.xlsx'
+    _openpyxl_fill(template_path, template, values, expected)
+    template.fill(values, actual)
+    assert compare_workbooks(expected, actual) == []
+
+
+def test_template_is_reusable(tmp_path):
+    template = XlsxTemplate(FORM)
+    template.fill({'E6': 'İLK'}, tmp_path / 'first.xlsx')
+    template.fill({'E7': 'İKİNCİ'}, tmp_path / 'second.xlsx')
+    second = load_workbook(tmp_path / 'second.xlsx').active
+    assert second['E7'].value == 'İKİNCİ'
+    assert second['E6'].value == load_workbook(FORM).active['E6'].value
+
+
+def test_unsupported_value_is_rejected(tmp_path):
+    with pytest.raises(XlsxPatchError):
+        XlsxTemplate(FORM).fill({'E6': object()}, tmp_path / 'out.xlsx')
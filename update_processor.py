@@ -0,0 +1,145 @@
+"""
+Sohbet bazında sıralı, sohbetler arası eşzamanlı update işleme ve
+Telegram'dan istenecek update türleri (polling ve webhook modunda ortak)
+"""
+import asyncio
+import logging
+from telegram import Update
+from telegram.ext import (
+    BaseHandler,
+    BaseUpdateProcessor,
+    CallbackQueryHandler,
+    ChatJoinRequestHandler,
+    ChatMemberHandler,
+    ChosenInlineResultHandler,
+    CommandHandler,
+    ConversationHandler,
+    InlineQueryHandler,
+    MessageHandler,
+    PollAnswerHandler,
+    PollHandler,
+    PreCheckoutQueryHandler,
+    ShippingQueryHandler,
+)
+import config
+
+logger = logging.getLogger(__name__)
+
+# Handler tipi → Telegram'dan istenmesi gereken update türleri
+HANDLER_UPDATE_TYPES = {
+    CommandHandler: [Update.MESSAGE],
+    MessageHandler: [Update.MESSAGE],
+    CallbackQueryHandler: [Update.CALLBACK_QUERY],
+    InlineQueryHandler: [Update.INLINE_QUERY],
+    ChosenInlineResultHandler: [Update.CHOSEN_INLINE_RESULT],
+    ChatMemberHandler: [Update.MY_CHAT_MEMBER, Update.CHAT_MEMBER],
+    ChatJoinRequestHandler: [Update.CHAT_JOIN_REQUEST],
+    PollHandler: [Update.POLL],
+    PollAnswerHandler: [Update.POLL_ANSWER],
+    PreCheckoutQueryHandler: [Update.PRE_CHECKOUT_QUERY],
+    ShippingQueryHandler: [Update.SHIPPING_QUERY],
+}
+
+
+def collect_allowed_updates(application):
+    """
+    Kayıtlı handler'lara bakarak allowed_updates listesini çıkar.
+
+    Bilinmeyen bir handler tipi varsa güvenli tarafta kalıp tüm update
+    türlerini ister.
+
+    Returns:
+        list: Update türleri (ör: ['message'])
+    """
+    allowed = []
+
+    def visit(handler):
+        if isinstance(handler, ConversationHandler):
+            children = list(handler.entry_points) + list(handler.fallbacks)
+            for state_handlers in handler.states.values():
+                children.extend(state_handlers)
+            for child in children:
+                if not visit(child):
+                    return False
+            return True
+
+        for handler_type, update_types in HANDLER_UPDATE_TYPES.items():
+            if isinstance(handler, handler_type):
+                for update_type in update_types:
+                    if update_type not in allowed:
+                        allowed.append(update_type)
+                return True
+
+        logger.warning(f'⚠️ Bilinmeyen handler tipi: {type(handler).__name__}, tüm update türleri istenecek')
+        return False
+
+    for group_handlers in application.handlers.values():
+        for handler in group_handlers:
+            if isinstance(handler, BaseHandler) and not visit(handler):
+                return Update.ALL_TYPES
+
+    return allowed
+
+
+class ChatSerialUpdateProcessor(BaseUpdateProcessor):
+    """
+    Aynı sohbetten gelen update'leri geliş sırasıyla tek tek işler,
+    farklı sohbetleri ise paralel çalıştırır.
+
+    ConversationHandler state makinesi sohbet başına sıralı işlemeye
+    dayandığı için her sohbetin kendi kilidi vardır. Eşzamanlılık sınırı
+    kilit alındıktan sonra uygulanır; böylece sırasını bekleyen update'ler
+    diğer sohbetlerin çalışma slotlarını işgal etmez.
+    """
+
+    __slots__ = ('_concurrency', '_running', '_chat_locks')
+
+    def __init__(self, max_concurrent_updates=None, max_pending_updates=None):
+        self._concurrency = max_concurrent_updates or config.MAX_CONCURRENT_UPDATES
+        # Base semaphore: işlenen + sırasını bekleyen toplam update sınırı
+        super().__init__(max(max_pending_updates or config.MAX_PENDING_UPDATES, self._concurrency))
+        self._running = None
+        # chat_id -> [Lock, bekleyen update sayısı]
+        self._chat_locks = {}
+
+    @property
+    def max_concurrent_updates(self):
+        """Aynı anda çalışabilecek en fazla update sayısı"""
+        return self._concurrency
+
+    @staticmethod
+    def _chat_key(update):
+        if isinstance(update, Update):
+            if update.effective_chat:
+                return update.effective_chat.id
+            if update.effective_user:
+                return f'user:{update.effective_user.id}'
+        return None
+
+    async def do_process_update(self, update, coroutine):
+        key = self._chat_key(update)
+        if key is None:
+            async with self._running:
+                await coroutine
+            return
+
+        entry = self._chat_locks.get(key)
+        if entry is None:
+            entry = self._chat_locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+
+        try:
+            async with entry[0]:
+                async with self._running:
+                    await coroutine
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._chat_locks[key]
+
+    async def initialize(self):
+        self._running = asyncio.Semaphore(self._concurrency)
+        logger.info(f'🔀 Eşzamanlı update işleme: en fazla {self._concurrency} sohbet')
+
+    async def shutdown(self):
+        self._chat_locks.clear()
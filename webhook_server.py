@@ -0,0 +1,182 @@
+"""
+Webhook modu - Gömülü async HTTP sunucusu (tornado)
+
+Sadece tek replika (tek process) desteklenir. ConversationHandler durumu,
+user_data, sohbet kilitleri, belge kuyruğu ve hız sınırlayıcı process
+belleğindedir; kalıcılık (persistence) ve sohbete yapışkan yönlendirme
+yoktur. Yük dengeleyici arkasında birden fazla replika çalıştırılırsa aynı
+sohbetin update'leri farklı process'lere düşer ve konuşma bozulur.
+Yeniden başlatmada yarım kalan konuşmalar kaybolur, kullanıcı /start ile
+baştan başlar.
+"""
+import asyncio
+import hmac
+import json
+import logging
+import signal
+from http import HTTPStatus
+import tornado.web
+from tornado.httpserver import HTTPServer
+from telegram import Update
+import config
+
+logger = logging.getLogger(__name__)
+
+SECRET_TOKEN_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+
+def _secret_matches(received, expected):
+    """Secret token'ı sabit sürede karşılaştır (zamanlama saldırısına karşı)"""
+    if received is None:
+        return False
+    return hmac.compare_digest(received.encode('utf-8'), expected.encode('utf-8'))
+
+
+class TelegramWebhookHandler(tornado.web.RequestHandler):
+    """Telegram'dan gelen update'leri kabul edip uygulamanın kuyruğuna koyar"""
+
+    def initialize(self, bot_app, secret_token):
+        self.bot_app = bot_app
+        self.secret_token = secret_token
+
+    def set_default_headers(self):
+        self.set_header('Content-Type', 'application/json; charset="utf-8"')
+
+    async def post(self):
+        if self.secret_token and not _secret_matches(self.request.headers.get(SECRET_TOKEN_HEADER), self.secret_token):
+            logger.warning('⚠️ Webhook isteği reddedildi: secret token geçersiz')
+            raise tornado.web.HTTPError(HTTPStatus.FORBIDDEN)
+
+        try:
+            data = json.loads(self.request.body)
+            update = Update.de_json(data, self.bot_app.bot)
+        except Exception as e:
+            logger.error(f'❌ Webhook update parse hatası: {e}')
+            raise tornado.web.HTTPError(HTTPStatus.BAD_REQUEST)
+
+        if update:
+            await self.bot_app.update_queue.put(update)
+        self.set_status(HTTPStatus.OK)
+
+
+class HealthHandler(tornado.web.RequestHandler):
+    """Reverse proxy / platform sağlık kontrolü"""
+
+    def initialize(self, bot_app, diagnostics=None):
+        self.bot_app = bot_app
+        self.diagnostics = diagnostics
+
+    def get(self):
+        running = self.bot_app.running
+        self.set_status(HTTPStatus.OK if running else HTTPStatus.SERVICE_UNAVAILABLE)
+        body = {
+            'status': 'ok' if running else 'starting',
+            'pending_updates': self.bot_app.update_queue.qsize(),
+        }
+        rate_limiter = self.bot_app.bot.rate_limiter
+        if hasattr(rate_limiter, 'metrics'):
+            body['rate_limiter'] = rate_limiter.metrics()
+        if self.diagnostics:
+            body.update(self.diagnostics())
+        self.write(body)
+
+
+def make_web_app(application, url_path=None, secret_token=None, diagnostics=None):
+    """Webhook ve health endpoint'lerini içeren tornado uygulamasını oluştur"""
+    url_path = (url_path if url_path is not None else config.WEBHOOK_PATH).strip('/')
+    secret_token = secret_token if secret_token is not None else config.WEBHOOK_SECRET_TOKEN
+    return tornado.web.Application([
+        (rf'/{url_path}/?', TelegramWebhookHandler, {'bot_app': application, 'secret_token': secret_token}),
+        (r'/health/?', HealthHandler, {'bot_app': application, 'diagnostics': diagnostics}),
+    ])
+
+
+async def serve_webhook(application, allowed_updates, post_init=None, post_shutdown=None, diagnostics=None):
+    """
+    Uygulamayı webhook modunda çalıştır (SIGINT/SIGTERM ile durur).
+
+    Application.updater None olmalı; update'leri bu sunucu besler.
+    diagnostics: /health cevabına eklenecek dict'i döndüren callable (opsiyonel)
+    """
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:
+            pass
+
+    server = HTTPServer(make_web_app(application, diagnostics=diagnostics), xheaders=True)
+
+    async with application:
+        if post_init:
+            await post_init(application)
+
+        if config.WEBHOOK_SET_ON_START:
+            webhook_url = f"{config.WEBHOOK_URL.rstrip('/')}/{config.WEBHOOK_PATH.strip('/')}"
+            await application.bot.set_webhook(
+                url=webhook_url,
+                allowed_updates=allowed_updates,
+                secret_token=config.WEBHOOK_SECRET_TOKEN or None,
+                max_connections=config.WEBHOOK_MAX_CONNECTIONS,
+            )
+            logger.info(f'🌐 Webhook ayarlandı: {webhook_url}')
+
+        await application.start()
+        server.listen(config.WEBHOOK_PORT, address=config.WEBHOOK_LISTEN)
+        logger.info(f'🌐 Webhook sunucusu dinliyor: {config.WEBHOOK_LISTEN}:{config.WEBHOOK_PORT}')
+
+        try:
+            await stop_event.wait()
+        finally:
+            server.stop()
+            await application.stop()
+            if post_shutdown:
+                await post_shutdown(application)
+
+
+def fake_update(text='/start', chat_id=1, update_id=1):
+    """Lokal test için sahte bir mesaj update'inin JSON gövdesi"""
+    import time
+
+    payload = {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'from': {'id': chat_id, 'is_bot': False, 'first_name': 'Test'},
+            'text': text,
+        },
+    }
+    if text.startswith('/'):
+        payload['message']['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text.split()[0])}]
+    return payload
+
+
+def post_fake_update(url, text='/start', chat_id=1, secret_token=None, update_id=1):
+    """
+    Lokal test için webhook'a sahte bir mesaj update'i gönder.
+
+    Returns:
+        int: HTTP durum kodu
+    """
+    import httpx
+
+    payload = fake_update(text, chat_id, update_id)
+    headers = {SECRET_TOKEN_HEADER: secret_token} if secret_token else {}
+    response = httpx.post(url, json=payload, headers=headers, timeout=10)
+    return response.status_code
+
+
+if __name__ == '__main__':
+    # Test: çalışan bot'a sahte update gönder
+    # Kullanım: python webhook_server.py [metin] [chat_id]
+    import sys
+
+    text = sys.argv[1] if len(sys.argv) > 1 else '/start'
+    chat_id = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    url = f"http://127.0.0.1:{config.WEBHOOK_PORT}/{config.WEBHOOK_PATH.strip('/')}"
+
+    status = post_fake_update(url, text=text, chat_id=chat_id, secret_token=config.WEBHOOK_SECRET_TOKEN)
+    print(f'{url} → HTTP {status}')
@@ -0,0 +1,89 @@
+"""
+Bloklayan işler için worker havuzu (OCR, şablon doldurma, PDF dönüştürme, e-posta)
+"""
+import asyncio
+import functools
+import logging
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerPool:
+    """
+    Senkron kodu event loop dışında çalıştır.
+
+    - run_io: Ağ/disk/subprocess ağırlıklı işler (Gemini, LibreOffice, SendGrid) → thread havuzu
+    - run_cpu: İşlemci ağırlıklı işler (Tesseract/OpenCV OCR) → process havuzu
+
+    Her havuzun önünde sınırlı bir kuyruk vardır; kuyruk doluysa yeni işler
+    yer açılana kadar bekler (backpressure).
+    """
+
+    def __init__(self, io_workers=None, cpu_workers=None, queue_size=None):
+        self.io_workers = io_workers or config.IO_WORKERS
+        self.cpu_workers = config.CPU_WORKERS if cpu_workers is None else cpu_workers
+        self.queue_size = config.WORKER_QUEUE_SIZE if queue_size is None else queue_size
+
+        self._io_executor = ThreadPoolExecutor(
+            max_workers=self.io_workers,
+            thread_name_prefix='io-worker'
+        )
+        # Process havuzu ilk CPU işinde oluşturulur (spawn maliyeti başlangıçta ödenmesin)
+        self._cpu_executor = None
+
+        # Çalışan + bekleyen iş sınırı (semaphore'lar çalışan loop'a bağlanır)
+        self._io_slots = None
+        self._cpu_slots = None
+
+    def _get_cpu_executor(self):
+        if self._cpu_executor is None and self.cpu_workers > 0:
+            self._cpu_executor = ProcessPoolExecutor(
+                max_workers=self.cpu_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            logger.info(f'⚙️ CPU havuzu başlatıldı: {self.cpu_workers} process')
+        return self._cpu_executor
+
+    async def run_io(self, func, *args, **kwargs):
+        """I/O ağırlıklı senkron fonksiyonu thread havuzunda çalıştır ve sonucunu bekle"""
+        if self._io_slots is None:
+            self._io_slots = asyncio.Semaphore(self.io_workers + self.queue_size)
+
+        async with self._io_slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._io_executor,
+                functools.partial(func, *args, **kwargs)
+            )
+
+    async def run_cpu(self, func, *args, **kwargs):
+        """
+        CPU ağırlıklı senkron fonksiyonu process havuzunda çalıştır.
+
+        Fonksiyon ve argümanlar pickle edilebilir olmalı. CPU_WORKERS=0 ise
+        iş thread havuzunda çalışır.
+        """
+        executor = self._get_cpu_executor()
+        if executor is None:
+            return await self.run_io(func, *args, **kwargs)
+
+        if self._cpu_slots is None:
+            self._cpu_slots = asyncio.Semaphore(self.cpu_workers + self.queue_size)
+
+        async with self._cpu_slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                executor,
+                functools.partial(func, *args, **kwargs)
+            )
+
+    def shutdown(self, wait=True):
+        """Havuzları kapat"""
+        self._io_executor.shutdown(wait=wait, cancel_futures=not wait)
+        if self._cpu_executor is not None:
+            self._cpu_executor.shutdown(wait=wait, cancel_futures=not wait)
+            self._cpu_executor = None
+        logger.info('🛑 Worker havuzu kapatıldı')
@@ -0,0 +1,624 @@
+"""
+xlsx şablonlarını openpyxl olmadan doldurma
+
+Şablon zip'i bir kez belleğe okunur ve çalışma sayfası XML'indeki hücre
+ve satırların konumları indekslenir. fill() sadece hedef hücrelerin XML
+parçalarını değiştirir (yeni metinler sharedStrings'e eklenir), diğer
+tüm girdiler olduğu gibi kopyalanarak yeni zip yazılır. Stil (s="..")
+korunur; birleşik hücrelerde değer sol üst hücreye yazılır.
+"""
+import functools
+import html
+import posixpath
+import re
+import zipfile
+from io import BytesIO
+from pathlib import PurePosixPath
+from openpyxl.utils.cell import column_index_from_string, coordinate_from_string, get_column_letter, range_boundaries
+
+ROW_RE = re.compile(r'<row\b([^>]*?)(/>|>(.*?)</row>)', re.S)
+CELL_RE = re.compile(r'<c\b([^>]*?)(?:/>|>(.*?)</c>)', re.S)
+# Satır ve hücre başvuruları (<row r="5">, <c r="A5">)
+ROW_CELL_REF_RE = re.compile(r'(<(?:row|c)\b[^>]*?\sr="[A-Z]*)(\d+)"')
+ATTR_RE = re.compile(r'([\w:]+)="([^"]*)"')
+SIMPLE_SI_RE = re.compile(r'<si><t(?: xml:space="preserve")?>([^<]*)</t></si>')
+# XML 1.0'da izin verilmeyen kontrol karakterleri (openpyxl de reddeder)
+ILLEGAL_CHARS_RE = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+class XlsxPatchError(Exception):
+    """Şablon veya değer bu yolla yazılamıyor (çağıran openpyxl'e düşmeli)"""
+
+
+class XlsxTemplate:
+    """
+    Doldurulmaya hazır xlsx şablonu (değişmez; thread'ler arasında paylaşılabilir).
+
+    Desteklenenler: metin, sayı, bool ve None (hücreyi boşaltır) değerleri,
+    var olmayan hücre/satır ekleme, birleşik hücreler. Formül içeren
+    hücrelerin üzerine yazmak desteklenmez (calcChain bozulur).
+    insert_rows / with_page_breaks satır eklenmiş ve sayfalara bölünmüş
+    yeni bir şablon döndürür.
+    """
+
+    def __init__(self, source, sheet_index=0):
+        """
+        Args:
+            source: Şablon yolu veya xlsx baytları
+            sheet_index: Doldurulacak çalışma sayfası (workbook.xml sırası)
+        """
+        if isinstance(source, (bytes, bytearray)):
+            source = BytesIO(source)
+        with zipfile.ZipFile(source) as archive:
+            entries = [(info, archive.read(info)) for info in archive.infolist()]
+        self._load(entries, sheet_index)
+
+    def _load(self, entries, sheet_index, sheet_index_of=None):
+        self.entries = entries
+        self.sheet_index = sheet_index
+        parts = {info.filename: data for info, data in entries}
+
+        self.sheet_name, self.sheet_title = self._sheet_part(parts, sheet_index)
+        self.xml = parts[self.sheet_name].decode('utf-8')
+        self.strings_name = 'xl/sharedStrings.xml' if 'xl/sharedStrings.xml' in parts else None
+        self.strings_xml = parts[self.strings_name].decode('utf-8') if self.strings_name else None
+
+        if sheet_index_of is None:
+            self._index_sheet()
+        else:
+            # sheetData ve birleşik hücreler aynı: konumlar geçerli, yeniden taranmaz
+            self.merged, self._sheet_data, self.rows, self.cells = (
+                sheet_index_of.merged, sheet_index_of._sheet_data, sheet_index_of.rows, sheet_index_of.cells
+            )
+        self._index_strings()
+
+    def _derive(self, patched, same_sheet_data=False):
+        """
+        Bazı girdileri değiştirilmiş yeni şablon ({zip adı: metin}); bu şablon değişmez.
+
+        same_sheet_data: Sayfada sadece sheetData'dan sonraki (birleşik hücreler
+            hariç) kısım değişti; hücre indeksi bu şablondan alınır
+        """
+        template = XlsxTemplate.__new__(XlsxTemplate)
+        template._load([
+            (info, patched[info.filename].encode('utf-8') if info.filename in patched else data)
+            for info, data in self.entries
+        ], self.sheet_index, self if same_sheet_data else None)
+        return template
+
+    def _part(self, name):
+        return next(data for info, data in self.entries if info.filename == name).decode('utf-8')
+
+    @staticmethod
+    def _sheet_part(parts, sheet_index):
+        """workbook.xml + ilişkilerden sayfa XML'inin zip içindeki adı ve sayfa adı"""
+        workbook = parts['xl/workbook.xml'].decode('utf-8')
+        sheets = re.findall(r'<sheet\b[^>]*>', workbook)
+        if sheet_index >= len(sheets):
+            raise XlsxPatchError(f'{sheet_index}. çalışma sayfası yok')
+        attrs = dict(ATTR_RE.findall(sheets[sheet_index]))
+        rel_id = next((value for name, value in attrs.items() if name.endswith(':id')), None)
+
+        rels = parts['xl/_rels/workbook.xml.rels'].decode('utf-8')
+        for rel in re.findall(r'<Relationship\b[^>]*>', rels):
+            rel_attrs = dict(ATTR_RE.findall(rel))
+            if rel_attrs.get('Id') == rel_id:
+                name = _resolve_target('xl', rel_attrs['Target'])
+                if name not in parts:
+                    raise XlsxPatchError(f'Çalışma sayfası bulunamadı: {name}')
+                return name, html.unescape(attrs.get('name', ''))
+        raise XlsxPatchError(f'Çalışma sayfası ilişkisi bulunamadı: {rel_id}')
+
+    def _index_sheet(self):
+        """Satır ve hücrelerin XML içindeki konumları"""
+        # Birleşik hücre -> sol üst hücre
+        self.merged = {}
+        for ref in re.findall(r'<mergeCell ref="([^"]+)"', self.xml):
+            min_col, min_row, max_col, max_row = range_boundaries(ref)
+            for row_number in range(min_row, max_row + 1):
+                for column in range(min_col, max_col + 1):
+                    self.merged[(row_number, column)] = (min_row, min_col)
+
+        data = re.search(r'<sheetData\s*/>|<sheetData\b[^>]*>(.*?)</sheetData>', self.xml, re.S)
+        if data is None:
+            raise XlsxPatchError('sheetData bulunamadı')
+        self._sheet_data = data
+        # {satır no: (başlangıç, bitiş, açılış etiketi sonu, kapanış etiketi başı veya None)}
+        self.rows = {}
+        # {(satır, sütun): (başlangıç, bitiş, öznitelikler, içerik)}
+        self.cells = {}
+        if data.group(1) is None:
+            return
+
+        offset = data.start(1)
+        for row in ROW_RE.finditer(data.group(1)):
+            attrs = dict(ATTR_RE.findall(row.group(1)))
+            row_number = int(attrs['r'])
+            start, end = offset + row.start(), offset + row.end()
+            if row.group(3) is None:
+                self.rows[row_number] = (start, end, None, None)
+                continue
+            content_start = offset + row.start(3)
+            self.rows[row_number] = (start, end, content_start, offset + row.end(3))
+            for cell in CELL_RE.finditer(row.group(3)):
+                cell_attrs = ATTR_RE.findall(cell.group(1))
+                column = _column_index(dict(cell_attrs)['r'].rstrip('0123456789'))
+                self.cells[(row_number, column)] = (
+                    content_start + cell.start(), content_start + cell.end(), cell_attrs, cell.group(2) or ''
+                )
+
+    def _index_strings(self):
+        self.strings = {}
+        self.string_count = 0
+        if self.strings_xml is None:
+            return
+        items = re.findall(r'<si\b.*?</si>', self.strings_xml, re.S)
+        self.string_count = len(items)
+        for index, item in enumerate(items):
+            simple = SIMPLE_SI_RE.fullmatch(item)
+            if simple:
+                self.strings.setdefault(html.unescape(simple.group(1)), index)
+
+    def insert_rows(self, row, count, style_rows=None):
+        """
+        row. satırdan önce count boş satır ekle, alttaki satırları aşağı kaydır.
+
+        Yeni satırlar style_rows satırlarının (sırayla, dönüşümlü; varsayılan
+        bir üst satır) yüksekliğini, hücre stillerini ve satır içindeki
+        birleşik hücrelerini alır. Alttaki birleşik hücreler, boyut, sayfa
+        sonları, bu sayfaya ait tanımlı adlar (baskı alanı) ve resim
+        çapaları da kayar.
+
+        Returns:
+            XlsxTemplate: Yeni şablon (bu şablon değişmez)
+
+        Raises:
+            XlsxPatchError: Kaydırılamayan içerik var (formül, koşullu biçim,
+                veri doğrulama veya köprü kayan satırlarda)
+        """
+        if count <= 0:
+            return self
+        style_rows = tuple(style_rows or (row - 1,))
+        xml = self.xml
+        data = self._sheet_data
+        if data.group(1) is None:
+            raise XlsxPatchError('Boş sheetData desteklenmiyor')
+        if re.search(r'<f[\s>/]', data.group(1)):
+            raise XlsxPatchError('Formüllü sayfada satır eklenemez')
+        for tag in ('conditionalFormatting', 'dataValidation', 'hyperlink'):
+            for refs in re.findall(rf'<{tag}\b[^>]*?\s(?:sq)?ref="([^"]+)"', xml):
+                if any(range_boundaries(ref)[3] >= row for ref in refs.split()):
+                    raise XlsxPatchError(f'{tag} ({refs}) kayan satırlarda')
+
+        # Yeni satırlar: stil satırının hücreleri değersiz kopyalanır
+        patterns = []
+        for style_row in style_rows:
+            pattern = self.rows.get(style_row)
+            if pattern is None:
+                patterns.append(None)
+                continue
+            opening = ROW_RE.match(xml, pattern[0]).group(1)
+            row_attrs = ''.join(f' {name}="{value}"' for name, value in ATTR_RE.findall(opening) if name not in ('r', 'spans'))
+            cells = [
+                (get_column_letter(column), ''.join(f' {name}="{value}"' for name, value in cell[2] if name not in ('r', 't')))
+                for (number, column), cell in sorted(self.cells.items()) if number == style_row
+            ]
+            patterns.append((row_attrs, cells))
+        new_rows = []
+        for offset in range(count):
+            pattern = patterns[offset % len(patterns)]
+            if pattern is None:
+                continue
+            number = row + offset
+            row_attrs, cells = pattern
+            new_rows.append(f'<row r="{number}"{row_attrs}>')
+            new_rows.extend(f'<c r="{column}{number}"{attrs}/>' for column, attrs in cells)
+            new_rows.append('</row>')
+
+        # Alttaki satır ve hücre numaraları
+        following = [position[0] for number, position in self.rows.items() if number >= row]
+        start = min(following) if following else data.end(1)
+        tail = ROW_CELL_REF_RE.sub(lambda match: f'{match.group(1)}{int(match.group(2)) + count}"', xml[start:data.end(1)])
+        sheet = xml[:start] + ''.join(new_rows) + tail + xml[data.end(1):]
+
+        # Birleşik hücreler: kaydır/genişlet, stil satırlarının tek satırlık birleşimlerini çoğalt
+        merges = re.findall(r'<mergeCell ref="([^"]+)"', sheet)
+        if merges:
+            shifted = [_shift_rows(ref, row, count) for ref in merges]
+            row_merges = {style_row: [] for style_row in style_rows}
+            for ref in merges:
+                min_col, min_row, max_col, max_row = range_boundaries(ref)
+                if min_row == max_row and min_row in row_merges:
+                    row_merges[min_row].append((get_column_letter(min_col), get_column_letter(max_col)))
+            for offset in range(count):
+                number = row + offset
+                shifted.extend(f'{first}{number}:{last}{number}' for first, last in row_merges[style_rows[offset % len(style_rows)]])
+            merge_xml = f'<mergeCells count="{len(shifted)}">' + ''.join(f'<mergeCell ref="{ref}"/>' for ref in shifted) + '</mergeCells>'
+            sheet = re.sub(r'<mergeCells\b.*?</mergeCells>', lambda match: merge_xml, sheet, count=1, flags=re.S)
+
+        sheet = re.sub(r'(<dimension ref=")([^"]+)', lambda match: match.group(1) + _shift_rows(match.group(2), row, count), sheet, count=1)
+        sheet = re.sub(r'(<brk\b[^>]*?\sid=")(\d+)', lambda match: match.group(1) + _shift_rows(match.group(2), row, count), sheet)
+        patched = {self.sheet_name: sheet, 'xl/workbook.xml': self._shift_defined_names(row, count)}
+
+        # Resim çapaları (0 tabanlı satır)
+        drawing = self._drawing_part()
+        if drawing:
+            patched[drawing] = re.sub(
+                r'(<(?:\w+:)?row>)(\d+)(</(?:\w+:)?row>)',
+                lambda match: f'{match.group(1)}{int(match.group(2)) + (count if int(match.group(2)) >= row - 1 else 0)}{match.group(3)}',
+                self._part(drawing),
+            )
+        return self._derive(patched)
+
+    def with_page_breaks(self, rows, title_rows=None):
+        """
+        Elle sayfa sonları ekle (mevcutların yerine); her satırdan sonra yeni sayfa başlar.
+
+        Sayfa yüksekliğe sığdırılıyorsa (fitToHeight) Excel sonları yok
+        sayacağından sayfa sadece genişliğe sığdırılır.
+
+        Args:
+            rows: Sayfaların son satırları
+            title_rows: (ilk, son) her sayfada tekrarlanacak satırlar
+        """
+        sheet = re.sub(r'<rowBreaks\b[^>]*?(?:/>|>.*?</rowBreaks>)', '', self.xml, flags=re.S)
+        if rows:
+            breaks = ''.join(f'<brk id="{row}" max="16383" man="1"/>' for row in rows)
+            breaks = f'<rowBreaks count="{len(rows)}" manualBreakCount="{len(rows)}">{breaks}</rowBreaks>'
+            # Şemada rowBreaks'ten sonra gelebilecek ilk eleman
+            following = re.search(
+                r'<(?:colBreaks|customProperties|cellWatches|ignoredErrors|smartTags|drawing|legacyDrawing|'
+                r'legacyDrawingHF|drawingHF|picture|oleObjects|controls|webPublishItems|tableParts|extLst)\b|</worksheet>',
+                sheet,
+            )
+            sheet = sheet[:following.start()] + breaks + sheet[following.start():]
+            sheet = re.sub(r'<pageSetup\b[^>]*>', lambda match: _set_attr(match.group(0), 'fitToHeight', '0'), sheet, count=1)
+        patched = {self.sheet_name: sheet}
+
+        if title_rows:
+            workbook = self._part('xl/workbook.xml')
+            workbook = re.sub(
+                rf'<definedName\b(?=[^>]*name="_xlnm.Print_Titles")(?=[^>]*localSheetId="{self.sheet_index}")[^>]*>.*?</definedName>',
+                '', workbook, flags=re.S,
+            )
+            sheet_ref = html.escape("'" + self.sheet_title.replace("'", "''") + "'", quote=False)
+            title = f'<definedName name="_xlnm.Print_Titles" localSheetId="{self.sheet_index}">{sheet_ref}!${title_rows[0]}:${title_rows[1]}</definedName>'
+            if '<definedNames' in workbook:
+                workbook = re.sub(r'<definedNames\s*/>', '<definedNames></definedNames>', workbook)
+                workbook = workbook.replace('</definedNames>', title + '</definedNames>', 1)
+            else:
+                workbook = workbook.replace('</sheets>', f'</sheets><definedNames>{title}</definedNames>', 1)
+            patched['xl/workbook.xml'] = workbook
+        return self._derive(patched, same_sheet_data=True)
+
+    def _shift_defined_names(self, row, count):
+        """workbook.xml'de bu sayfaya ait tanımlı adların (baskı alanı, başlıklar) satırlarını kaydır"""
+        def shift(match):
+            sheet, ref = match.group(1), match.group(2)
+            name = sheet[1:-1].replace("''", "'") if sheet.startswith("'") else sheet
+            return f'{sheet}!{_shift_rows(ref, row, count) if name == self.sheet_title else ref}'
+
+        def defined_name(match):
+            text = html.unescape(match.group(2))
+            text = re.sub(r"('(?:[^']|'')+'|[^'!,\s()]+)!([$A-Z0-9:]+)", shift, text)
+            return f'{match.group(1)}{html.escape(text, quote=False)}{match.group(3)}'
+
+        return re.sub(r'(<definedName\b[^>]*>)(.*?)(</definedName>)', defined_name, self._part('xl/workbook.xml'), flags=re.S)
+
+    def _drawing_part(self):
+        """Sayfanın çizim (resim) girdisi; yoksa None"""
+        sheet_path = PurePosixPath(self.sheet_name)
+        rels_name = str(sheet_path.parent / '_rels' / f'{sheet_path.name}.rels')
+        if not any(info.filename == rels_name for info, _ in self.entries):
+            return None
+        for rel in re.findall(r'<Relationship\b[^>]*>', self._part(rels_name)):
+            attrs = dict(ATTR_RE.findall(rel))
+            if attrs.get('Type', '').endswith('/drawing'):
+                return _resolve_target(str(sheet_path.parent), attrs['Target'])
+        return None
+
+    def fill(self, values, output_path):
+        """
+        Hücreleri doldurup yeni xlsx yaz.
+
+        Args:
+            values: {'E6': değer} veya {(satır, sütun): değer}
+            output_path: Çıktı yolu veya yazılabilir dosya nesnesi
+
+        Raises:
+            XlsxPatchError: Değer türü veya hedef hücre desteklenmiyor
+        """
+        cells = {}
+        for key, value in values.items():
+            position = self._position(key)
+            cells[self.merged.get(position, position)] = value
+
+        new_strings = []
+        string_refs = 0
+        string_index = dict(self.strings)
+        rendered = {}
+        for position, value in cells.items():
+            existing = self.cells.get(position)
+            if existing and '<f' in existing[3]:
+                raise XlsxPatchError(f'{self._ref(position)} formül içeriyor')
+            if isinstance(value, str) and value != '':
+                if ILLEGAL_CHARS_RE.search(value):
+                    raise XlsxPatchError(f'{self._ref(position)} geçersiz karakter içeriyor')
+                if self.strings_xml is None:
+                    rendered[position] = ('inlineStr', f'<is>{_text_element(value)}</is>')
+                    continue
+                if value not in string_index:
+                    string_index[value] = self.string_count + len(new_strings)
+                    new_strings.append(value)
+                string_refs += 1
+                rendered[position] = ('s', f'<v>{string_index[value]}</v>')
+            elif value is None or value == '':
+                rendered[position] = (None, '')
+            elif isinstance(value, bool):
+                rendered[position] = ('b', f'<v>{int(value)}</v>')
+            elif isinstance(value, (int, float)):
+                rendered[position] = (None, f'<v>{value}</v>')
+            else:
+                raise XlsxPatchError(f'{self._ref(position)}: desteklenmeyen değer türü {type(value).__name__}')
+
+        patched = {self.sheet_name: self._patch_sheet(rendered).encode('utf-8')}
+        if new_strings or string_refs:
+            patched[self.strings_name] = self._patch_strings(new_strings, string_refs).encode('utf-8')
+
+        with zipfile.ZipFile(output_path, 'w') as archive:
+            for info, data in self.entries:
+                # writestr ZipInfo'yu değiştirir; paylaşılan şablondakini kullanma
+                entry = zipfile.ZipInfo(info.filename, info.date_time)
+                entry.compress_type = info.compress_type
+                entry.external_attr = info.external_attr
+                archive.writestr(entry, patched.get(info.filename, data))
+        return output_path
+
+    def _patch_sheet(self, rendered):
+        # (başlangıç, bitiş, yeni metin); sondan başa uygulanır
+        splices = []
+        by_row = {}
+        for (row_number, column), (cell_type, content) in rendered.items():
+            by_row.setdefault(row_number, []).append((column, cell_type, content))
+
+        for row_number, row_cells in by_row.items():
+            row_cells.sort()
+            row = self.rows.get(row_number)
+            if row is None or row[2] is None:
+                cells_xml = ''.join(self._cell_xml(row_number, *cell) for cell in row_cells)
+                if row is None:
+                    position = self._row_insert_position(row_number)
+                    splices.append((position, position, f'<row r="{row_number}">{cells_xml}</row>'))
+                else:
+                    start, end = row[0], row[1]
+                    opening = self.xml[start:end][:-2].rstrip()
+                    splices.append((start, end, f'{_drop_attr(opening, "spans")}>{cells_xml}</row>'))
+                continue
+
+            inserted = False
+            for column, cell_type, content in row_cells:
+                existing = self.cells.get((row_number, column))
+                if existing:
+                    start, end = existing[0], existing[1]
+                    splices.append((start, end, self._cell_xml(row_number, column, cell_type, content, existing[2])))
+                else:
+                    position = self._cell_insert_position(row_number, column)
+                    splices.append((position, position, self._cell_xml(row_number, column, cell_type, content)))
+                    inserted = True
+            if inserted:
+                # spans sadece ipucu; yeni hücre aralık dışına düşebilir
+                start, content_start = row[0], row[2]
+                splices.append((start, content_start, _drop_attr(self.xml[start:content_start - 1], 'spans') + '>'))
+
+        dimension = self._dimension(rendered)
+        if dimension:
+            splices.append(dimension)
+
+        # Baştan sona parçalar birleştirilir (büyük sayfalarda her yamada metni kopyalamamak için);
+        # sıralama kararlı, aynı noktaya eklenen hücreler sütun sırasını korur
+        xml = self.xml
+        pieces = []
+        position = 0
+        for start, end, text in sorted(splices, key=lambda splice: (splice[0], splice[1])):
+            pieces.append(xml[position:start])
+            pieces.append(text)
+            position = end
+        pieces.append(xml[position:])
+        return ''.join(pieces)
+
+    def _cell_xml(self, row_number, column, cell_type, content, attrs=None):
+        attrs = [(name, value) for name, value in (attrs or []) if name not in ('r', 't')]
+        parts = [f'r="{get_column_letter(column)}{row_number}"']
+        parts += [f'{name}="{value}"' for name, value in attrs]
+        if cell_type:
+            parts.append(f't="{cell_type}"')
+        opening = '<c ' + ' '.join(parts)
+        return f'{opening}>{content}</c>' if content else f'{opening}/>'
+
+    def _row_insert_position(self, row_number):
+        following = [row[0] for number, row in self.rows.items() if number > row_number]
+        if following:
+            return min(following)
+        data = self._sheet_data
+        if data.group(1) is None:
+            raise XlsxPatchError('Boş sheetData desteklenmiyor')
+        return data.end(1)
+
+    def _cell_insert_position(self, row_number, column):
+        following = [cell[0] for (number, col), cell in self.cells.items() if number == row_number and col > column]
+        return min(following) if following else self.rows[row_number][3]
+
+    def _dimension(self, rendered):
+        """<dimension ref> yazılan hücreleri kapsayacak şekilde genişletilir"""
+        match = re.search(r'<dimension ref="([^"]+)"', self.xml)
+        if match is None or not rendered:
+            return None
+        min_col, min_row, max_col, max_row = range_boundaries(match.group(1) if ':' in match.group(1) else f'{match.group(1)}:{match.group(1)}')
+        rows = [row for row, _ in rendered] + [min_row, max_row]
+        cols = [col for _, col in rendered] + [min_col, max_col]
+        ref = f'{get_column_letter(min(cols))}{min(rows)}:{get_column_letter(max(cols))}{max(rows)}'
+        return (match.start(1), match.end(1), ref)
+
+    def _patch_strings(self, new_strings, string_refs):
+        xml = self.strings_xml
+        total = self.string_count + len(new_strings)
+
+        def counts(match):
+            tag = match.group(0)
+            count = int(re.search(r'\bcount="(\d+)"', tag).group(1)) if ' count="' in tag else total
+            tag = _set_attr(tag, 'count', str(count + string_refs))
+            return _set_attr(tag, 'uniqueCount', str(total))
+
+        xml = re.sub(r'<sst\b[^>]*>', counts, xml, count=1)
+        additions = ''.join(f'<si>{_text_element(text)}</si>' for text in new_strings)
+        return xml.replace('</sst>', additions + '</sst>', 1)
+
+    @staticmethod
+    def _position(key):
+        if isinstance(key, tuple):
+            return key
+        column, row_number = coordinate_from_string(key)
+        return row_number, column_index_from_string(column)
+
+    @staticmethod
+    def _ref(position):
+        return f'{get_column_letter(position[1])}{position[0]}'
+
+
+_column_index = functools.lru_cache(maxsize=None)(column_index_from_string)
+
+
+def _text_element(text):
+    escaped = html.escape(text, quote=False)
+    if text != text.strip():
+        return f'<t xml:space="preserve">{escaped}</t>'
+    return f'<t>{escaped}</t>'
+
+
+def _drop_attr(tag, name):
+    return re.sub(rf'\s{name}="[^"]*"', '', tag)
+
+
+def _set_attr(tag, name, value):
+    if re.search(rf'\s{name}="', tag):
+        return re.sub(rf'(\s{name}=")[^"]*(")', rf'\g<1>{value}\g<2>', tag)
+    end = -2 if tag.endswith('/>') else -1
+    return f'{tag[:end]} {name}="{value}"{tag[end:]}'
+
+
+def _shift_rows(ref, row, count):
+    """Başvurudaki (A1:K28, $14:$14) row ve altındaki satır numaralarını count kadar artır"""
+    return re.sub(
+        r'(\$?[A-Z]{0,3}\$?)(\d+)',
+        lambda match: f'{match.group(1)}{int(match.group(2)) + count if int(match.group(2)) >= row else match.group(2)}',
+        ref,
+    )
+
+
+def _resolve_target(base, target):
+    """İlişki hedefi -> zip içindeki ad (mutlak veya base'e göre göreli)"""
+    if target.startswith('/'):
+        return target.lstrip('/')
+    return posixpath.normpath(posixpath.join(base, target))
+
+
+def compare_workbooks(expected_path, actual_path):
+    """
+    İki xlsx'in openpyxl ile okunduğunda aynı olup olmadığını kontrol et
+    (değer, stil, birleşik hücreler, satır/sütun ölçüleri, baskı alanı ve sayfa sonları).
+
+    Returns:
+        list: Farklar (boşsa eşdeğer)
+    """
+    from copy import copy
+    from openpyxl import load_workbook
+
+    expected, actual = load_workbook(expected_path).active, load_workbook(actual_path).active
+    differences = []
+    coordinates = {cell.coordinate for ws in (expected, actual) for row in ws.iter_rows() for cell in row}
+    for coordinate in sorted(coordinates):
+        a, b = expected[coordinate], actual[coordinate]
+        if a.value != b.value:
+            differences.append(f'{coordinate}: {a.value!r} != {b.value!r}')
+        for attribute in ('font', 'fill', 'border', 'alignment', 'number_format', 'protection'):
+            # StyleProxy kendisiyle bile eşit çıkmaz; kopyaları karşılaştırılır
+            if copy(getattr(a, attribute)) != copy(getattr(b, attribute)):
+                differences.append(f'{coordinate} {attribute} farklı')
+    if set(map(str, expected.merged_cells.ranges)) != set(map(str, actual.merged_cells.ranges)):
+        differences.append('birleşik hücreler farklı')
+    for key, dimension in expected.column_dimensions.items():
+        if dimension.width != actual.column_dimensions[key].width:
+            differences.append(f'{key} sütun genişliği farklı')
+    for key, dimension in expected.row_dimensions.items():
+        if dimension.height != actual.row_dimensions[key].height:
+            differences.append(f'{key}. satır yüksekliği farklı')
+    if expected.print_area != actual.print_area or len(expected._images) != len(actual._images):
+        differences.append('baskı alanı / resimler farklı')
+    if expected.print_title_rows != actual.print_title_rows or expected.page_setup.fitToHeight != actual.page_setup.fitToHeight:
+        differences.append('baskı başlıkları / sayfaya sığdırma farklı')
+    if [brk.id for brk in expected.row_breaks.brk] != [brk.id for brk in actual.row_breaks.brk]:
+        differences.append('sayfa sonları farklı')
+    return differences
+
+
+if __name__ == '__main__':
+    # Eşdeğerlik ve hız kontrolü: python xlsx_patch.py [tekrar]
+    import sys
+    import tempfile
+    import time
+    from pathlib import Path
+    from openpyxl import load_workbook
+
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    cases = {
+        'gerek/Kullanıcı Yetkilendirme Formu.xlsx': [
+            # Tipik doldurma (metin, sayı olan hücreye metin, e-posta/hyperlink hücresi)
+            {'E6': 'ÖRNEK YAZILIM SANAYİ VE TİCARET LTD ŞTİ', 'E7': '1234567890',
+             'E8': 'ATATÜRK MAH. CUMHURİYET CAD. NO: 1\nÇANKAYA / ANKARA', 'E9': 'info@ornek.com.tr'},
+            # Sayı/bool/boşaltma, şablonda olan metin, XML kaçışları, baştaki boşluk
+            {'E6': 12345, 'E7': 1.5, 'E8': None, 'E9': True, 'C7': ' Adresi', 'E11': '<a & "b">', 'E12': '  boşluklu '},
+            # Birleşik aralığın içi (B6:D6 -> B6), olmayan hücre ve olmayan satırlar
+            {'D6': 'birleşik', 'G8': 'yeni hücre', 'A8': 'satır başı', 'B2': 'yeni satır', 'C30': 'sona yeni satır'},
+        ],
+        'yeni.xlsx': [
+            {'K2': 'Tarih: 18.10.2026', 'C9': 'TEST FİRMA A.Ş.', 'H9': 'T-2026-10001', 'A16': 1, 'C16': 'Hizmet',
+             'H16': 2, 'J16': '1,500.00 ₺', 'K22': '1,800.00 ₺', 'A20': '', 'L16': 'dışarıda', 'D16': 'C16:D16 içi'},
+        ],
+    }
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        for template_path, fills in cases.items():
+            template = XlsxTemplate(template_path)
+            for index, values in enumerate(fills):
+                expected = Path(tmp) / f'openpyxl_{index}.xlsx'
+                actual = Path(tmp) / f'patch_{index}.xlsx'
+                wb = load_workbook(template_path)
+                for key, value in values.items():
+                    ws = wb.active
+                    row, column = XlsxTemplate._position(key)
+                    row, column = template.merged.get((row, column), (row, column))
+                    ws.cell(row=row, column=column).value = value
+                wb.save(expected)
+                template.fill(values, actual)
+                differences = compare_workbooks(expected, actual)
+                failed = failed or bool(differences)
+                print(f'{"✅" if not differences else "❌"} {Path(template_path).name} #{index + 1}: '
+                      f'{"eşdeğer" if not differences else "; ".join(differences[:5])}')
+
+            values = fills[0]
+            started = time.perf_counter()
+            for _ in range(repeat):
+                wb = load_workbook(template_path)
+                for key, value in values.items():
+                    row, column = template.merged.get(XlsxTemplate._position(key), XlsxTemplate._position(key))
+                    wb.active.cell(row=row, column=column).value = value
+                wb.save(Path(tmp) / 'bench.xlsx')
+            openpyxl_ms = (time.perf_counter() - started) / repeat * 1000
+            started = time.perf_counter()
+            for _ in range(repeat):
+                template.fill(values, Path(tmp) / 'bench.xlsx')
+            patch_ms = (time.perf_counter() - started) / repeat * 1000
+            print(f'📊 {Path(template_path).name}: openpyxl {openpyxl_ms:.1f} ms, XML yaması {patch_ms:.1f} ms')
+
+    sys.exit(1 if failed else 0)